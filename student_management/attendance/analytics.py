@@ -0,0 +1,80 @@
+"""Attendance trends: present and total counts per day, week or month.
+
+Each series is one grouped query. Buckets that ended before the current one
+are closed; they are cached under the attendance history version, which
+every write to a past date bumps, so later requests only aggregate the
+current bucket.
+"""
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from .cache import get_attendance_history_version
+
+SERIES_KEY = 'attendance-series:{}:{}:{}:{}:{}'
+
+# ``date`` is already a day, so days group on the column itself.
+INTERVALS = {
+    'day': F('date'),
+    'week': TruncWeek('date'),
+    'month': TruncMonth('date'),
+}
+
+GROUPS = {
+    'course': 'subject_id',
+    'student': 'student_id',
+}
+
+
+def current_bucket_start(interval, today):
+    if interval == 'week':
+        return today - timedelta(days=today.weekday())
+    if interval == 'month':
+        return today.replace(day=1)
+    return today
+
+
+def _buckets(queryset, interval, group_by):
+    fields = ['bucket', *([GROUPS[group_by]] if group_by else [])]
+    rows = (
+        queryset.annotate(bucket=INTERVALS[interval]).values(*fields)
+        .annotate(total=Count('pk'), present=Count('pk', filter=Q(is_present=True)))
+        .order_by(*fields)
+    )
+    buckets = []
+    for row in rows:
+        bucket = {'start': row['bucket']}
+        if group_by:
+            bucket[group_by] = row[GROUPS[group_by]]
+        bucket.update({
+            'present': row['present'],
+            'total': row['total'],
+            'percentage': round(row['present'] / row['total'] * 100, 2),
+        })
+        buckets.append(bucket)
+    return buckets
+
+
+def attendance_series(queryset, interval, group_by=None, cache_key=None):
+    """Buckets of ``queryset`` ordered by start date (and group).
+
+    ``cache_key`` identifies the filters applied to ``queryset``; without it
+    nothing is cached.
+    """
+    timeout = getattr(settings, 'ATTENDANCE_SERIES_CACHE_TIMEOUT', 3600)
+    current = current_bucket_start(interval, timezone.localdate())
+    key = None
+    if cache_key is not None and timeout:
+        digest = hashlib.sha1(cache_key.encode()).hexdigest()
+        key = SERIES_KEY.format(get_attendance_history_version(), interval, group_by, current.isoformat(), digest)
+        closed = cache.get(key)
+        if closed is not None:
+            return closed + _buckets(queryset.filter(date__gte=current), interval, group_by)
+
+    buckets = _buckets(queryset, interval, group_by)
+    if key is not None:
+        cache.set(key, [bucket for bucket in buckets if bucket['start'] < current], timeout)
+    return buckets
@@ -0,0 +1,142 @@
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DEFAULT_DB_ALIAS
+from django.http import JsonResponse
+from rest_framework import exceptions, status
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from .cache import TOKEN_KEY
+from .models import Student, User
+
+
+def _from_values(model, values):
+    # from_db takes the values in field order; fields left out are deferred
+    # and load on first access.
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+def _cache_entry(user):
+    student = user._cached_student
+    return {
+        'user_id': user.pk,
+        'username': user.username,
+        'is_active': user.is_active,
+        'role': user.role,
+        'student': (student.name, student.roll_number) if student is not None else None,
+    }
+
+
+def _from_cache_entry(key, entry):
+    # Only non-staff users are cached, so the flags are known.
+    user = _from_values(User, {
+        'id': entry['user_id'], 'username': entry['username'], 'is_active': entry['is_active'],
+        'role': entry['role'], 'is_staff': False, 'is_superuser': False,
+    })
+    user._cached_student = None
+    if entry['student'] is not None:
+        name, roll_number = entry['student']
+        user._cached_student = _from_values(Student, {'user_id': user.pk, 'name': name, 'roll_number': roll_number})
+        user._cached_student.user = user
+    token = _from_values(Token, {'key': key, 'user_id': user.pk})
+    token.user = user
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that resolves token, user and student profile in
+    one joined query and caches the result for a short time.
+
+    The cache (on disk, shared by the workers) holds only the fields requests
+    use: the user's id, username, role and active flag and the student's name
+    and roll number. Other user fields load from the database if a view reads
+    them. Staff users are not cached, so their flags are always read fresh.
+
+    The student profile (or ``None``) is exposed as ``request.student``.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            request._request.student = getattr(result[0], '_cached_student', None)
+        return result
+
+    def authenticate_credentials(self, key):
+        cache_key = TOKEN_KEY.format(key)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            token = _from_cache_entry(key, entry)
+        else:
+            try:
+                token = self.get_model().objects.select_related('user', 'user__student').get(key=key)
+            except self.get_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            try:
+                token.user._cached_student = token.user.student
+            except ObjectDoesNotExist:
+                token.user._cached_student = None
+            if not (token.user.is_staff or token.user.is_superuser):
+                cache.set(cache_key, _cache_entry(token.user), timeout=getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (token.user, token)
+
+
+def get_request_student(request):
+    """The authenticated user's Student profile.
+
+    Uses the profile loaded by CachedTokenAuthentication when available and
+    raises Student.DoesNotExist when the user has none.
+    """
+    if hasattr(request, 'student'):
+        if request.student is None:
+            raise Student.DoesNotExist
+        return request.student
+    return Student.objects.get(user=request.user)
+
+
+async def aauthenticate(request):
+    """Token authentication for plain Django async views.
+
+    Sets ``request.user`` and ``request.student`` like CachedTokenAuthentication
+    and returns the user, or None when no token was sent. Raises
+    AuthenticationFailed for a malformed or unknown token.
+    """
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != b'token':
+        return None
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+    user, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(key)
+    request.user = user
+    request.student = user._cached_student
+    return user
+
+
+def unauthorized(detail):
+    """DRF's 401 response for a failed token authentication."""
+    response = JsonResponse({"detail": detail}, status=status.HTTP_401_UNAUTHORIZED)
+    response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def token_required(view):
+    """Token authentication and IsAuthenticated for async views, with DRF's 401 bodies."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+        except exceptions.AuthenticationFailed as e:
+            return unauthorized(e.detail)
+        if user is None:
+            return unauthorized(exceptions.NotAuthenticated.default_detail)
+        return await view(request, *args, **kwargs)
+    return inner
@@ -0,0 +1,117 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from student_management import metrics
+
+# Responses are keyed by endpoint, student and that student's data version.
+# Writes only bump the version, so stale entries are never read again and
+# simply age out of the cache.
+VERSION_KEY = 'student-version:{}'
+COURSES_VERSION_KEY = 'courses-version'
+ATTENDANCE_HISTORY_VERSION_KEY = 'attendance-history-version'
+COURSE_MARKS_VERSION_KEY = 'course-marks-version:{}'
+ROSTER_VERSION_KEY = 'roster-version'
+RESPONSE_KEY = 'student-response:{}:{}:{}:{}'
+TOKEN_KEY = 'auth-token:{}'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _new_version():
+    # Versions are timestamps rather than counters, so a version that was
+    # evicted or rolled back can never come back with a value an old cached
+    # response still uses.
+    return time.time_ns()
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_version(key):
+    cache.set(key, _new_version(), timeout=None)
+
+
+def bump_student_version(student_id):
+    _bump_version(VERSION_KEY.format(student_id))
+
+
+def get_student_version(student_id):
+    return _get_version(VERSION_KEY.format(student_id))
+
+
+def bump_courses_version():
+    # Course names and codes are embedded in every student's responses.
+    _bump_version(COURSES_VERSION_KEY)
+
+
+def get_courses_version():
+    return _get_version(COURSES_VERSION_KEY)
+
+
+def bump_attendance_history_version():
+    # Attendance before today changed, so cached past analytics buckets are stale.
+    _bump_version(ATTENDANCE_HISTORY_VERSION_KEY)
+
+
+def get_attendance_history_version():
+    return _get_version(ATTENDANCE_HISTORY_VERSION_KEY)
+
+
+def bump_course_marks_version(course_id):
+    # Marks in this course changed, so its cached standings are stale.
+    _bump_version(COURSE_MARKS_VERSION_KEY.format(course_id))
+
+
+def get_course_marks_version(course_id):
+    return _get_version(COURSE_MARKS_VERSION_KEY.format(course_id))
+
+
+def bump_roster_version():
+    # A student or user was added, renamed or removed; whole-roster exports are stale.
+    _bump_version(ROSTER_VERSION_KEY)
+
+
+def get_roster_version():
+    return _get_version(ROSTER_VERSION_KEY)
+
+
+def get_cached_response(endpoint, student_id, build):
+    key = RESPONSE_KEY.format(endpoint, student_id, get_student_version(student_id), get_courses_version())
+    data = cache.get(key)
+    if data is not None:
+        _record('hits')
+        return data
+    _record('misses')
+    data = build()
+    cache.set(key, data, timeout=getattr(settings, 'STUDENT_RESPONSE_CACHE_TIMEOUT', 3600))
+    return data
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+    metrics.inc('student_response_cache_requests_total', {'result': outcome})
+
+
+def cache_stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+    }
+
+
+def invalidate_cached_tokens(*keys):
+    if keys:
+        cache.delete_many([TOKEN_KEY.format(key) for key in keys])
@@ -0,0 +1,87 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.views.decorators.http import condition
+from .cache import get_courses_version, get_student_version
+from .models import Student
+
+
+def _aggregate(model, expression):
+    return Subquery(
+        model.objects.filter(student=OuterRef('pk')).order_by().values('student').annotate(value=expression).values('value')
+    )
+
+
+def _load_validators(user, sources, weak):
+    if not user.is_authenticated or user.role != 'student':
+        return None
+    annotations = {}
+    for i, (model, field) in enumerate(sources):
+        annotations[f'count_{i}'] = _aggregate(model, Count('pk', output_field=IntegerField()))
+        annotations[f'updated_{i}'] = _aggregate(model, Max(field))
+    # Student.pk is the user id, so a single query over the (student, updated)
+    # indexes answers every source.
+    row = Student.objects.filter(pk=user.pk).annotate(**annotations).values(*annotations).first()
+    if row is None:
+        return None
+    timestamps = [row[f'updated_{i}'] for i in range(len(sources)) if row[f'updated_{i}'] is not None]
+    parts = [f"{row[f'count_{i}'] or 0}:{row[f'updated_{i}']}" for i in range(len(sources))]
+    # The student's name and roll number, and course names and codes, are
+    # embedded in the responses as well.
+    parts.append(str(get_student_version(user.pk)))
+    parts.append(str(get_courses_version()))
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    etag = f'W/"{digest}"' if weak else f'"{digest}"'
+    return etag, max(timestamps) if timestamps else None
+
+
+def student_data_condition(*sources, weak=False):
+    """Conditional GET for a student's own data.
+
+    ``sources`` are ``(model, timestamp_field)`` pairs with a ``student``
+    foreign key. The ETag covers the row count and latest timestamp of each,
+    so inserts, updates and deletes all change it, plus the student and
+    courses cache versions for profile and course renames. An unchanged
+    resource is answered with 304 before the view runs.
+    """
+    def get_validators(request):
+        if not hasattr(request, '_student_validators'):
+            request._student_validators = _load_validators(request.user, sources, weak)
+        return request._student_validators
+
+    def etag_func(request, *args, **kwargs):
+        validators = get_validators(request)
+        return validators[0] if validators else None
+
+    def last_modified_func(request, *args, **kwargs):
+        validators = get_validators(request)
+        return validators[1] if validators else None
+
+    conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+    def strip_validators(response):
+        # Only successful bodies may be revalidated later.
+        if response.status_code not in (200, 304):
+            for header in ('ETag', 'Last-Modified'):
+                if response.has_header(header):
+                    del response[header]
+        return response
+
+    def decorator(view):
+        conditional_view = conditional(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_inner(request, *args, **kwargs):
+                # Load the validators in the sync thread; the condition
+                # decorator then reads them from the request.
+                await sync_to_async(get_validators)(request)
+                return strip_validators(await conditional_view(request, *args, **kwargs))
+            return async_inner
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            return strip_validators(conditional_view(request, *args, **kwargs))
+        return inner
+    return decorator
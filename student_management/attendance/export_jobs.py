@@ -0,0 +1,228 @@
+"""Reusable all-students CSV exports, generated in the background.
+
+An export is named after the data version it was built from: the newest
+``updated_at`` of attendance and marks, the newest deletion tombstone, the
+student and course counts, and the cache versions bumped when students,
+users or courses change. While that version holds, every request is served
+the same gzip-compressed file from ``EXPORTS_DIR`` instead of rescanning
+the tables.
+
+A missing export is written by one background thread per version. It is
+written to a ``.part`` file that is renamed when complete, so any worker
+process can serve a finished export and sees a running one. Only the newest
+``EXPORTS_MAX_STORED`` exports are kept.
+"""
+import gzip
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.http import FileResponse, HttpResponse
+from .cache import get_courses_version, get_roster_version
+from .exports import write_student_data_csv
+from .models import Attendance, Course, DeletedRecord, Marks, Student
+
+logger = logging.getLogger(__name__)
+
+READY = 'ready'
+RUNNING = 'running'
+FAILED = 'failed'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_lock = threading.Lock()
+# Versions this process is writing or failed to write; finished files
+# speak for themselves.
+_jobs = {}
+
+
+def _exports_dir():
+    return Path(getattr(settings, 'EXPORTS_DIR', Path(tempfile.gettempdir()) / 'student_management_exports'))
+
+
+def data_version():
+    # Index lookups and counts of the small tables; nothing here scans
+    # attendance or marks.
+    state = (
+        Attendance.objects.aggregate(latest=Max('updated_at'))['latest'],
+        Marks.objects.aggregate(latest=Max('updated_at'))['latest'],
+        DeletedRecord.objects.aggregate(latest=Max('pk'))['latest'],
+        Student.objects.count(),
+        Course.objects.count(),
+        get_roster_version(),
+        get_courses_version(),
+    )
+    return hashlib.sha1(repr(state).encode()).hexdigest()[:20]
+
+
+def export_path(version):
+    # Versions are generated above; anything else cannot name an export.
+    if not version.isalnum():
+        return None
+    return _exports_dir() / f'all_students_data-{version}.csv.gz'
+
+
+def _part_path(path):
+    return path.with_name(path.name + '.part')
+
+
+def job_status(version):
+    """``READY``, ``RUNNING`` or ``FAILED``; None for an unknown version."""
+    path = export_path(version)
+    if path is None:
+        return None
+    if path.exists():
+        return READY
+    with _lock:
+        status = _jobs.get(version)
+    if status is None and _is_running_elsewhere(_part_path(path)):
+        status = RUNNING
+    return status
+
+
+def _is_running_elsewhere(part):
+    # The writer touches the file as it goes; a stale one was abandoned.
+    try:
+        return time.time() - part.stat().st_mtime < getattr(settings, 'EXPORT_STALE_SECONDS', 600)
+    except FileNotFoundError:
+        return False
+
+
+def start_export():
+    """Start writing the export of the current data unless it exists or is running.
+
+    Returns the version and its status.
+    """
+    version = data_version()
+    path = export_path(version)
+    with _lock:
+        if path.exists():
+            return version, READY
+        if _jobs.get(version) == RUNNING:
+            return version, RUNNING
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part = _part_path(path)
+        if _is_running_elsewhere(part):
+            return version, RUNNING
+        part.unlink(missing_ok=True)
+        try:
+            output = open(part, 'xb')
+        except FileExistsError:
+            # Another process claimed it since.
+            return version, RUNNING
+        _jobs[version] = RUNNING
+    logger.info("Starting export %s", version)
+    threading.Thread(target=_write_export, args=(version, output), daemon=True).start()
+    return version, RUNNING
+
+
+def _write_export(version, output):
+    path = export_path(version)
+    started = time.perf_counter()
+    status = FAILED
+    try:
+        with output, gzip.GzipFile(fileobj=output, mode='wb', compresslevel=6) as compressed, \
+                io.TextIOWrapper(compressed, encoding='utf-8', newline='') as text:
+            student_count = write_student_data_csv(text)
+        os.replace(output.name, path)
+        status = READY
+        logger.info("Export %s of %s students written in %.1fs", version, student_count, time.perf_counter() - started)
+        _prune()
+    except Exception as e:
+        logger.error("Export %s failed: %s", version, e, exc_info=True)
+        Path(output.name).unlink(missing_ok=True)
+    finally:
+        with _lock:
+            if status == READY:
+                del _jobs[version]
+            else:
+                _jobs[version] = status
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def _prune():
+    exports = sorted(_exports_dir().glob('all_students_data-*.csv.gz'), key=lambda path: path.stat().st_mtime)
+    for path in exports[:-getattr(settings, 'EXPORTS_MAX_STORED', 3)]:
+        path.unlink(missing_ok=True)
+
+
+class _FileRange:
+    """``length`` bytes of ``file`` from ``start``."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _byte_range(header, size):
+    """Inclusive ``(start, end)`` of a single-range ``Range`` header.
+
+    None means the header is ignored and the whole file is sent; raises
+    ValueError when the range starts past the end of the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        if not suffix:
+            raise ValueError(header)
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def export_response(request, version):
+    """The stored export, or the requested byte range of it."""
+    path = export_path(version)
+    size = path.stat().st_size
+    etag = f'"{version}"'
+    byte_range = None
+    range_header = request.headers.get('Range')
+    # If-Range with another validator asks for the whole current file.
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = _byte_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(path, 'rb')
+    filename = 'all_students_data.csv.gz'
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(_FileRange(file, start, end - start + 1), as_attachment=True, filename=filename,
+                                status=206)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,93 @@
+import csv
+from itertools import groupby
+from operator import itemgetter
+from .models import Student, Attendance, Marks
+
+CSV_HEADER = [
+    'username', 'first_name', 'last_name', 'roll_number', 'name',
+    'subject', 'attendance_date', 'is_present', 'checkin_time', 'attendance_percentage',
+    'marks_course', 'assessment_type', 'assessment_number', 'marks', 'max_marks', 'marks_date'
+]
+
+
+def _take_group(groups, current, student_id):
+    """Rows of ``student_id`` from a groupby over rows ordered by student."""
+    while current is not None and current[0] < student_id:
+        current = next(groups, None)
+    if current is None or current[0] != student_id:
+        return [], current
+    return list(current[1]), next(groups, None)
+
+
+def write_student_data_csv(output, student=None):
+    """Write the attendance/marks export for one student or all of them.
+
+    Students, attendance and marks are each read in one query ordered by
+    student and merged here, so the query count does not grow with the
+    number of students. Returns the number of students written.
+    """
+    students = Student.objects.select_related('user').order_by('pk')
+    attendance = Attendance.objects.order_by('student_id', 'id').values_list(
+        'student_id', 'subject__name', 'date', 'is_present', 'checkin_time'
+    )
+    marks = Marks.objects.order_by('student_id', 'id').values_list(
+        'student_id', 'course__name', 'assessment_type', 'assessment_number', 'marks', 'max_marks', 'date'
+    )
+    if student is not None:
+        students = students.filter(pk=student.pk)
+        attendance = attendance.filter(student_id=student.pk)
+        marks = marks.filter(student_id=student.pk)
+
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    attendance_groups = groupby(attendance.iterator(), key=itemgetter(0))
+    marks_groups = groupby(marks.iterator(), key=itemgetter(0))
+    current_attendance = next(attendance_groups, None)
+    current_marks = next(marks_groups, None)
+    student_count = 0
+    for student in students.iterator():
+        student_count += 1
+        attendance_records, current_attendance = _take_group(attendance_groups, current_attendance, student.pk)
+        marks_records, current_marks = _take_group(marks_groups, current_marks, student.pk)
+
+        total_attendance = len(attendance_records)
+        present_count = sum(1 for record in attendance_records if record[3])
+        attendance_percentage = round((present_count / total_attendance) * 100, 2) if total_attendance > 0 else 0.0
+        student_columns = [
+            student.user.username,
+            student.user.first_name,
+            student.user.last_name,
+            student.roll_number,
+            student.name
+        ]
+
+        if not attendance_records and not marks_records:
+            writer.writerow(student_columns + ['', '', '', '', attendance_percentage, '', '', '', '', ''])
+            continue
+        for i in range(max(total_attendance, len(marks_records))):
+            row = list(student_columns)
+            if i < total_attendance:
+                _, subject_name, attendance_date, is_present, checkin_time = attendance_records[i]
+                row.extend([
+                    subject_name,
+                    attendance_date.strftime('%Y-%m-%d'),
+                    '1' if is_present else '0',
+                    checkin_time.strftime('%H:%M:%S') if checkin_time else '',
+                    attendance_percentage
+                ])
+            else:
+                row.extend(['', '', '', '', attendance_percentage])
+            if i < len(marks_records):
+                _, course_name, assessment_type, assessment_number, mark, max_marks, marks_date = marks_records[i]
+                row.extend([
+                    course_name,
+                    assessment_type,
+                    assessment_number,
+                    mark,
+                    max_marks,
+                    marks_date.strftime('%Y-%m-%d')
+                ])
+            else:
+                row.extend(['', '', '', '', ''])
+            writer.writerow(row)
+    return student_count
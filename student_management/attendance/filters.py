@@ -0,0 +1,81 @@
+from django.utils.dateparse import parse_date
+from .models import Marks
+
+TRUE_VALUES = ('1', 'true', 'yes', 'present')
+FALSE_VALUES = ('0', 'false', 'no', 'absent')
+
+
+class FilterError(ValueError):
+    pass
+
+
+def int_param(params, name):
+    """``params[name]`` as an int, None when absent; FilterError if malformed."""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise FilterError(f"'{name}' must be an integer")
+
+
+def date_param(params, name):
+    """``params[name]`` as a date, None when absent; FilterError if malformed."""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise FilterError(f"'{name}' must be a date in YYYY-MM-DD format")
+    return parsed
+
+
+def _filter_student_and_dates(queryset, params):
+    student_id = int_param(params, 'student')
+    if student_id is not None:
+        queryset = queryset.filter(student_id=student_id)
+    roll_number = params.get('roll_number')
+    if roll_number:
+        queryset = queryset.filter(student__roll_number=roll_number)
+    date_from = date_param(params, 'date_from')
+    if date_from is not None:
+        queryset = queryset.filter(date__gte=date_from)
+    date_to = date_param(params, 'date_to')
+    if date_to is not None:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset
+
+
+def filter_attendance(queryset, params):
+    queryset = _filter_student_and_dates(queryset, params)
+    course_id = int_param(params, 'course')
+    if course_id is not None:
+        queryset = queryset.filter(subject_id=course_id)
+    is_present = params.get('is_present')
+    if is_present not in (None, ''):
+        value = is_present.lower()
+        if value in TRUE_VALUES:
+            queryset = queryset.filter(is_present=True)
+        elif value in FALSE_VALUES:
+            queryset = queryset.filter(is_present=False)
+        else:
+            raise FilterError("'is_present' must be true or false")
+    return queryset
+
+
+def filter_marks(queryset, params):
+    queryset = _filter_student_and_dates(queryset, params)
+    course_id = int_param(params, 'course')
+    if course_id is not None:
+        queryset = queryset.filter(course_id=course_id)
+    assessment_type = params.get('assessment_type')
+    if assessment_type:
+        valid_types = [choice[0] for choice in Marks.ASSESSMENT_TYPES]
+        if assessment_type not in valid_types:
+            raise FilterError(f"'assessment_type' must be one of {', '.join(valid_types)}")
+        queryset = queryset.filter(assessment_type=assessment_type)
+    return queryset
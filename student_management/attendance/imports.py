@@ -0,0 +1,282 @@
+import logging
+from datetime import datetime
+from functools import partial
+from itertools import chain
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from . import live, search
+from .cache import (
+    bump_student_version, bump_attendance_history_version, bump_course_marks_version, bump_roster_version,
+    invalidate_cached_tokens
+)
+from .models import User, Student, Course, Attendance, Marks, after_commit, bulk_insert, enroll
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_REQUIRED_FIELDS = [
+    'username', 'roll_number', 'name', 'subject', 'attendance_percentage',
+    'marks_obtained', 'total_marks', 'date', 'check_in_time'
+]
+# Password given to the users an upload creates
+UPLOAD_PASSWORD = 'password123'
+
+
+class UploadRowError(ValueError):
+    pass
+
+
+def parse_upload_row(row):
+    """Clean and validate one row of the student CSV upload.
+
+    Raises UploadRowError with the message reported back for the row.
+    """
+    username = row['username'].strip()
+    try:
+        attendance_percentage = float(row['attendance_percentage'])
+        if not 0 <= attendance_percentage <= 100:
+            raise ValueError("Attendance percentage must be between 0 and 100")
+    except ValueError as e:
+        raise UploadRowError(f"Invalid attendance_percentage for {username}: {str(e)}")
+    try:
+        marks_obtained = float(row['marks_obtained'])
+        total_marks = float(row['total_marks'])
+        if marks_obtained < 0 or total_marks <= 0 or marks_obtained > total_marks:
+            raise ValueError("Invalid marks: marks_obtained must be non-negative and not exceed total_marks")
+    except ValueError as e:
+        raise UploadRowError(f"Invalid marks for {username}: {str(e)}")
+    try:
+        date = datetime.strptime(row['date'], '%Y-%m-%d').date()
+    except ValueError:
+        raise UploadRowError(f"Invalid date format for {username}: {row['date']}")
+    try:
+        check_in_time = datetime.strptime(row['check_in_time'], '%H:%M:%S').time()
+    except ValueError:
+        raise UploadRowError(f"Invalid check_in_time format for {username}: {row['check_in_time']}")
+    return {
+        'username': username,
+        'roll_number': row['roll_number'].strip(),
+        'name': row['name'].strip(),
+        'subject_name': row['subject'].strip(),
+        'attendance_percentage': attendance_percentage,
+        'marks_obtained': marks_obtained,
+        'total_marks': total_marks,
+        'date': date,
+        'check_in_time': check_in_time,
+    }
+
+
+def import_upload(rows):
+    """Apply the rows of a student CSV upload.
+
+    Users, students, courses and existing records are looked up for all rows
+    at once and changes are written with bulk inserts and updates, so an
+    upload takes the same number of queries however many rows it has. Bulk
+    writes skip the model signals; the enrollments and the cache, search and
+    live feed updates they would have made are made here, once per upload.
+
+    Returns the created and updated names of each kind and the errors of
+    the rows that were skipped.
+    """
+    return _Upload(rows).run()
+
+
+class _Upload:
+    def __init__(self, rows):
+        self.result = {name: [] for name in (
+            'created_users', 'updated_students', 'created_attendance', 'updated_attendance',
+            'created_marks', 'updated_marks', 'errors'
+        )}
+        self.rows = []
+        for row in rows:
+            try:
+                self.rows.append(parse_upload_row(row))
+            except UploadRowError as e:
+                self.error(str(e))
+
+    def error(self, message):
+        logger.error("Skipping upload row: %s", message)
+        self.result['errors'].append(message)
+
+    def run(self):
+        with transaction.atomic():
+            planned = self.apply_people_and_courses()
+            self.apply_records(planned)
+        return self.result
+
+    def apply_people_and_courses(self):
+        """Create and update users, students and courses; returns ``(row, student, course)`` per valid row."""
+        usernames = {row['username'] for row in self.rows}
+        subjects = {row['subject_name'] for row in self.rows}
+        users = {user.username: user for user in User.objects.filter(username__in=usernames)}
+        students = {
+            student.user_id: student for student in Student.objects.filter(user__username__in=usernames)
+        }
+        roll_owners = dict(Student.objects.filter(
+            roll_number__in={row['roll_number'] for row in self.rows}
+        ).values_list('roll_number', 'user__username'))
+        courses = {}
+        codes = set()
+        for course in Course.objects.filter(Q(name__in=subjects) | Q(code__in={name[:10].upper() for name in subjects})):
+            courses[course.name] = course
+            codes.add(course.code)
+
+        new_users = []
+        new_students = {}
+        changed_students = {}
+        new_courses = []
+        planned = []
+        for row in self.rows:
+            username, roll_number, name = row['username'], row['roll_number'], row['name']
+            user = users.get(username)
+            if user is not None and user.role != 'student':
+                self.error(f"User {username} is not a student (role: {user.role})")
+                continue
+            if roll_owners.get(roll_number, username) != username:
+                self.error(f"Roll number {roll_number} already exists for another student")
+                continue
+            if user is None:
+                parts = name.split()
+                user = users[username] = User(
+                    username=username, first_name=' '.join(parts[:1]), last_name=' '.join(parts[1:]), role='student'
+                )
+                new_users.append(user)
+                self.result['created_users'].append(username)
+            student = students.get(user.pk) if user.pk is not None else new_students.get(username)
+            if student is None:
+                student = new_students[username] = Student(name=name, roll_number=roll_number)
+                self.result['updated_students'].append(roll_number)
+            elif (student.name, student.roll_number) != (name, roll_number):
+                roll_owners.pop(student.roll_number, None)
+                student.name, student.roll_number = name, roll_number
+                if student.pk is not None:
+                    changed_students[student.pk] = student
+                self.result['updated_students'].append(roll_number)
+            roll_owners[roll_number] = username
+
+            course = courses.get(row['subject_name'])
+            if course is None:
+                code = row['subject_name'][:10].upper()
+                if code in codes:
+                    self.error(f"Cannot create course {row['subject_name']}: code {code} is already taken")
+                    continue
+                course = courses[row['subject_name']] = Course(name=row['subject_name'], code=code)
+                codes.add(code)
+                new_courses.append(course)
+            planned.append((row, student, course))
+
+        if new_users:
+            # One hash for the shared default password, as generate_data does.
+            password = make_password(UPLOAD_PASSWORD)
+            for user in new_users:
+                user.password = password
+        bulk_insert(User, new_users, 'username')
+        for username, student in new_students.items():
+            student.user = users[username]
+        Student.objects.bulk_create(new_students.values())
+        Student.objects.bulk_update(changed_students.values(), ['name', 'roll_number'])
+        bulk_insert(Course, new_courses, 'name')
+
+        # What the User and Student signals would have done.
+        refreshed = [student.pk for student in new_students.values()] + list(changed_students)
+        if refreshed:
+            after_commit(bump_roster_version)
+            transaction.on_commit(partial(search.refresh_student, *refreshed), robust=True)
+            for student_id in refreshed:
+                after_commit(bump_student_version, student_id)
+        if changed_students:
+            after_commit(invalidate_cached_tokens, *Token.objects.filter(
+                user_id__in=list(changed_students)
+            ).values_list('key', flat=True))
+        return planned
+
+    def apply_records(self, planned):
+        student_ids = {student.pk for _, student, _ in planned}
+        course_ids = {course.pk for _, _, course in planned}
+        dates = {row['date'] for row, _, _ in planned}
+        attendance = {
+            (record.student_id, record.subject_id, record.date): record
+            for record in Attendance.objects.filter(student_id__in=student_ids, subject_id__in=course_ids, date__in=dates)
+        }
+        marks = {
+            (record.student_id, record.course_id, record.date): record
+            for record in Marks.objects.filter(
+                student_id__in=student_ids, course_id__in=course_ids, date__in=dates,
+                assessment_type='quiz', assessment_number=1
+            )
+        }
+
+        new_attendance = []
+        changed_attendance = {}
+        new_marks = []
+        changed_marks = {}
+        for row, student, course in planned:
+            label = f"{row['roll_number']} - {row['subject_name']}"
+            key = (student.pk, course.pk, row['date'])
+            record = attendance.get(key)
+            if record is None:
+                record = attendance[key] = Attendance(student=student, subject=course, date=row['date'])
+                new_attendance.append(record)
+                self.result['created_attendance'].append(label)
+            else:
+                if record.pk is not None:
+                    changed_attendance[key] = record
+                self.result['updated_attendance'].append(label)
+            record.is_present = row['attendance_percentage'] >= 75
+            record.checkin_time = row['check_in_time']
+
+            record = marks.get(key)
+            if record is None:
+                record = marks[key] = Marks(
+                    student=student, course=course, assessment_type='quiz', assessment_number=1, date=row['date']
+                )
+                new_marks.append(record)
+                self.result['created_marks'].append(label)
+            else:
+                if record.pk is not None:
+                    changed_marks[key] = record
+                self.result['updated_marks'].append(label)
+            record.marks = row['marks_obtained']
+            record.max_marks = row['total_marks']
+
+        # bulk_update doesn't apply auto_now.
+        now = timezone.now()
+        for record in chain(changed_attendance.values(), changed_marks.values()):
+            record.updated_at = now
+        Attendance.objects.bulk_create(new_attendance)
+        Attendance.objects.bulk_update(changed_attendance.values(), ['is_present', 'checkin_time', 'updated_at'])
+        Marks.objects.bulk_create(new_marks)
+        Marks.objects.bulk_update(changed_marks.values(), ['marks', 'max_marks', 'updated_at'])
+        enroll(key[:2] for key in chain(attendance, marks))
+
+        # What the Attendance and Marks signals would have done.
+        for student_id in student_ids:
+            after_commit(bump_student_version, student_id)
+        for course_id in {key[1] for key in marks}:
+            after_commit(bump_course_marks_version, course_id)
+        today = timezone.localdate()
+        if changed_attendance or any(record.date < today for record in new_attendance):
+            after_commit(bump_attendance_history_version)
+        self.publish_live(list(attendance.values()))
+
+    def publish_live(self, records):
+        watched = [
+            record for record in records
+            if live.broadcaster.has_subscribers(live.feed_key(record.subject_id, record.date))
+        ]
+        if any(record.pk is None for record in watched):
+            ids = {
+                (student_id, subject_id, date): pk for student_id, subject_id, date, pk in Attendance.objects.filter(
+                    student_id__in={record.student_id for record in watched},
+                    subject_id__in={record.subject_id for record in watched},
+                    date__in={record.date for record in watched},
+                ).values_list('student_id', 'subject_id', 'date', 'pk')
+            }
+            for record in watched:
+                record.pk = ids[(record.student_id, record.subject_id, record.date)]
+        for record in watched:
+            transaction.on_commit(
+                partial(live.publish_saved, live.feed_key(record.subject_id, record.date), record.pk), robust=True
+            )
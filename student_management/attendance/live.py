@@ -0,0 +1,129 @@
+"""Live attendance feed: in-process fan-out of attendance changes as server-sent events.
+
+Subscribers watch one course on one date. A change is published after its
+transaction commits, from whichever thread made it, and only if someone is
+watching that course and date. The event is serialized once and handed to
+every subscriber's bounded asyncio queue on the subscriber's own event loop.
+A subscriber that falls ``LIVE_FEED_QUEUE_SIZE`` events behind is dropped
+and sent a ``reset`` event so the client reloads instead of the queue
+growing without bound.
+
+Only subscribers connected to the worker process that handled a write see
+it.
+"""
+import asyncio
+import json
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RESET = object()
+
+
+def feed_key(course_id, date):
+    # Dates from the model and from query strings compare as ISO strings.
+    return (int(course_id), str(date))
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    def __init__(self, key, maxsize):
+        self.key = key
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Runs on the subscriber's event loop.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+
+class Broadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, key):
+        """Subscribe the running event loop to ``key``."""
+        subscriber = Subscriber(key, getattr(settings, 'LIVE_FEED_QUEUE_SIZE', 100))
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.key]
+
+    def has_subscribers(self, key):
+        return key in self._subscribers
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, key, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop is closed.
+                self.unsubscribe(subscriber)
+
+
+broadcaster = Broadcaster()
+
+
+def publish_saved(key, attendance_id):
+    from .models import Attendance
+    from .serializers import FastAttendanceSerializer
+
+    # The same row as all-attendance/ returns.
+    rows = list(FastAttendanceSerializer.prepare(Attendance.objects.filter(pk=attendance_id)))
+    if rows:
+        broadcaster.publish(key, format_event('attendance', FastAttendanceSerializer(rows).data[0]))
+
+
+def publish_deleted(key, attendance_id):
+    broadcaster.publish(key, format_event('attendance-deleted', {'id': attendance_id}))
+
+
+async def stream(key):
+    """Server-sent events for ``key`` until the client goes away or falls behind."""
+    subscriber = broadcaster.subscribe(key)
+    heartbeat = getattr(settings, 'LIVE_FEED_HEARTBEAT_SECONDS', 15)
+    try:
+        yield f"retry: {getattr(settings, 'LIVE_FEED_RETRY_MILLISECONDS', 3000)}\n"
+        yield format_event('ready', {'course': key[0], 'date': key[1]})
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection.
+                yield ": keepalive\n\n"
+                continue
+            if message is RESET:
+                logger.warning("Live feed subscriber for %s fell behind; sending reset", key)
+                yield format_event('reset', {'course': key[0], 'date': key[1]})
+                return
+            yield message
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+import httpx
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from attendance.models import Course, Student
+from .load_benchmark import PredictorStubHandler, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the sync course prediction view on a fixed pool of WSGI worker threads with "
+        "its async version under ASGI, at increasing concurrency against a slow predictor stub. "
+        "Run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='gen', help="Prefix used by generate_data")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64],
+                            help="Concurrent clients at each level")
+        parser.add_argument('--rounds', type=int, default=4, help="Sequential requests per client at each level")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="Worker threads serving the sync view, as in a threaded WSGI server")
+        parser.add_argument('--stub-latency', type=float, default=0.2, help="Seconds the predictor stub waits")
+        parser.add_argument('--output', help="Results file (default: var/benchmarks/async-risk-<timestamp>.json)")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        student = (Student.objects.filter(user__username__startswith=f"{prefix}-", attendance__isnull=False)
+                   .select_related('user').order_by('pk').first())
+        if student is None:
+            raise CommandError(f"No generated data with prefix '{prefix}'; run generate_data first")
+        course = Course.objects.filter(attendance__student=student).order_by('pk').first()
+        token, _ = Token.objects.get_or_create(user=student.user)
+        self.headers = {'Authorization': f"Token {token.key}"}
+        self.path = f"student/course-prediction/{course.pk}/"
+
+        PredictorStubHandler.latency = options['stub_latency']
+        stub = ThreadingHTTPServer(('127.0.0.1', 0), PredictorStubHandler)
+        stub_url = f"http://127.0.0.1:{stub.server_address[1]}/predict/"
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+        started_at = datetime.now().isoformat(timespec='seconds')
+        levels = {}
+        try:
+            with override_settings(RISK_PREDICTOR_URL=stub_url):
+                for concurrency in options['concurrency']:
+                    levels[concurrency] = {
+                        'sync_wsgi': self.run_sync(concurrency, options['rounds'], options['threads']),
+                        'async_asgi': asyncio.run(self.run_async(concurrency, options['rounds'])),
+                    }
+        finally:
+            stub.shutdown()
+
+        results = {
+            'started_at': started_at,
+            'path': self.path,
+            'config': {key: options[key] for key in ('prefix', 'rounds', 'threads', 'stub_latency')},
+            'levels': levels,
+        }
+        output = Path(options['output'] or settings.BASE_DIR / 'var' / 'benchmarks' /
+                      f"async-risk-{datetime.now():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.report(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def run_sync(self, concurrency, rounds, threads):
+        local = threading.local()
+        samples, errors = [], []
+
+        def serve():
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            return local.client.get(f"/api/{self.path}", headers=self.headers).status_code
+
+        def client(workers):
+            for _ in range(rounds):
+                request_started = time.perf_counter()
+                status_code = workers.submit(serve).result()
+                samples.append(time.perf_counter() - request_started)
+                errors.append(status_code != 200)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as workers:
+            with ThreadPoolExecutor(max_workers=concurrency) as clients:
+                list(clients.map(client, [workers] * concurrency))
+        return self.summarize(samples, sum(errors), time.perf_counter() - started)
+
+    async def run_async(self, concurrency, rounds):
+        # Through the real ASGI handler, which runs each request's sync code
+        # in its own thread; the test AsyncClient shares one thread.
+        transport = httpx.ASGITransport(app=get_asgi_application())
+        samples, errors = [], []
+
+        async def client():
+            for _ in range(rounds):
+                request_started = time.perf_counter()
+                response = await async_client.get(f"/api/async/{self.path}", headers=self.headers)
+                samples.append(time.perf_counter() - request_started)
+                errors.append(response.status_code != 200)
+
+        started = time.perf_counter()
+        async with httpx.AsyncClient(transport=transport, base_url='http://localhost') as async_client:
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+        return self.summarize(samples, sum(errors), time.perf_counter() - started)
+
+    def summarize(self, samples, error_count, elapsed):
+        samples = sorted(samples)
+        return {
+            'requests': len(samples),
+            'errors': error_count,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(samples, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+        }
+
+    def report(self, results):
+        self.stdout.write(f"GET /api/[async/]{results['path']}, predictor latency "
+                          f"{results['config']['stub_latency']}s, {results['config']['threads']} sync worker threads")
+        self.stdout.write("clients  mode        requests errors    rps    p50    p95 (ms)")
+        for concurrency, modes in results['levels'].items():
+            for mode, summary in modes.items():
+                self.stdout.write(
+                    f"{concurrency:>7}  {mode:<10} {summary['requests']:>8} {summary['errors']:>6} "
+                    f"{summary['throughput_rps']:>6.1f} {summary['p50_ms']:>6.0f} {summary['p95_ms']:>6.0f}"
+                )
@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from attendance.models import Attendance, Marks
+from attendance.serializers import (
+    AttendanceSerializer, MarksSerializer, FastAttendanceSerializer, FastMarksSerializer
+)
+from student_management.benchmarks import Rollback, seed
+
+
+class Command(BaseCommand):
+    help = "Compares the nested ModelSerializers with the values()-based list serializers on seeded rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help="Number of attendance and marks rows to seed")
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--courses', type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                seed(options['rows'], options['students'], options['courses'])
+                self.compare("attendance", Attendance.objects.all().order_by('id'),
+                             AttendanceSerializer, FastAttendanceSerializer, ('student', 'subject'))
+                self.compare("marks", Marks.objects.all().order_by('id'),
+                             MarksSerializer, FastMarksSerializer, ('student', 'course'))
+                # Benchmark data is never committed.
+                raise Rollback
+        except Rollback:
+            pass
+
+    def compare(self, label, queryset, model_serializer, fast_serializer, related):
+        started = time.perf_counter()
+        rows = list(queryset.select_related(*related))
+        model_data = model_serializer(rows, many=True).data
+        model_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        fast_data = fast_serializer(fast_serializer.prepare(queryset).iterator()).data
+        fast_time = time.perf_counter() - started
+
+        if model_data != fast_data:
+            self.stderr.write(self.style.ERROR(f"{label}: fast serializer output differs"))
+        self.stdout.write(
+            f"{label}: {len(fast_data)} rows, ModelSerializer {model_time:.3f}s, "
+            f"fast {fast_time:.3f}s, speedup {model_time / fast_time:.1f}x"
+        )
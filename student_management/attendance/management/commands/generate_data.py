@@ -0,0 +1,131 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from attendance.cache import bump_roster_version
+from attendance.models import User, Student, Course, Attendance, Marks, bulk_insert, enroll
+
+
+class Command(BaseCommand):
+    help = "Bulk-generates students, courses and school days of attendance and marks for performance testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=8)
+        parser.add_argument('--days', type=int, default=120, help="School days of attendance per course")
+        parser.add_argument('--start', type=date.fromisoformat, default=date(2024, 9, 2),
+                            help="First day of the generated term (YYYY-MM-DD)")
+        parser.add_argument('--prefix', default='gen', help="Prefix for generated usernames, roll numbers and courses")
+        parser.add_argument('--password', default='password123', help="Password set on every generated user")
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for a reproducible data set")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users with prefix '{prefix}-' already exist; pick another --prefix")
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            courses, students = self.create_people(
+                prefix, options['students'], options['courses'], make_password(options['password'])
+            )
+            # Every generated student takes every generated course.
+            enroll(((student.pk, course.pk) for student in students for course in courses), self.batch_size)
+            days = self.school_days(options['start'], options['days'])
+            attendance_count, marks_count = self.create_records(students, courses, days)
+        # bulk_create skips the signals that tell search indexes and exports about new students.
+        bump_roster_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(students)} students, {len(courses)} courses, {attendance_count} attendance "
+            f"and {marks_count} marks rows in {time.perf_counter() - started:.1f}s "
+            f"(teacher login: {prefix}-teacher)"
+        ))
+
+    def create_people(self, prefix, student_count, course_count, password):
+        # bulk_create skips post_save, so Student rows are created here rather than by the signal.
+        courses = bulk_insert(Course, [
+            Course(name=f"{prefix} Course {i + 1}", code=f"{prefix.upper()}{i + 1}") for i in range(course_count)
+        ], 'code')
+        User.objects.create(username=f"{prefix}-teacher", role='teacher', password=password)
+        users = bulk_insert(User, [
+            User(username=f"{prefix}-{i + 1}", first_name=f"Student{i + 1}", last_name=prefix.title(),
+                 role='student', password=password)
+            for i in range(student_count)
+        ], 'username', batch_size=self.batch_size)
+        students = Student.objects.bulk_create([
+            Student(user=user, name=f"{user.first_name} {user.last_name}", roll_number=f"{prefix.upper()}{i + 1:06d}")
+            for i, user in enumerate(users)
+        ], batch_size=self.batch_size)
+        return courses, students
+
+    def school_days(self, start, count):
+        days = []
+        day = start
+        while len(days) < count:
+            if day.weekday() < 5:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def create_records(self, students, courses, days):
+        """Attendance for every school day and course, with weekly quizzes,
+        fortnightly assignments and a sessional every six weeks."""
+        rand = self.random
+        attendance = []
+        marks = []
+        attendance_count = marks_count = 0
+        for student in students:
+            # Most students attend regularly; a tail attends rarely.
+            attendance_rate = rand.betavariate(8, 2)
+            ability = min(max(rand.gauss(65, 15), 5), 98)
+            for course in courses:
+                course_ability = ability + rand.gauss(0, 8)
+                quiz = assignment = sessional = 0
+                for index, day in enumerate(days):
+                    attendance.append(Attendance(
+                        student=student, subject=course, date=day, is_present=rand.random() < attendance_rate
+                    ))
+                    week, weekday = divmod(index, 5)
+                    if weekday != 4:
+                        continue
+                    quiz += 1
+                    marks.append(self.mark(student, course, 'quiz', quiz, course_ability, 10, day))
+                    if week % 2 == 1:
+                        assignment += 1
+                        # Missed assignments score zero, more often for poor attenders.
+                        if rand.random() < attendance_rate:
+                            marks.append(self.mark(student, course, 'assignment', assignment, course_ability, 20, day))
+                        else:
+                            marks.append(Marks(student=student, course=course, assessment_type='assignment',
+                                               assessment_number=assignment, marks=0, max_marks=20, date=day))
+                    if week % 6 == 5:
+                        sessional += 1
+                        marks.append(self.mark(student, course, 'sessional', sessional, course_ability, 50, day))
+                if len(attendance) >= self.batch_size:
+                    attendance_count += self.flush(Attendance, attendance)
+                if len(marks) >= self.batch_size:
+                    marks_count += self.flush(Marks, marks)
+        attendance_count += self.flush(Attendance, attendance)
+        marks_count += self.flush(Marks, marks)
+        return attendance_count, marks_count
+
+    def mark(self, student, course, assessment_type, number, ability, max_marks, day):
+        percentage = min(max(self.random.gauss(ability, 10), 0), 100)
+        return Marks(student=student, course=course, assessment_type=assessment_type, assessment_number=number,
+                     marks=round(percentage * max_marks / 100, 1), max_marks=max_marks, date=day)
+
+    def flush(self, model, objects):
+        count = len(objects)
+        if count:
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+            objects.clear()
+            if self.verbosity > 1:
+                self.stdout.write(f"  {model.__name__}: +{count} rows ({datetime.now():%H:%M:%S})")
+        return count
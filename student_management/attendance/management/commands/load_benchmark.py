@@ -0,0 +1,252 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.test.utils import override_settings
+from attendance.models import User, Student
+
+# Relative weight of each scenario in the request mix.
+SCENARIOS = {
+    'login': 2,
+    'my-attendance': 10,
+    'my-marks': 6,
+    'student-risk-analysis': 4,
+    'student-own-data-csv-export': 2,
+    'teacher-student-data-csv-export': 1,
+    'student-csv-upload': 1,
+}
+
+
+class PredictorStubHandler(BaseHTTPRequestHandler):
+    """Answers every POST like the prediction API, after ``latency`` seconds."""
+    latency = 0.0
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        time.sleep(self.latency)
+        grade = round(payload.get('gpa', 2.0), 2)
+        body = json.dumps({
+            'predicted_grade': grade,
+            'risk_level': 'High' if grade < 2.0 else 'Medium' if grade < 3.0 else 'Low'
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives the main endpoints concurrently against a local predictor stub and writes "
+        "throughput and latency percentiles to a JSON results file. Run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help="Benchmark a running server instead of serving the app in-process; "
+                                               "point its RISK_PREDICTOR_URL at the stub printed on start")
+        parser.add_argument('--prefix', default='gen', help="Prefix used by generate_data")
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--users', type=int, default=50, help="Number of distinct students to log in as")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run after warmup")
+        parser.add_argument('--warmup', type=float, default=3.0, help="Seconds of unrecorded requests first")
+        parser.add_argument('--stub-port', type=int, default=0)
+        parser.add_argument('--stub-latency', type=float, default=0.05, help="Seconds the predictor stub waits")
+        parser.add_argument('--scenarios', help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+        parser.add_argument('--output', help="Results file (default: var/benchmarks/load-<timestamp>.json)")
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['scenarios']:
+            names = options['scenarios'].split(',')
+            unknown = set(names) - set(SCENARIOS)
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            scenarios = {name: SCENARIOS[name] for name in names}
+
+        prefix = options['prefix']
+        students = list(Student.objects.filter(user__username__startswith=f"{prefix}-")
+                        .order_by('pk').values_list('user__username', 'roll_number')[:options['users']])
+        if not students or not User.objects.filter(username=f"{prefix}-teacher").exists():
+            raise CommandError(f"No generated data with prefix '{prefix}'; run generate_data first")
+
+        PredictorStubHandler.latency = options['stub_latency']
+        stub = ThreadingHTTPServer(('127.0.0.1', options['stub_port']), PredictorStubHandler)
+        stub_url = f"http://127.0.0.1:{stub.server_address[1]}/predict/"
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        self.stdout.write(f"Predictor stub listening on {stub_url}")
+
+        server = None
+        try:
+            with override_settings(RISK_PREDICTOR_URL=stub_url, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1']):
+                base_url = options['base_url']
+                if not base_url:
+                    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler)
+                    server.set_app(get_internal_wsgi_application())
+                    threading.Thread(target=server.serve_forever, daemon=True).start()
+                    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+                self.base_url = base_url.rstrip('/')
+                results = self.run(students, scenarios, options)
+        finally:
+            stub.shutdown()
+            if server:
+                server.shutdown()
+
+        output = Path(options['output'] or settings.BASE_DIR / 'var' / 'benchmarks' /
+                      f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.report(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def run(self, students, scenarios, options):
+        self.password = options['password']
+        self.teacher = self.login(f"{options['prefix']}-teacher")
+        self.students = [(username, roll_number, self.login(username)) for username, roll_number in students]
+        self.upload_counter = 0
+        self.lock = threading.Lock()
+        names = list(scenarios)
+        weights = [scenarios[name] for name in names]
+
+        started_at = datetime.now().isoformat(timespec='seconds')
+        samples = {name: [] for name in names}
+        errors = {name: 0 for name in names}
+        started = time.perf_counter()
+        record_from = started + options['warmup']
+        deadline = record_from + options['duration']
+
+        def worker(seed):
+            rand = random.Random(seed)
+            session = requests.Session()
+            while True:
+                name = rand.choices(names, weights)[0]
+                request_started = time.perf_counter()
+                if request_started >= deadline:
+                    return
+                try:
+                    ok = getattr(self, 'scenario_' + name.replace('-', '_'))(session, rand)
+                except requests.RequestException:
+                    ok = False
+                finished = time.perf_counter()
+                if request_started >= record_from:
+                    with self.lock:
+                        samples[name].append(finished - request_started)
+                        errors[name] += not ok
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(worker, range(options['concurrency'])))
+
+        # Requests still in flight at the deadline stretch the measured window.
+        elapsed = time.perf_counter() - record_from
+        endpoints = {name: self.summarize(samples[name], errors[name], elapsed) for name in names}
+        all_samples = [value for values in samples.values() for value in values]
+        return {
+            'started_at': started_at,
+            'base_url': self.base_url,
+            'config': {
+                key: options[key] for key in
+                ('prefix', 'users', 'concurrency', 'duration', 'warmup', 'stub_latency')
+            },
+            'scenarios': scenarios,
+            'total': self.summarize(all_samples, sum(errors.values()), elapsed),
+            'endpoints': endpoints,
+        }
+
+    def summarize(self, samples, error_count, elapsed):
+        samples = sorted(samples)
+        milliseconds = lambda value: round(value * 1000, 2) if value is not None else None
+        return {
+            'requests': len(samples),
+            'errors': error_count,
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'mean_ms': milliseconds(sum(samples) / len(samples)) if samples else None,
+            'p50_ms': milliseconds(percentile(samples, 0.50)),
+            'p95_ms': milliseconds(percentile(samples, 0.95)),
+            'p99_ms': milliseconds(percentile(samples, 0.99)),
+            'max_ms': milliseconds(samples[-1]) if samples else None,
+        }
+
+    def report(self, results):
+        rows = [('total', results['total'])] + list(results['endpoints'].items())
+        width = max(len(name) for name, _ in rows)
+        self.stdout.write(f"{'endpoint'.ljust(width)}  requests errors    rps    p50    p95    p99 (ms)")
+        for name, summary in rows:
+            p50, p95, p99 = (summary[key] if summary[key] is not None else float('nan')
+                             for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+            self.stdout.write(
+                f"{name.ljust(width)}  {summary['requests']:>8} {summary['errors']:>6} "
+                f"{summary['throughput_rps']:>6.1f} {p50:>6.1f} {p95:>6.1f} {p99:>6.1f}"
+            )
+
+    def login(self, username):
+        response = requests.post(f"{self.base_url}/api/login/",
+                                 json={'username': username, 'password': self.password})
+        if response.status_code != 200:
+            raise CommandError(f"Login failed for {username}: {response.status_code} {response.text[:200]}")
+        return response.json()['token']
+
+    def get(self, session, path, token):
+        response = session.get(f"{self.base_url}{path}", headers={'Authorization': f"Token {token}"})
+        return response.status_code == 200
+
+    def scenario_login(self, session, rand):
+        username = rand.choice(self.students)[0]
+        response = session.post(f"{self.base_url}/api/login/",
+                                json={'username': username, 'password': self.password})
+        return response.status_code == 200
+
+    def scenario_my_attendance(self, session, rand):
+        return self.get(session, '/api/my-attendance/', rand.choice(self.students)[2])
+
+    def scenario_my_marks(self, session, rand):
+        return self.get(session, '/api/my-marks/', rand.choice(self.students)[2])
+
+    def scenario_student_risk_analysis(self, session, rand):
+        return self.get(session, '/api/student/risk-analysis/', rand.choice(self.students)[2])
+
+    def scenario_student_own_data_csv_export(self, session, rand):
+        return self.get(session, '/api/my-data/export-csv/', rand.choice(self.students)[2])
+
+    def scenario_teacher_student_data_csv_export(self, session, rand):
+        roll_number = rand.choice(self.students)[1]
+        return self.get(session, f"/api/teacher/students/export-csv/{roll_number}/", self.teacher)
+
+    def scenario_student_csv_upload(self, session, rand):
+        with self.lock:
+            self.upload_counter += 1
+            batch = self.upload_counter
+        rows = ['username,roll_number,name,subject,attendance_percentage,marks_obtained,total_marks,date,check_in_time']
+        for i in range(10):
+            rows.append(f"load-{batch}-{i},LOAD{batch:05d}{i},Load Student {i},Load Course,"
+                        f"{rand.randint(40, 100)},{rand.randint(20, 100)},100,2025-01-{i + 1:02d},09:00:00")
+        response = session.post(
+            f"{self.base_url}/api/students/upload-csv/",
+            headers={'Authorization': f"Token {self.teacher}"},
+            files={'file': ('load.csv', '\n'.join(rows).encode(), 'text/csv')}
+        )
+        return response.status_code in (201, 207)
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from attendance.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Deletes sync deletion tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Pruned {prune_tombstones()} tombstones")
@@ -0,0 +1,64 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from student_management import benchmarks
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds / 1e-9:.3g}ns"
+
+
+class Command(BaseCommand):
+    help = "Runs the micro-benchmarks and compares them with a saved baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default all): {', '.join(benchmarks.BENCHMARKS)}")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed rounds before measuring")
+        parser.add_argument('--repeat', type=int, default=9, help="Timed rounds per benchmark")
+        parser.add_argument('--min-time', type=float, default=0.5, help="Minimum seconds per round")
+        parser.add_argument('--rows', type=int, default=10000, help="Attendance and marks rows to seed")
+        parser.add_argument('--baseline', type=Path,
+                            default=settings.BASE_DIR / 'var' / 'benchmarks' / 'baseline.json')
+        parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+        parser.add_argument('--output', type=Path, help="Also write the results to this JSON file")
+        parser.add_argument('--max-regression', type=float,
+                            help="Fail if any benchmark is slower than the baseline by more than this percentage")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(benchmarks.BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        results = benchmarks.run(
+            options['names'], warmup=options['warmup'], repeat=options['repeat'],
+            min_time=options['min_time'], rows=options['rows']
+        )
+        baseline_path = options['baseline']
+        changes = {}
+        if baseline_path.exists() and not options['save_baseline']:
+            changes = benchmarks.compare(results, benchmarks.load(baseline_path))
+
+        width = max(len(name) for name in results['benchmarks'])
+        self.stdout.write(f"{'benchmark'.ljust(width)}  {'calls':>9}  {'median':>8}  {'min':>8}  {'stdev':>6}  baseline")
+        for name, result in results['benchmarks'].items():
+            spread = result['stdev'] / result['mean'] * 100 if result['mean'] else 0
+            change = f"{changes[name] * 100:+.1f}%" if name in changes else '-'
+            self.stdout.write(
+                f"{name.ljust(width)}  {result['number']:>5}x{result['repeat']:<3}  "
+                f"{format_time(result['median']):>8}  {format_time(result['min']):>8}  {spread:>5.1f}%  {change}"
+            )
+
+        if options['output']:
+            benchmarks.save(results, options['output'])
+        if options['save_baseline']:
+            benchmarks.save(results, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+
+        limit = options['max_regression']
+        if limit is not None:
+            regressions = [name for name, change in changes.items() if change * 100 > limit]
+            if regressions:
+                raise CommandError(f"Slower than baseline by more than {limit}%: {', '.join(regressions)}")
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='marks',
+            index=models.Index(fields=['course', 'assessment_type'], name='marks_course_type_idx'),
+        ),
+    ]
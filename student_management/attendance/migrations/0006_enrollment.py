@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_enrollments(apps, schema_editor):
+    # One row per student and course with attendance or marks.
+    Attendance = apps.get_model('attendance', 'Attendance')
+    Marks = apps.get_model('attendance', 'Marks')
+    Enrollment = apps.get_model('attendance', 'Enrollment')
+    pairs = set(Attendance.objects.order_by().values_list('student_id', 'subject_id').distinct())
+    pairs.update(Marks.objects.order_by().values_list('student_id', 'course_id').distinct())
+    Enrollment.objects.bulk_create(
+        [Enrollment(student_id=student_id, course_id=course_id) for student_id, course_id in pairs],
+        batch_size=1000, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_marks_course_type_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='attendance.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='attendance.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'student'], name='enrollment_course_student_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill_enrollments, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,15 @@
-from django.db import models
+from functools import partial
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from . import live, search
+from .cache import (
+    bump_student_version, bump_courses_version, bump_attendance_history_version, bump_course_marks_version,
+    bump_roster_version, invalidate_cached_tokens
+)
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -34,13 +42,31 @@ class Attendance(models.Model):
     date = models.DateField()
     is_present = models.BooleanField(default=True)
     checkin_time = models.TimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ('student', 'subject', 'date')
+        indexes = [
+            models.Index(fields=['student', 'is_present'], name='att_student_present_idx'),
+            models.Index(fields=['subject', 'date'], name='att_subject_date_idx'),
+            models.Index(fields=['student', 'updated_at'], name='att_student_updated_idx'),
+            models.Index(fields=['updated_at', 'id'], name='att_updated_idx'),
+            models.Index(fields=['date'], name='att_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.name} - {self.subject.name} - {self.date} - {self.checkin_time}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The live feed the row is in, so an edit that moves it can tell that feed.
+        if 'subject_id' in instance.__dict__ and 'date' in instance.__dict__:
+            instance._feed_key = live.feed_key(instance.subject_id, instance.date)
+        # Already enrolled, unless an edit moves the row to another student or course.
+        instance._enrolled = (instance.__dict__.get('student_id'), instance.__dict__.get('subject_id'))
+        return instance
+
 class Marks(models.Model):
     ASSESSMENT_TYPES = (
         ('assignment', 'Assignment'),
@@ -55,13 +81,91 @@ class Marks(models.Model):
     marks = models.FloatField()
     max_marks = models.FloatField(default=100)
     date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ('student', 'course', 'assessment_type', 'assessment_number', 'date')
+        indexes = [
+            models.Index(fields=['student', 'assessment_type'], name='marks_student_type_idx'),
+            models.Index(fields=['course', 'date'], name='marks_course_date_idx'),
+            models.Index(fields=['course', 'assessment_type'], name='marks_course_type_idx'),
+            models.Index(fields=['student', 'updated_at'], name='marks_student_updated_idx'),
+            models.Index(fields=['updated_at', 'id'], name='marks_updated_idx'),
+            models.Index(fields=['date'], name='marks_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.name} - {self.course.name} - {self.assessment_type} {self.assessment_number} - {self.marks}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._enrolled = (instance.__dict__.get('student_id'), instance.__dict__.get('course_id'))
+        return instance
+
+class Enrollment(models.Model):
+    """A student taking a course.
+
+    Creating an attendance or marks row, or moving one to another student or
+    course, enrolls its student in its course; bulk inserts, which skip
+    signals, call ``enroll`` themselves. Deleting
+    the rows leaves the enrollment in place.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='enrollments')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'student'], name='enrollment_course_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.name} - {self.course.name}"
+
+def enroll(pairs, batch_size=None):
+    """Enroll ``(student_id, course_id)`` pairs, skipping existing enrollments."""
+    Enrollment.objects.bulk_create(
+        [Enrollment(student_id=student_id, course_id=course_id) for student_id, course_id in set(pairs)],
+        batch_size=batch_size, ignore_conflicts=True
+    )
+
+def bulk_insert(model, objects, key, batch_size=None):
+    """``bulk_create`` that leaves every object with its primary key.
+
+    MySQL doesn't return the ids of bulk-inserted rows; there they are read
+    back by the unique field ``key``.
+    """
+    objects = model.objects.bulk_create(objects, batch_size=batch_size)
+    missing = {getattr(obj, key): obj for obj in objects if obj.pk is None}
+    values = list(missing)
+    step = batch_size or len(values) or 1
+    for start in range(0, len(values), step):
+        for value, pk in model.objects.filter(**{f'{key}__in': values[start:start + step]}).values_list(key, 'pk'):
+            missing[value].pk = pk
+    return objects
+
+class DeletedRecord(models.Model):
+    """Tombstone for a deleted Attendance or Marks row, read by the sync API."""
+    MODEL_CHOICES = (
+        ('attendance', 'Attendance'),
+        ('marks', 'Marks'),
+    )
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    record_id = models.BigIntegerField()
+    student_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='deleted_record_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.record_id} - {self.deleted_at}"
+
 # Signal to create a Student object when a User with role='student' is created
 @receiver(post_save, sender=User)
 def create_student_profile(sender, instance, created, **kwargs):
@@ -73,4 +177,121 @@ def create_student_profile(sender, instance, created, **kwargs):
             user=instance,
             name=instance.username,  # Use username as the default name
             roll_number=roll_number
-        )
\ No newline at end of file
+        )
+
+def after_commit(func, *args):
+    # Cache versions move only once the write is visible: bumped inside the
+    # transaction, a concurrent reader could cache the old rows under the new
+    # version.
+    transaction.on_commit(partial(func, *args), robust=True)
+
+# Invalidate cached per-student responses whenever their data changes
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_save, sender=Marks)
+@receiver(post_delete, sender=Marks)
+def bump_record_student_version(sender, instance, **kwargs):
+    after_commit(bump_student_version, instance.student_id)
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def bump_enrollment_student_version(sender, instance, **kwargs):
+    after_commit(bump_student_version, instance.student_id)
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def bump_student_profile_version(sender, instance, **kwargs):
+    after_commit(bump_student_version, instance.pk)
+
+# Whole-roster exports embed every student's names
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def bump_roster(sender, instance, update_fields=None, **kwargs):
+    # Logging in through the admin only stamps last_login.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        after_commit(bump_roster_version)
+
+# Keep this process's student search index current
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def refresh_student_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        transaction.on_commit(partial(search.refresh_student, instance.pk), robust=True)
+
+# Drop cached authentication results that embed the changed user or profile
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    after_commit(invalidate_cached_tokens, *Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+# Deleted tokens, directly or in a user's delete cascade, stop authenticating
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    after_commit(invalidate_cached_tokens, instance.key)
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def bump_course_version(sender, instance, **kwargs):
+    after_commit(bump_courses_version)
+
+# Cached attendance analytics keep past buckets; any write that may touch one
+# (an edit can move a row out of a past date) invalidates them
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def bump_attendance_history(sender, instance, created=False, **kwargs):
+    if not created or str(instance.date) < timezone.localdate().isoformat():
+        after_commit(bump_attendance_history_version)
+
+# Keep enrollments in step with the records that imply them; an edit that
+# keeps the row's student and course needs no enrollment query
+def enroll_saved(instance, pair, created):
+    if created or getattr(instance, '_enrolled', None) != pair:
+        enroll([pair])
+    instance._enrolled = pair
+
+@receiver(post_save, sender=Attendance)
+def enroll_attendance_student(sender, instance, created, **kwargs):
+    enroll_saved(instance, (instance.student_id, instance.subject_id), created)
+
+@receiver(post_save, sender=Marks)
+def enroll_marks_student(sender, instance, created, **kwargs):
+    enroll_saved(instance, (instance.student_id, instance.course_id), created)
+
+# Course standings are cached per course until its marks change
+@receiver(post_save, sender=Marks)
+@receiver(post_delete, sender=Marks)
+def bump_marks_course_version(sender, instance, **kwargs):
+    after_commit(bump_course_marks_version, instance.course_id)
+
+# Record deletions so sync clients can drop them from their local copy
+@receiver(post_delete, sender=Attendance)
+@receiver(post_delete, sender=Marks)
+def record_deletion(sender, instance, **kwargs):
+    DeletedRecord.objects.create(
+        model=sender._meta.model_name,
+        record_id=instance.pk,
+        student_id=instance.student_id
+    )
+
+# Push committed attendance changes to live feed subscribers
+@receiver(post_save, sender=Attendance)
+def publish_live_attendance(sender, instance, **kwargs):
+    key = live.feed_key(instance.subject_id, instance.date)
+    previous_key = getattr(instance, '_feed_key', key)
+    instance._feed_key = key
+    # Moved to another course or date: it leaves the feed it was in.
+    if previous_key != key and live.broadcaster.has_subscribers(previous_key):
+        transaction.on_commit(partial(live.publish_deleted, previous_key, instance.pk), robust=True)
+    if live.broadcaster.has_subscribers(key):
+        transaction.on_commit(partial(live.publish_saved, key, instance.pk), robust=True)
+
+@receiver(post_delete, sender=Attendance)
+def publish_live_attendance_deletion(sender, instance, **kwargs):
+    key = live.feed_key(instance.subject_id, instance.date)
+    if live.broadcaster.has_subscribers(key):
+        transaction.on_commit(partial(live.publish_deleted, key, instance.pk), robust=True)
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecordCursorPagination(CursorPagination):
+    # Keyset pagination on the primary key, so every page is a single
+    # indexed range scan no matter how deep the client has paged.
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-id'
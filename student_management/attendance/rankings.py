@@ -0,0 +1,51 @@
+"""Where each student stands in a course, per assessment type.
+
+A student's score is their average percentage over the course's marks of one
+type. Ranks and percentile ranks come from window functions over the grouped
+scores, so a course's standings take one query, and they are cached under
+the course's marks version until any of its marks change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, F, Window
+from django.db.models.functions import PercentRank, Rank
+from .cache import get_course_marks_version
+from .models import Student
+
+STANDINGS_KEY = 'course-standings:{}:{}'
+
+
+def _standings(course_id):
+    # Grouping starts from Student: Django puts windows over a values()
+    # aggregate into the GROUP BY, which the database rejects.
+    rows = (
+        Student.objects.filter(marks__course_id=course_id, marks__max_marks__gt=0)
+        .annotate(assessment_type=F('marks__assessment_type'))
+        .annotate(score=Avg(F('marks__marks') * 100.0 / F('marks__max_marks')))
+        .annotate(
+            rank=Window(Rank(), partition_by=F('assessment_type'), order_by=F('score').desc()),
+            percent_rank=Window(PercentRank(), partition_by=F('assessment_type'), order_by=F('score').asc()),
+        )
+        .values_list('assessment_type', 'pk', 'score', 'rank', 'percent_rank')
+        .order_by('assessment_type', '-score', 'pk')
+    )
+    standings = {}
+    for assessment_type, student_id, score, rank, percent_rank in rows:
+        standings.setdefault(assessment_type, []).append({
+            'student_id': student_id,
+            'score': round(score, 2),
+            'rank': rank,
+            # Share of the other students with a lower score.
+            'percentile': round(percent_rank * 100, 1),
+        })
+    return standings
+
+
+def course_standings(course_id):
+    """``{assessment_type: [standing, ...]}`` ordered from the highest score."""
+    key = STANDINGS_KEY.format(course_id, get_course_marks_version(course_id))
+    standings = cache.get(key)
+    if standings is None:
+        standings = _standings(course_id)
+        cache.set(key, standings, timeout=getattr(settings, 'COURSE_STANDINGS_CACHE_TIMEOUT', 3600))
+    return standings
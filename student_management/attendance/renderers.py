@@ -0,0 +1,16 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    # Selected with ?format=columnar or "Accept: application/vnd.columnar+json".
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+
+
+COLUMNAR_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [ColumnarJSONRenderer]
+
+
+def wants_columnar(request):
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is not None and renderer.format == ColumnarJSONRenderer.format
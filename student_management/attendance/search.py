@@ -0,0 +1,244 @@
+"""In-memory student search by name, username and roll number.
+
+Every worker process keeps an index of all students:
+
+- a sorted array of lower-cased terms (the full name, each word of it, the
+  username and the roll number) with a parallel array of student ids, for
+  prefix matches by binary search;
+- trigram postings (sorted student id arrays) over the same fields, for
+  substring matches of three or more characters. Candidates come from the
+  shortest posting list of the query's trigrams and are checked against
+  the stored text.
+
+Saving or deleting a student or user refreshes that student in this
+process once the transaction commits. Other processes notice that the
+roster version moved and rebuild their index in the background, serving the
+previous one until it is ready; ``STUDENT_SEARCH_INDEX_MAX_AGE`` bounds how
+stale an index can get through writes that skip signals.
+"""
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection
+from .cache import get_roster_version
+
+logger = logging.getLogger(__name__)
+
+MIN_SUBSTRING_LENGTH = 3
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def _terms(name, username, roll_number):
+    words = name.split()
+    return {name, username, roll_number, *words[1:]} - {''}
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class StudentIndex:
+
+    def __init__(self, rows, version):
+        """Index ``(id, name, username, roll_number)`` rows ordered by id."""
+        self.version = version
+        self.built = time.monotonic()
+        self._lock = threading.Lock()
+        self._docs = {}
+        terms = []
+        postings = defaultdict(list)
+        for student_id, name, username, roll_number in rows:
+            doc = self._doc(name, username, roll_number)
+            self._docs[student_id] = doc
+            terms.extend((term, student_id) for term in _terms(*doc[3]))
+            for trigram in _trigrams(doc[4]):
+                postings[trigram].append(student_id)
+        terms.sort()
+        self._terms = [term for term, _ in terms]
+        self._ids = array('q', [student_id for _, student_id in terms])
+        # Rows come in id order, so the postings are already sorted.
+        self._postings = {trigram: array('q', ids) for trigram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _doc(name, username, roll_number):
+        keys = (normalize(name), normalize(username), normalize(roll_number))
+        return name, username, roll_number, keys, '\n'.join(keys)
+
+    def put(self, student_id, name, username, roll_number):
+        with self._lock:
+            self._remove(student_id)
+            doc = self._doc(name, username, roll_number)
+            self._docs[student_id] = doc
+            for term in _terms(*doc[3]):
+                position = bisect_right(self._terms, term)
+                self._terms.insert(position, term)
+                self._ids.insert(position, student_id)
+            for trigram in _trigrams(doc[4]):
+                insort(self._postings.setdefault(trigram, array('q')), student_id)
+
+    def remove(self, student_id):
+        with self._lock:
+            self._remove(student_id)
+
+    def _remove(self, student_id):
+        doc = self._docs.pop(student_id, None)
+        if doc is None:
+            return
+        for term in _terms(*doc[3]):
+            for position in range(bisect_left(self._terms, term), bisect_right(self._terms, term)):
+                if self._ids[position] == student_id:
+                    del self._terms[position]
+                    del self._ids[position]
+                    break
+        for trigram in _trigrams(doc[4]):
+            ids = self._postings[trigram]
+            del ids[bisect_left(ids, student_id)]
+            if not ids:
+                del self._postings[trigram]
+
+    def search(self, query, limit):
+        """Students matching ``query``: prefix matches in term order, then substring matches."""
+        query = normalize(query)
+        found = {}
+        with self._lock:
+            position = bisect_left(self._terms, query)
+            while len(found) < limit and position < len(self._terms) and self._terms[position].startswith(query):
+                found.setdefault(self._ids[position])
+                position += 1
+            if len(found) < limit and len(query) >= MIN_SUBSTRING_LENGTH:
+                postings = [self._postings.get(trigram) for trigram in _trigrams(query)]
+                if all(postings):
+                    for student_id in min(postings, key=len):
+                        if student_id not in found and query in self._docs[student_id][4]:
+                            found[student_id] = None
+                            if len(found) == limit:
+                                break
+            return [
+                {'id': student_id, 'name': doc[0], 'username': doc[1], 'roll_number': doc[2]}
+                for student_id, doc in ((student_id, self._docs[student_id]) for student_id in found)
+            ]
+
+
+_lock = threading.Lock()
+_build_lock = threading.Lock()
+_index = None
+_rebuilding = False
+# Students refreshed while a rebuild was loading; applied to the new index
+# before it replaces the old one.
+_pending = set()
+
+
+def _rows(student_ids=None):
+    from .models import Student
+
+    students = Student.objects.order_by('pk')
+    if student_ids is not None:
+        students = students.filter(pk__in=student_ids)
+    return students.values_list('pk', 'name', 'user__username', 'roll_number').iterator()
+
+
+def _build():
+    global _index
+    started = time.perf_counter()
+    # Read first: a change made while loading leaves the index stale, not current.
+    version = get_roster_version()
+    index = StudentIndex(_rows(), version)
+    with _lock:
+        if _pending:
+            _apply(index, _pending)
+            _pending.clear()
+        _index = index
+    logger.info("Built student search index of %s students in %.2fs", len(index), time.perf_counter() - started)
+    return index
+
+
+def _apply(index, student_ids):
+    student_ids = set(student_ids)
+    for student_id, name, username, roll_number in _rows(student_ids):
+        index.put(student_id, name, username, roll_number)
+        student_ids.discard(student_id)
+    for student_id in student_ids:
+        index.remove(student_id)
+
+
+def _rebuild_in_background():
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_background_rebuild, daemon=True).start()
+
+
+def _background_rebuild():
+    global _rebuilding
+    try:
+        with _build_lock:
+            _build()
+    except Exception as e:
+        logger.error("Rebuilding the student search index failed: %s", e, exc_info=True)
+    finally:
+        with _lock:
+            _rebuilding = False
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def get_index():
+    """The current index; built on first use, refreshed in the background when stale."""
+    index = _index
+    if index is None:
+        with _build_lock:
+            index = _index if _index is not None else _build()
+    elif (index.version != get_roster_version()
+          or time.monotonic() - index.built > getattr(settings, 'STUDENT_SEARCH_INDEX_MAX_AGE', 300)):
+        _rebuild_in_background()
+    return index
+
+
+def search(query, limit):
+    return get_index().search(query, limit)
+
+
+def refresh_student(*student_ids):
+    """Re-read students into this process's index after a committed change."""
+    with _lock:
+        index = _index
+        if _rebuilding:
+            _pending.update(student_ids)
+    if index is None:
+        return
+    _apply(index, student_ids)
+    # This write bumped the roster version; don't rebuild for it.
+    index.version = get_roster_version()
+
+
+def preload():
+    """Build the index in the background so the first search doesn't wait for it."""
+    if _index is None:
+        _rebuild_in_background()
+
+
+def _reset_after_fork():
+    global _lock, _build_lock, _rebuilding
+    # A forked worker inherits the index but not the thread building it.
+    _lock = threading.Lock()
+    _build_lock = threading.Lock()
+    _rebuilding = False
+    _pending.clear()
+    if _index is not None:
+        _index._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,3 +1,4 @@
+from abc import ABC, abstractmethod
 from rest_framework import serializers
 from .models import User, Student, Attendance, Marks, Course
 from django.core.exceptions import ObjectDoesNotExist
@@ -96,4 +97,118 @@ class MarksSerializer(serializers.ModelSerializer):
         course_id = validated_data.pop('course_id')
         student = Student.objects.get(user=user)
         course = Course.objects.get(id=course_id)
-        return Marks.objects.create(student=student, course=course, **validated_data)
\ No newline at end of file
+        return Marks.objects.create(student=student, course=course, **validated_data)
+
+class FastListSerializer(ABC):
+    """Read-only serializer for large list responses.
+
+    Works on ``values()`` rows instead of model instances and builds each
+    nested student and course dict once per request, producing the same
+    JSON shape as the nested ModelSerializers above. ``columnar_data``
+    returns the compact form: students and courses once, keyed by id, and
+    one array per field.
+    """
+    values_fields = ()
+    columns = ()
+
+    def __init__(self, rows, students=None, courses=None):
+        self.rows = rows
+        self._students = {} if students is None else students
+        self._courses = {} if courses is None else courses
+        self._data = None
+
+    @classmethod
+    def prepare(cls, queryset):
+        return queryset.values(*cls.values_fields)
+
+    def get_student(self, row):
+        student_id = row['student_id']
+        student = self._students.get(student_id)
+        if student is None:
+            student = {
+                'id': student_id,
+                'name': row['student__name'],
+                'roll_number': row['student__roll_number'],
+            }
+            self._students[student_id] = student
+        return student
+
+    def get_course(self, row, field):
+        course_id = row[f'{field}_id']
+        course = self._courses.get(course_id)
+        if course is None:
+            course = {
+                'id': course_id,
+                'name': row[f'{field}__name'],
+                'code': row[f'{field}__code'],
+            }
+            self._courses[course_id] = course
+        return course
+
+    @abstractmethod
+    def to_representation(self, row):
+        """The dict for one ``values()`` row."""
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = [self.to_representation(row) for row in self.rows]
+        return self._data
+
+    def get_columns(self):
+        columns = {name: [] for name in self.columns}
+        items = self._data if self._data is not None else map(self.to_representation, self.rows)
+        for item in items:
+            for name, column in columns.items():
+                value = item[name]
+                column.append(value['id'] if isinstance(value, dict) else value)
+        return columns
+
+    @property
+    def columnar_data(self):
+        columns = self.get_columns()
+        return {
+            'students': self._students,
+            'courses': self._courses,
+            'columns': columns,
+        }
+
+
+class FastAttendanceSerializer(FastListSerializer):
+    values_fields = (
+        'id', 'student_id', 'student__name', 'student__roll_number',
+        'subject_id', 'subject__name', 'subject__code', 'date', 'is_present', 'checkin_time',
+    )
+    columns = ('id', 'student', 'subject', 'date', 'is_present', 'checkin_time')
+
+    def to_representation(self, row):
+        checkin_time = row['checkin_time']
+        return {
+            'id': row['id'],
+            'student': self.get_student(row),
+            'subject': self.get_course(row, 'subject'),
+            'date': row['date'].isoformat(),
+            'is_present': row['is_present'],
+            'checkin_time': checkin_time.isoformat() if checkin_time is not None else None,
+        }
+
+
+class FastMarksSerializer(FastListSerializer):
+    values_fields = (
+        'id', 'student_id', 'student__name', 'student__roll_number',
+        'course_id', 'course__name', 'course__code',
+        'assessment_type', 'assessment_number', 'marks', 'max_marks', 'date',
+    )
+    columns = ('id', 'student', 'course', 'assessment_type', 'assessment_number', 'marks', 'max_marks', 'date')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'student': self.get_student(row),
+            'course': self.get_course(row, 'course'),
+            'assessment_type': row['assessment_type'],
+            'assessment_number': row['assessment_number'],
+            'marks': row['marks'],
+            'max_marks': row['max_marks'],
+            'date': row['date'].isoformat(),
+        }
@@ -0,0 +1,118 @@
+import base64
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .filters import FilterError
+from .models import Attendance, Marks, DeletedRecord
+from .serializers import FastAttendanceSerializer, FastMarksSerializer
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+# Cursor key of the time through which deletions have been sent.
+SYNCED_KEY = 'synced'
+
+# (cursor key, rows, timestamp field)
+STREAMS = (
+    ('attendance', Attendance.objects.values(*FastAttendanceSerializer.values_fields, 'updated_at'), 'updated_at'),
+    ('marks', Marks.objects.values(*FastMarksSerializer.values_fields, 'updated_at'), 'updated_at'),
+    ('deleted', DeletedRecord.objects.values('id', 'model', 'record_id', 'deleted_at'), 'deleted_at'),
+)
+
+
+class CursorExpired(FilterError):
+    pass
+
+
+def encode_cursor(positions, synced):
+    payload = {key: [timestamp.isoformat(), pk] for key, (timestamp, pk) in positions.items()}
+    payload[SYNCED_KEY] = synced.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def _parse_timestamp(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def decode_cursor(cursor):
+    """Stream positions and the time through which deletions were sent."""
+    if not cursor:
+        return {}, None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = {}
+        for key, _, _ in STREAMS:
+            if key in payload:
+                timestamp, pk = payload[key]
+                positions[key] = (_parse_timestamp(timestamp), int(pk))
+        return positions, _parse_timestamp(payload[SYNCED_KEY])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise FilterError("Invalid sync cursor")
+
+
+def tombstone_cutoff():
+    """Tombstones older than this may have been pruned."""
+    return timezone.now() - timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention window; returns how many."""
+    deleted, _ = DeletedRecord.objects.filter(deleted_at__lt=tombstone_cutoff()).delete()
+    return deleted
+
+
+def _changed_rows(queryset, field, position, upper, limit):
+    queryset = queryset.filter(**{f'{field}__lte': upper})
+    if position is not None:
+        timestamp, pk = position
+        queryset = queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'pk__gt': pk}))
+    return list(queryset.order_by(field, 'pk')[:limit + 1])
+
+
+def get_changes(cursor=None, limit=DEFAULT_LIMIT):
+    """Rows created, updated or deleted after ``cursor``.
+
+    Each stream is read in (timestamp, id) order over its own index and
+    advances independently. Rows newer than the settle window are held back
+    until the next call, so a transaction that commits a little after its
+    timestamp was taken is not skipped. This is a hard limit: a row whose
+    transaction commits more than ``SYNC_SETTLE_SECONDS`` after ``auto_now``
+    stamped it is already behind every cursor and is never sent; clients
+    only see it after a full resync.
+
+    Raises ``CursorExpired`` when tombstones the client still needs may have
+    been pruned.
+    """
+    positions, synced = decode_cursor(cursor)
+    if synced is not None and synced < tombstone_cutoff():
+        raise CursorExpired("Sync cursor is older than the deletion history; start a full resync")
+    upper = timezone.now() - timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+    truncated = set()
+    results = {}
+    for key, queryset, field in STREAMS:
+        rows = _changed_rows(queryset, field, positions.get(key), upper, limit)
+        if len(rows) > limit:
+            truncated.add(key)
+            rows = rows[:limit]
+        if rows:
+            positions[key] = (rows[-1][field], rows[-1]['id'])
+        results[key] = rows
+    # Deletions have been sent up to the last one returned, or up to the
+    # window when all of them were.
+    synced = positions['deleted'][0] if 'deleted' in truncated else upper
+
+    deleted = {'attendance': [], 'marks': []}
+    for row in results['deleted']:
+        deleted[row['model']].append(row['record_id'])
+    return {
+        'attendance': FastAttendanceSerializer(results['attendance']).data,
+        'marks': FastMarksSerializer(results['marks']).data,
+        'deleted': deleted,
+        'cursor': encode_cursor(positions, synced),
+        'has_more': bool(truncated),
+    }
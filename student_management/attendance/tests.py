@@ -1,3 +1,1602 @@
-from django.test import TestCase
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from student_management import benchmarks, metrics
+from student_management.db_router import PIN_KEY
+from student_management.log_handlers import SAMPLED, AsyncQueueHandler, SamplingFilter
+from . import admin, export_jobs, search
+from .authentication import CachedTokenAuthentication
+from .cache import TOKEN_KEY, VERSION_KEY, bump_roster_version
+from .exports import write_student_data_csv
+from .live import broadcaster
+from .models import User, Student, Course, Attendance, Marks, Enrollment, DeletedRecord, enroll
+from .pagination import RecordCursorPagination
+from .serializers import (
+    AttendanceSerializer, FastAttendanceSerializer, FastMarksSerializer, MarksSerializer
+)
 
-# Create your tests here.
+
+def isolate_test_module():
+    """Keep a test module off the host's cache and ``var`` directories.
+
+    Its tests get a local-memory cache and scratch directories for metric
+    snapshots, profiles, exports and predictor lock files, removed after the
+    module. Test classes may override them further.
+    """
+    scratch = Path(tempfile.mkdtemp(prefix='student-management-tests-'))
+    unittest.addModuleCleanup(shutil.rmtree, scratch, ignore_errors=True)
+    override = override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        METRICS_DIR=scratch / 'metrics',
+        PROFILING_DIR=scratch / 'profiles',
+        EXPORTS_DIR=scratch / 'exports',
+        RISK_PREDICTOR_SLOTS_DIR=scratch / 'predictor-slots',
+    )
+    override.enable()
+    unittest.addModuleCleanup(override.disable)
+
+
+def setUpModule():
+    isolate_test_module()
+
+
+class HotQueryIndexTests(TestCase):
+    """Runs the hot queries from the attendance and risk views through EXPLAIN
+    and fails if the planner does not pick an index for them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = [Course.objects.create(name=f"Course {i}", code=f"C{i}") for i in range(4)]
+        for i in range(20):
+            User.objects.create(username=f"student{i}", role='student')
+        cls.students = list(Student.objects.all())
+        start = date(2025, 1, 1)
+        attendance = []
+        marks = []
+        for student in cls.students:
+            for course in cls.courses:
+                for day in range(60):
+                    attendance.append(Attendance(
+                        student=student, subject=course, date=start + timedelta(days=day),
+                        is_present=day % 4 != 0
+                    ))
+                for number in range(1, 11):
+                    for assessment_type in ('assignment', 'quiz', 'sessional'):
+                        marks.append(Marks(
+                            student=student, course=course, assessment_type=assessment_type,
+                            assessment_number=number, marks=number * 7, date=start + timedelta(days=number)
+                        ))
+        Attendance.objects.bulk_create(attendance)
+        Marks.objects.bulk_create(marks)
+        # Refresh planner statistics so the plans match a populated table.
+        with connection.cursor() as cursor:
+            for table in (Attendance._meta.db_table, Marks._meta.db_table):
+                if connection.vendor == 'mysql':
+                    cursor.execute(f"ANALYZE TABLE {table}")
+                    cursor.fetchall()
+                else:
+                    cursor.execute(f"ANALYZE {table}")
+
+    def index_names(self, model, leading_columns):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        return [
+            name for name, info in constraints.items()
+            if info['index'] or info['unique']
+            if info['columns'][:len(leading_columns)] == leading_columns
+        ]
+
+    def assertUsesIndex(self, queryset, leading_columns):
+        names = self.index_names(queryset.model, leading_columns)
+        self.assertTrue(names, f"No index on {leading_columns} for {queryset.model.__name__}")
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in names),
+            f"Expected one of {names} in query plan:\n{plan}"
+        )
+
+    def test_attendance_student_presence(self):
+        student = self.students[3]
+        self.assertUsesIndex(Attendance.objects.filter(student=student), ['student_id'])
+        # The risk views only count present days, so the composite index covers the query.
+        self.assertUsesIndex(
+            Attendance.objects.filter(student=student, is_present=True).values('pk'),
+            ['student_id', 'is_present']
+        )
+
+    def test_attendance_student_course(self):
+        self.assertUsesIndex(
+            Attendance.objects.filter(student=self.students[5], subject=self.courses[1]),
+            ['student_id', 'subject_id']
+        )
+
+    def test_attendance_course_date_range(self):
+        self.assertUsesIndex(
+            Attendance.objects.filter(subject=self.courses[2], date__gte=date(2025, 2, 1), date__lte=date(2025, 2, 7)),
+            ['subject_id', 'date']
+        )
+
+    def test_marks_student_assessment_type(self):
+        self.assertUsesIndex(Marks.objects.filter(student=self.students[7]), ['student_id'])
+        self.assertUsesIndex(
+            Marks.objects.filter(student=self.students[7], assessment_type='assignment').values('pk'),
+            ['student_id', 'assessment_type']
+        )
+
+    def test_marks_student_course(self):
+        self.assertUsesIndex(
+            Marks.objects.filter(student=self.students[9], course=self.courses[0], assessment_type='assignment'),
+            ['student_id', 'course_id']
+        )
+
+    def test_marks_course_assessment_type(self):
+        # Course standings group a course's marks by type.
+        self.assertUsesIndex(
+            Marks.objects.filter(course=self.courses[1], assessment_type='quiz').values('pk'),
+            ['course_id', 'assessment_type']
+        )
+
+    def test_marks_course_date_range(self):
+        self.assertUsesIndex(
+            Marks.objects.filter(course=self.courses[3], date__gte=date(2025, 1, 3), date__lte=date(2025, 1, 4)),
+            ['course_id', 'date']
+        )
+
+    def test_admin_date_hierarchy(self):
+        # The admin's date drill-down filters every row by date alone.
+        for model in (Attendance, Marks):
+            self.assertUsesIndex(model.objects.filter(date__gte=date(2025, 1, 3), date__lte=date(2025, 1, 4)), ['date'])
+
+
+class RecordListTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.courses = [Course.objects.create(name=f"Course {i}", code=f"C{i}") for i in range(2)]
+        self.students = [
+            Student.objects.get(user=User.objects.create(username=f"student{i}", role='student')) for i in range(2)
+        ]
+        for day in range(3):
+            for student in self.students:
+                for course in self.courses:
+                    Attendance.objects.create(student=student, subject=course, date=date(2025, 1, 1 + day),
+                                              is_present=day != 1)
+                    Marks.objects.create(student=student, course=course, assessment_type=('quiz', 'assignment')[day % 2],
+                                         assessment_number=day, marks=50, date=date(2025, 1, 1 + day))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+
+    def ids(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_cursor_pages_are_stable_across_inserts(self):
+        expected = list(Attendance.objects.order_by('-id').values_list('id', flat=True))
+        response = self.client.get(reverse('all-attendance'), {'page_size': 5})
+        seen = [row['id'] for row in response.data['results']]
+        self.assertEqual(seen, expected[:5])
+
+        # A new row sorts before the cursor and doesn't shift later pages.
+        Attendance.objects.create(student=self.students[0], subject=self.courses[0], date=date(2025, 2, 1))
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [row['id'] for row in response.data['results']]
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.ids('all-attendance')), 12)
+        with mock.patch.object(RecordCursorPagination, 'max_page_size', 4):
+            self.assertEqual(len(self.ids('all-attendance', page_size=1000)), 4)
+        self.assertEqual(len(self.ids('all-marks', page_size=2)), 2)
+
+    def test_attendance_filters(self):
+        student, course = self.students[1], self.courses[0]
+
+        def expected(**lookups):
+            return list(Attendance.objects.filter(**lookups).order_by('-id').values_list('id', flat=True))
+
+        self.assertEqual(self.ids('all-attendance', student=student.pk), expected(student=student))
+        self.assertEqual(self.ids('all-attendance', roll_number=student.roll_number), expected(student=student))
+        self.assertEqual(self.ids('all-attendance', course=course.pk), expected(subject=course))
+        self.assertEqual(self.ids('all-attendance', date_from='2025-01-02', date_to='2025-01-02'),
+                         expected(date=date(2025, 1, 2)))
+        self.assertEqual(self.ids('all-attendance', is_present='absent'), expected(is_present=False))
+        self.assertEqual(self.ids('all-attendance', is_present='true', course=course.pk, student=student.pk),
+                         expected(is_present=True, subject=course, student=student))
+
+    def test_marks_filters(self):
+        student, course = self.students[0], self.courses[1]
+
+        def expected(**lookups):
+            return list(Marks.objects.filter(**lookups).order_by('-id').values_list('id', flat=True))
+
+        self.assertEqual(self.ids('all-marks', student=student.pk), expected(student=student))
+        self.assertEqual(self.ids('all-marks', course=course.pk), expected(course=course))
+        self.assertEqual(self.ids('all-marks', assessment_type='assignment'), expected(assessment_type='assignment'))
+        self.assertEqual(self.ids('all-marks', date_from='2025-01-02'), expected(date__gte=date(2025, 1, 2)))
+
+    def test_fast_serializers_match_model_serializers(self):
+        for serializer, fast_serializer, model in (
+            (AttendanceSerializer, FastAttendanceSerializer, Attendance),
+            (MarksSerializer, FastMarksSerializer, Marks),
+        ):
+            with self.subTest(model=model.__name__):
+                queryset = model.objects.order_by('id')
+                expected = json.loads(json.dumps(serializer(queryset, many=True).data))
+                self.assertEqual(fast_serializer(fast_serializer.prepare(queryset)).data, expected)
+
+    def test_columnar_format(self):
+        rows = self.client.get(reverse('all-marks'), {'page_size': 5}).data['results']
+        for params, headers in (({'format': 'columnar'}, {}), ({}, {'Accept': 'application/vnd.columnar+json'})):
+            with self.subTest(params=params, headers=headers):
+                response = self.client.get(reverse('all-marks'), {'page_size': 5, **params}, headers=headers)
+                self.assertEqual(response['Content-Type'], 'application/vnd.columnar+json')
+                body = json.loads(response.content)['results']
+                self.assertEqual(set(body), {'students', 'courses', 'columns'})
+                columns = body['columns']
+                self.assertEqual(list(columns), list(FastMarksSerializer.columns))
+                # Rebuilding the rows from the columns and the lookups gives the row format back.
+                rebuilt = [
+                    {**dict(zip(columns, values)),
+                     'student': body['students'][str(values[1])], 'course': body['courses'][str(values[2])]}
+                    for values in zip(*columns.values())
+                ]
+                self.assertEqual(rebuilt, json.loads(json.dumps(rows)))
+
+        response = self.client.get(reverse('all-students-details'), {'format': 'columnar'})
+        body = json.loads(response.content)
+        self.assertEqual(set(body), {'students', 'courses', 'attendance', 'marks'})
+        self.assertEqual(len(body['students']), 2)
+        self.assertEqual(len(body['attendance']['id']), Attendance.objects.count())
+        self.assertEqual(body['marks']['student'], list(
+            Marks.objects.order_by('student_id', 'id').values_list('student_id', flat=True)
+        ))
+
+    def test_gzip_negotiation(self):
+        for name in ('all-attendance', 'all-marks', 'all-students-details'):
+            with self.subTest(name=name):
+                plain = self.client.get(reverse(name), {'format': 'columnar'})
+                self.assertNotIn('Content-Encoding', plain)
+                compressed = self.client.get(reverse(name), {'format': 'columnar'}, headers={'Accept-Encoding': 'gzip'})
+                self.assertEqual(compressed['Content-Encoding'], 'gzip')
+                self.assertIn('Accept-Encoding', compressed['Vary'])
+                self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+    def test_bad_filter_values(self):
+        for name, params in (
+            ('all-attendance', {'student': 'abc'}),
+            ('all-attendance', {'course': '1.5'}),
+            ('all-attendance', {'date_from': '2025-13-01'}),
+            ('all-attendance', {'date_to': 'yesterday'}),
+            ('all-attendance', {'is_present': 'maybe'}),
+            ('all-marks', {'assessment_type': 'exam'}),
+        ):
+            with self.subTest(name=name, params=params):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.data['error'])
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name="Course 0", code="C0")
+        self.user = User.objects.create(username='student0', role='student')
+        self.student = Student.objects.get(user=self.user)
+        self.attendance = Attendance.objects.create(student=self.student, subject=self.course, date=date(2025, 1, 1))
+        Marks.objects.create(student=self.student, course=self.course, marks=50, date=date(2025, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, name='my-attendance', **headers):
+        return self.client.get(reverse(name), headers=headers)
+
+    def assertRevalidates(self, response, name='my-attendance'):
+        self.assertEqual(self.get(name, **{'If-None-Match': response['ETag']}).status_code, 304)
+
+    def assertChanged(self, response, name='my-attendance'):
+        fresh = self.get(name, **{'If-None-Match': response['ETag']})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], response['ETag'])
+        return fresh
+
+    def test_validators(self):
+        for name in ('my-attendance', 'my-marks'):
+            with self.subTest(name=name):
+                response = self.get(name)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('"'))
+                self.assertRevalidates(response, name)
+                self.assertEqual(self.get(name, **{'If-Modified-Since': response['Last-Modified']}).status_code, 304)
+                self.assertEqual(self.get(name, **{'If-None-Match': '"other"'}).status_code, 200)
+
+        # Teachers have no student data to validate against.
+        teacher = APIClient()
+        teacher.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+        self.assertNotIn('ETag', teacher.get(reverse('my-attendance')))
+
+    def test_record_changes_change_the_etag(self):
+        response = self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, subject=self.course, date=date(2025, 1, 2))
+        response = self.assertChanged(response)
+        self.assertRevalidates(response)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.attendance.delete()
+        self.assertEqual(len(self.assertChanged(response).data), 1)
+
+    def test_profile_and_course_renames_change_the_etag(self):
+        response = self.get()
+        self.student.roll_number = 'R-1'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        response = self.assertChanged(response)
+        self.assertEqual(response.data[0]['student']['roll_number'], 'R-1')
+
+        self.course.name = "Algebra"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertEqual(self.assertChanged(response).data[0]['subject']['name'], "Algebra")
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncChangesTests(TestCase):
+
+    def setUp(self):
+        self.course = Course.objects.create(name="Course 0", code="C0")
+        self.student = Student.objects.get(user=User.objects.create(username='student0', role='student'))
+        self.attendance = [
+            Attendance.objects.create(student=self.student, subject=self.course, date=date(2025, 1, 1 + day))
+            for day in range(5)
+        ]
+        # Rows written in one statement share a timestamp; the id breaks the tie.
+        Attendance.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        self.marks = Marks.objects.create(student=self.student, course=self.course, marks=50, date=date(2025, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+
+    def sync(self, since=None, status_code=200, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(reverse('sync-changes'), params)
+        self.assertEqual(response.status_code, status_code, response.data)
+        return response.data
+
+    def test_keyset_paging(self):
+        seen = []
+        changes = self.sync(limit=2)
+        pages = 1
+        while changes['has_more']:
+            seen += [row['id'] for row in changes['attendance']]
+            changes = self.sync(changes['cursor'], limit=2)
+            pages += 1
+        seen += [row['id'] for row in changes['attendance']]
+        self.assertEqual(seen, [row.pk for row in self.attendance])
+        self.assertEqual(pages, 3)
+
+        # Caught up: only later changes come back.
+        cursor = changes['cursor']
+        self.assertEqual(self.sync(cursor)['attendance'], [])
+        self.attendance[2].is_present = False
+        self.attendance[2].save()
+        changes = self.sync(cursor)
+        self.assertEqual([(row['id'], row['is_present']) for row in changes['attendance']],
+                         [(self.attendance[2].pk, False)])
+        self.assertEqual(changes['marks'], [])
+
+    def test_tombstones(self):
+        cursor = self.sync()['cursor']
+        attendance_id, marks_id = self.attendance[0].pk, self.marks.pk
+        self.attendance[0].delete()
+        self.marks.delete()
+        changes = self.sync(cursor)
+        self.assertEqual(changes['deleted'], {'attendance': [attendance_id], 'marks': [marks_id]})
+        self.assertEqual(self.sync(changes['cursor'])['deleted'], {'attendance': [], 'marks': []})
+
+    def test_invalid_cursor_and_limit(self):
+        valid = json.loads(base64.urlsafe_b64decode(self.sync()['cursor']))
+        for cursor in (
+            'not-base64!',
+            base64.urlsafe_b64encode(b'[1, 2]').decode(),
+            base64.urlsafe_b64encode(json.dumps({**valid, 'attendance': ['yesterday', 1]}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({**valid, 'attendance': ['2025-01-01T00:00:00', 'x']}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({'attendance': valid.get('attendance')}).encode()).decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.sync(cursor, 400)['error'], "Invalid sync cursor")
+        for limit in ('0', '-1', 'many'):
+            with self.subTest(limit=limit):
+                self.sync(None, 400, limit=limit)
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=1)
+    def test_tombstone_retention(self):
+        cursor = self.sync()['cursor']
+        self.attendance[0].delete()
+        DeletedRecord.objects.update(deleted_at=timezone.now() - timedelta(days=2))
+        kept_id = self.attendance[1].pk
+        self.attendance[1].delete()
+        out = StringIO()
+        call_command('prune_sync_tombstones', stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Pruned 1 tombstones")
+        self.assertEqual(list(DeletedRecord.objects.values_list('record_id', flat=True)), [kept_id])
+
+        # A client synced before the retained history has to start over.
+        payload = json.loads(base64.urlsafe_b64decode(cursor))
+        payload['synced'] = (timezone.now() - timedelta(days=2)).isoformat()
+        expired = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        self.assertTrue(self.sync(expired, 410)['resync'])
+        self.assertEqual(self.sync(cursor)['deleted']['attendance'], [kept_id])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='student0', role='student', email='s@example.com')
+        self.key = Token.objects.create(user=self.user).key
+        self.teacher = User.objects.create(username='teacher', role='teacher')
+        self.teacher_key = Token.objects.create(user=self.teacher).key
+
+    def authenticate(self, key):
+        with CaptureQueriesContext(connection) as queries:
+            user, token = CachedTokenAuthentication().authenticate_credentials(key)
+        return user, token, len(queries)
+
+    def test_one_joined_query_then_cached(self):
+        user, token, queries = self.authenticate(self.key)
+        self.assertEqual((user.pk, token.key, queries), (self.user.pk, self.key, 1))
+        user, token, queries = self.authenticate(self.key)
+        self.assertEqual(queries, 0)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.username, user.role, user.is_active), (self.user.pk, 'student0', 'student', True))
+            self.assertFalse(user.is_staff)
+            student = user._cached_student
+            self.assertEqual((student.pk, student.name, student.roll_number, student.user.username),
+                             (self.user.pk, 'student0', 'S001', 'student0'))
+        # Other fields load on demand.
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 's@example.com')
+
+    def test_cache_holds_no_credentials(self):
+        self.authenticate(self.key)
+        entry = cache.get(TOKEN_KEY.format(self.key))
+        self.assertEqual(entry, {
+            'user_id': self.user.pk, 'username': 'student0', 'is_active': True, 'role': 'student',
+            'student': ('student0', 'S001'),
+        })
+
+        staff = User.objects.create(username='admin', role='teacher', is_staff=True)
+        staff_key = Token.objects.create(user=staff).key
+        for _ in range(2):
+            user, _, queries = self.authenticate(staff_key)
+            self.assertEqual((user.is_staff, queries), (True, 1))
+        self.assertIsNone(cache.get(TOKEN_KEY.format(staff_key)))
+
+    def test_ttl(self):
+        self.authenticate(self.key)
+        with override_settings(AUTH_TOKEN_CACHE_TIMEOUT=0):
+            cache.clear()
+            self.assertEqual(self.authenticate(self.key)[2], 1)
+            self.assertEqual(self.authenticate(self.key)[2], 1)
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            cache.clear()
+            self.authenticate(self.key)
+        self.assertEqual(cache_set.call_args.kwargs['timeout'], 60)
+
+    def test_request_student(self):
+        for key, expected in ((self.key, self.user.pk), (self.teacher_key, None)):
+            request = Request(RequestFactory().get('/', HTTP_AUTHORIZATION=f"Token {key}"))
+            for _ in range(2):
+                CachedTokenAuthentication().authenticate(request)
+                student = request._request.student
+                self.assertEqual(student.pk if student is not None else None, expected)
+
+    def test_logout_and_deactivation_invalidate(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.key}")
+        self.assertEqual(client.get(reverse('my-attendance')).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post(reverse('logout')).status_code, 200)
+        self.assertIsNone(cache.get(TOKEN_KEY.format(self.key)))
+        self.assertEqual(client.get(reverse('my-attendance')).status_code, 401)
+
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.teacher_key}")
+        self.assertEqual(client.get(reverse('student-list')).status_code, 200)
+        self.teacher.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.save()
+        self.assertEqual(client.get(reverse('student-list')).status_code, 401)
+
+    def assert_revoked_by(self, delete):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.key}")
+        self.assertEqual(client.get(reverse('my-attendance')).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            delete()
+        self.assertIsNone(cache.get(TOKEN_KEY.format(self.key)))
+        self.assertEqual(client.get(reverse('my-attendance')).status_code, 401)
+
+    def test_user_deletion_invalidates(self):
+        self.assert_revoked_by(self.user.delete)
+
+    def test_token_deletion_invalidates(self):
+        self.assert_revoked_by(Token.objects.get(key=self.key).delete)
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name="Course 0", code="C0")
+        self.user = User.objects.create(username='student0', role='student')
+        self.student = Student.objects.get(user=self.user)
+        Attendance.objects.create(student=self.student, subject=self.course, date=date(2025, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.teacher_client = APIClient()
+        self.teacher_client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+
+    def my_attendance(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('my-attendance'))
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def stats(self):
+        return self.teacher_client.get(reverse('response-cache-stats')).data
+
+    def hit_counter(self):
+        prefix = 'student_response_cache_requests_total{result="hits"} '
+        line = next((line for line in metrics.render().splitlines() if line.startswith(prefix)), prefix + '0')
+        return int(line.split()[-1])
+
+    def test_hits_until_the_student_data_changes(self):
+        before, hits = self.stats(), self.hit_counter()
+        rows, cold = self.my_attendance()
+        self.assertEqual(self.my_attendance(), (rows, cold - 1))
+        after = self.stats()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 1))
+        self.assertEqual(after['hit_rate'], round(after['hits'] / (after['hits'] + after['misses']), 4))
+        self.assertEqual(self.hit_counter(), hits + 1)
+
+        # The version moves only once the write commits, so a reader during
+        # the transaction can't cache the old rows under the new version.
+        version = cache.get(VERSION_KEY.format(self.student.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, subject=self.course, date=date(2025, 1, 2))
+            self.assertEqual(cache.get(VERSION_KEY.format(self.student.pk)), version)
+            self.assertEqual(len(self.my_attendance()[0]), 1)
+        self.assertNotEqual(cache.get(VERSION_KEY.format(self.student.pk)), version)
+        self.assertEqual(len(self.my_attendance()[0]), 2)
+
+    def test_profile_and_course_changes_invalidate(self):
+        self.my_attendance()
+        self.student.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        self.assertEqual(self.my_attendance()[0][0]['student']['name'], "Renamed")
+
+        self.course.name = "Algebra"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertEqual(self.my_attendance()[0][0]['subject']['name'], "Algebra")
+
+    def test_rolled_back_write_keeps_the_version(self):
+        self.my_attendance()
+        version = cache.get(VERSION_KEY.format(self.student.pk))
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Attendance.objects.create(student=self.student, subject=self.course, date=date(2025, 1, 2))
+            raise RuntimeError
+        self.assertEqual(cache.get(VERSION_KEY.format(self.student.pk)), version)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    # Count every query on the primary connection.
+    DATABASE_ROUTERS=[],
+)
+class QueryBudgetTestCase(TestCase):
+    """Base class for query-budget tests.
+
+    Each endpoint is requested once per data size with an empty cache; the
+    number of queries has to be the same at every size and within the
+    endpoint's budget. A table of query counts and timings is printed.
+    """
+
+    # (students, days of attendance and marks per student)
+    sizes = ((4, 10), (12, 30))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = [Course.objects.create(name=f"Course {i}", code=f"C{i}") for i in range(4)]
+        # Manual data entry files everything under this course.
+        Course.objects.create(name="General", code="GENERAL")
+        cls.teacher = User.objects.create(username='teacher', role='teacher')
+        cls.teacher.set_password('secret')
+        cls.teacher.save()
+        cls.student_user = User.objects.create(username='student0', role='student')
+        cls.student = Student.objects.get(user=cls.student_user)
+
+    def setUp(self):
+        self.teacher_client = self.client_for(self.teacher)
+        self.student_client = self.client_for(self.student_user)
+        self.anonymous_client = APIClient()
+        self.seeded_days = {}
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    def seed(self, students, days):
+        """Grow the data set to ``students`` students with ``days`` days of records each."""
+        for i in range(Student.objects.count(), students):
+            User.objects.create(username=f"student{i}", role='student')
+        start = date(2025, 1, 1)
+        attendance = []
+        marks = []
+        for student in Student.objects.filter(roll_number__startswith='S'):
+            for day in range(self.seeded_days.get(student.pk, 0), days):
+                course = self.courses[day % len(self.courses)]
+                attendance.append(Attendance(
+                    student=student, subject=course, date=start + timedelta(days=day), is_present=day % 4 != 0
+                ))
+                marks.append(Marks(
+                    student=student, course=course, assessment_type=('assignment', 'quiz', 'sessional')[day % 3],
+                    assessment_number=day, marks=40 + day % 60, date=start + timedelta(days=day)
+                ))
+            self.seeded_days[student.pk] = days
+        Attendance.objects.bulk_create(attendance)
+        Marks.objects.bulk_create(marks)
+        enroll((row.student_id, row.subject_id) for row in attendance)
+
+    def measure(self, client, method, url, **kwargs):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            elapsed = time.perf_counter() - started
+        return response, len(queries), elapsed
+
+    def assertQueryBudgets(self, endpoints):
+        """Run ``endpoints`` at every size and check their query counts.
+
+        ``endpoints`` is a list of ``(name, budget, request)`` where ``request``
+        takes the size index and returns ``(client, method, url, kwargs)``.
+        """
+        results = {name: [] for name, _, _ in endpoints}
+        for index, (students, days) in enumerate(self.sizes):
+            self.seed(students, days)
+            for name, budget, request in endpoints:
+                client, method, url, kwargs = request(index)
+                response, count, elapsed = self.measure(client, method, url, **kwargs)
+                self.assertLess(response.status_code, 300, f"{name}: {response.status_code} {getattr(response, 'content', b'')[:200]!r}")
+                results[name].append((count, elapsed))
+
+        width = max(len(name) for name in results)
+        header = ''.join(f"  {students}x{days}:queries     ms" for students, days in self.sizes)
+        lines = [f"\n{'endpoint'.ljust(width)}  budget{header}"]
+        for name, budget, _ in endpoints:
+            cells = ''.join(f"  {count:>14} {elapsed * 1000:>6.1f}" for count, elapsed in results[name])
+            lines.append(f"{name.ljust(width)}  {budget:>6}{cells}")
+        print('\n'.join(lines))
+
+        for name, budget, _ in endpoints:
+            counts = [count for count, _ in results[name]]
+            self.assertEqual(len(set(counts)), 1, f"{name}: query count grows with data size {counts}")
+            self.assertLessEqual(counts[0], budget, f"{name}: {counts[0]} queries, budget is {budget}")
+
+
+class AttendanceQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        exports_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(exports_dir.cleanup)
+        settings = override_settings(EXPORTS_DIR=exports_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for patcher in (
+            mock.patch.object(export_jobs, 'threading', SimpleNamespace(Thread=InlineThread)),
+            mock.patch.object(search, '_index', None),
+            mock.patch.object(search, 'threading', SimpleNamespace(Thread=InlineThread, Lock=search.threading.Lock)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def start_export(self):
+        return self.teacher_client.post(reverse('export-jobs'))
+
+    def test_attendance_endpoints(self):
+        teacher, student = self.teacher_client, self.student_client
+        course = self.courses[0]
+
+        def get(client, name, *args, **kwargs):
+            return lambda index: (client, 'get', reverse(name, args=args), {'data': kwargs})
+
+        def first(model):
+            return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+        def logout(index):
+            user = User.objects.create(username=f"leaver{index}", role='teacher')
+            return self.client_for(user), 'post', reverse('logout'), {}
+
+        def upload_csv(index):
+            # New users, and renames of existing students with updates to their seeded
+            # attendance and quiz 1 of 2025-01-02; more of both at the larger size.
+            count = (3, 9)[index]
+            existing = Student.objects.filter(roll_number__startswith='S').order_by('pk')[:count]
+            rows = '\n'.join([
+                f"upload{index}_{i},U{index}-{i},Upload {i},{course.name},80,{50 + i},100,2025-03-{i + 1:02},09:00:00"
+                for i in range(count)
+            ] + [
+                f"{student.user.username},{student.roll_number},Renamed {index},{self.courses[1].name},60,40,100,2025-01-02,10:00:00"
+                for student in existing.select_related('user')
+            ])
+            upload = SimpleUploadedFile('students.csv', (
+                'username,roll_number,name,subject,attendance_percentage,marks_obtained,total_marks,date,check_in_time\n'
+                + rows
+            ).encode())
+            return teacher, 'post', reverse('student-csv-upload'), {'data': {'file': upload}, 'format': 'multipart'}
+
+        def manual_entry(index):
+            data = {
+                'roll_number': f"M{index}", 'name': f"Manual {index}", 'marks': 70,
+                'attendance_percentage': 90, 'assignment_submission': 80
+            }
+            return teacher, 'post', reverse('manual-student-data-entry'), {'data': data, 'format': 'json'}
+
+        def export_job(name):
+            def request(index):
+                version = self.start_export().data['id']
+                return teacher, 'get', reverse(name, args=[version]), {}
+            return request
+
+        def manual_update(index):
+            # The same student's data entered again: every record takes the update branch.
+            client, method, url, kwargs = manual_entry(index + len(self.sizes))
+            client.post(url, **kwargs)
+            kwargs['data'] = {**kwargs['data'], 'marks': 75}
+            return client, method, url, kwargs
+
+        self.assertQueryBudgets([
+            ('student-list', 2, get(teacher, 'student-list')),
+            ('student-detail', 2, get(teacher, 'student-detail', self.student.pk)),
+            ('student-search-by-roll', 4, get(teacher, 'student-search-by-roll', self.student.roll_number)),
+            ('course-list', 2, get(teacher, 'course-list')),
+            ('course-detail', 2, get(teacher, 'course-detail', course.pk)),
+            ('attendance-list', 2, get(teacher, 'attendance-list')),
+            ('attendance-detail', 2, lambda index: (teacher, 'get', reverse('attendance-detail', args=[first(Attendance)]), {})),
+            ('marks-list', 2, get(teacher, 'marks-list')),
+            ('marks-detail', 2, lambda index: (teacher, 'get', reverse('marks-detail', args=[first(Marks)]), {})),
+            ('my-attendance', 3, get(student, 'my-attendance')),
+            ('my-marks', 3, get(student, 'my-marks')),
+            ('all-attendance', 2, get(teacher, 'all-attendance', page_size=20)),
+            ('all-marks', 2, get(teacher, 'all-marks', page_size=20)),
+            ('attendance-series', 2, get(teacher, 'attendance-series', interval='week', group_by='course')),
+            ('attendance-series own', 2, get(student, 'attendance-series', interval='month')),
+            ('my-rank', 6, get(student, 'my-rank')),
+            ('course-leaderboard', 4, get(teacher, 'course-leaderboard', course.pk, limit=3)),
+            ('sync-changes', 4, get(teacher, 'sync-changes')),
+            ('response-cache-stats', 1, get(teacher, 'response-cache-stats')),
+            ('login', 2, lambda index: (self.anonymous_client, 'post', reverse('login'),
+                                        {'data': {'username': 'teacher', 'password': 'secret'}})),
+            ('logout', 3, logout),
+            ('all-students-details', 3, get(self.anonymous_client, 'all-students-details')),
+            ('all-students-details columnar', 3, get(self.anonymous_client, 'all-students-details', format='columnar')),
+            ('student-csv-upload', 18, upload_csv),
+            ('student-own-data-csv-export', 4, get(student, 'student-own-data-csv-export')),
+            ('teacher-all-students-data-csv-export', 4, get(teacher, 'teacher-all-students-data-csv-export')),
+            ('teacher-student-data-csv-export', 5,
+             get(teacher, 'teacher-student-data-csv-export', self.student.roll_number)),
+            # Exports and index builds run inline here, so they are counted too.
+            ('export-jobs', 9, lambda index: (teacher, 'post', reverse('export-jobs'), {})),
+            ('export-job-detail', 1, export_job('export-job-detail')),
+            ('export-job-download', 1, export_job('export-job-download')),
+            ('student-search', 2, get(teacher, 'student-search', q='stu')),
+            ('manual-student-data-entry', 26, manual_entry),
+            ('manual-student-data-entry update', 13, manual_update),
+        ])
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+
+    def test_admin_changelists(self):
+        superuser = User.objects.create(username='admin', role='teacher', is_staff=True, is_superuser=True)
+        client = Client()
+        client.force_login(superuser)
+        course = self.courses[0]
+        # The change form looks these up once per process.
+        ContentType.objects.get_for_models(Attendance, Marks)
+
+        def get(name, *args, **params):
+            return lambda index: (client, 'get', reverse(f"admin:{name}", args=args), {'data': params})
+
+        def first(model):
+            return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+        self.assertQueryBudgets([
+            ('attendance-changelist', 7, get('attendance_attendance_changelist')),
+            ('attendance-changelist filtered', 6, get(
+                'attendance_attendance_changelist', subject__id__exact=course.pk, date__year=2025, date__month=1
+            )),
+            ('attendance-change', 7, lambda index: get('attendance_attendance_change', first(Attendance))(index)),
+            ('marks-changelist', 7, get('attendance_marks_changelist')),
+            ('marks-changelist filtered', 7, get('attendance_marks_changelist', course__id__exact=course.pk)),
+            ('enrollment-changelist', 5, get('attendance_enrollment_changelist')),
+            ('student-changelist', 4, get('attendance_student_changelist')),
+            ('studentrisk-changelist', 5, get('risk_analysis_studentrisk_changelist')),
+        ])
+
+    def test_estimated_count(self):
+        self.seed(4, 10)
+        queryset = Attendance.objects.order_by('-pk')
+        with mock.patch.object(admin, 'estimated_row_count', return_value=2_000_000):
+            self.assertEqual(admin.EstimatedCountPaginator(queryset, 100).count, 2_000_000)
+            # Filtered rows are counted.
+            filtered = queryset.filter(subject=self.courses[0])
+            self.assertEqual(admin.EstimatedCountPaginator(filtered, 100).count, 12)
+        with mock.patch.object(admin, 'estimated_row_count', return_value=100):
+            self.assertEqual(admin.EstimatedCountPaginator(queryset, 100).count, 40)
+
+
+class AttendanceSeriesCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name="Course 0", code="C0")
+        self.student = Student.objects.get(user=User.objects.create(username='student0', role='student'))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+        today = timezone.localdate()
+        self.past = Attendance.objects.create(student=self.student, subject=self.course, date=today - timedelta(days=3))
+        Attendance.objects.create(student=self.student, subject=self.course, date=today, is_present=False)
+
+    def series(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('attendance-series'), {'course': self.course.pk})
+        self.assertEqual(response.status_code, 200)
+        return [(bucket['present'], bucket['total']) for bucket in response.data['buckets']], queries
+
+    def test_past_buckets_are_cached_until_a_past_record_changes(self):
+        self.assertEqual(self.series()[0], [(1, 1), (0, 1)])
+        buckets, queries = self.series()
+        self.assertEqual(buckets, [(1, 1), (0, 1)])
+        self.assertIn(str(timezone.localdate()), queries[0]['sql'])
+
+        # Today's check-ins show up without invalidating the past.
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(
+                student=Student.objects.get(user=User.objects.create(username='student1', role='student')),
+                subject=self.course, date=timezone.localdate()
+            )
+        self.assertEqual(self.series()[0], [(1, 1), (1, 2)])
+
+        self.past.is_present = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.past.save()
+        self.assertEqual(self.series()[0], [(0, 1), (1, 2)])
+
+
+class CourseStandingsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name="Course 0", code="C0")
+        self.students = [
+            Student.objects.get(user=User.objects.create(username=f"student{i}", role='student')) for i in range(4)
+        ]
+        self.teacher = User.objects.create(username='teacher', role='teacher')
+        self.marks = {}
+        for student, (quiz, assignment) in zip(self.students, ((90, 50), (70, 60), (70, 80), (40, 70))):
+            self.marks[student.pk] = Marks.objects.create(
+                student=student, course=self.course, assessment_type='quiz', marks=quiz, date=date(2025, 1, 1)
+            )
+            Marks.objects.create(student=student, course=self.course, assessment_type='assignment',
+                                 marks=assignment, max_marks=200, date=date(2025, 1, 1))
+
+    def get(self, user, name, *args, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_ranks_and_percentiles(self):
+        standings, _ = self.get(self.students[2].user, 'my-rank')
+        self.assertEqual(
+            [(row['assessment_type'], row['score'], row['rank'], row['out_of'], row['percentile']) for row in standings],
+            [('assignment', 40.0, 1, 4, 100.0), ('quiz', 70.0, 2, 4, 33.3)]
+        )
+
+        board, _ = self.get(self.teacher, 'course-leaderboard', self.course.pk, assessment_type='quiz', limit=2)
+        quiz = board['assessment_types']['quiz']
+        self.assertEqual(quiz['students'], 4)
+        # Ties share a rank.
+        self.assertEqual([(row['name'], row['rank']) for row in quiz['top']], [('student0', 1), ('student1', 2)])
+        self.assertEqual([(row['name'], row['rank']) for row in quiz['bottom']], [('student2', 2), ('student3', 4)])
+
+    def test_standings_are_cached_until_the_course_marks_change(self):
+        self.get(self.teacher, 'course-leaderboard', self.course.pk)
+        board, queries = self.get(self.teacher, 'course-leaderboard', self.course.pk)
+        # The course and the names; no standings query.
+        self.assertEqual(queries, 2)
+
+        mark = self.marks[self.students[3].pk]
+        mark.marks = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            mark.save()
+        board, _ = self.get(self.teacher, 'course-leaderboard', self.course.pk, assessment_type='quiz', limit=1)
+        self.assertEqual(board['assessment_types']['quiz']['top'][0]['name'], 'student3')
+
+    def test_students_only(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        self.assertEqual(client.get(reverse('my-rank')).status_code, 403)
+
+
+class EnrollmentTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.courses = [Course.objects.create(name=f"Course {i}", code=f"C{i}") for i in range(3)]
+        self.user = User.objects.create(username='student0', role='student')
+        self.student = Student.objects.get(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def enrolled(self):
+        return list(Enrollment.objects.filter(student=self.student).order_by('course_id').values_list('course_id', flat=True))
+
+    def test_records_enroll_their_student(self):
+        attendance = Attendance.objects.create(student=self.student, subject=self.courses[0], date=date(2025, 1, 1))
+        Attendance.objects.create(student=self.student, subject=self.courses[0], date=date(2025, 1, 2))
+        Marks.objects.create(student=self.student, course=self.courses[2], marks=50, date=date(2025, 1, 1))
+        self.assertEqual(self.enrolled(), [self.courses[0].pk, self.courses[2].pk])
+
+        # Listing the courses invalidates with the student's data.
+        response = self.client.get(reverse('risk_analysis:student-courses'))
+        self.assertEqual([course['code'] for course in response.data], ['C0', 'C2'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, subject=self.courses[1], date=date(2025, 1, 1))
+        response = self.client.get(reverse('risk_analysis:student-courses'))
+        self.assertEqual([course['code'] for course in response.data], ['C0', 'C1', 'C2'])
+
+        attendance.delete()
+        self.assertEqual(len(self.enrolled()), 3)
+
+    def test_edits_enroll_only_when_the_student_or_course_changes(self):
+        Attendance.objects.create(student=self.student, subject=self.courses[0], date=date(2025, 1, 1))
+        Marks.objects.create(student=self.student, course=self.courses[0], marks=50, date=date(2025, 1, 1))
+        attendance = Attendance.objects.get()
+        marks = Marks.objects.get()
+
+        def enrollment_queries(record, **changes):
+            for name, value in changes.items():
+                setattr(record, name, value)
+            with CaptureQueriesContext(connection) as queries:
+                record.save()
+            return [query['sql'] for query in queries if 'attendance_enrollment' in query['sql']]
+
+        self.assertEqual(enrollment_queries(attendance, is_present=False), [])
+        self.assertEqual(enrollment_queries(marks, marks=60), [])
+        self.assertEqual(len(enrollment_queries(attendance, subject=self.courses[1])), 1)
+        self.assertEqual(enrollment_queries(attendance, is_present=True), [])
+        self.assertEqual(len(enrollment_queries(marks, course=self.courses[2])), 1)
+        self.assertEqual(self.enrolled(), [course.pk for course in self.courses])
+
+    def test_course_prediction_requires_enrollment(self):
+        response = self.client.get(reverse('risk_analysis:student-course-prediction', args=[self.courses[1].pk]))
+        self.assertEqual(response.status_code, 400)
+
+
+class GenerateDataTests(TestCase):
+
+    def test_without_ids_returned_from_bulk_inserts(self):
+        # As on MySQL, which doesn't return the ids of bulk-inserted rows.
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            call_command('generate_data', students=3, courses=2, days=5, prefix='t', batch_size=2, stdout=StringIO())
+        self.assertEqual(Student.objects.filter(roll_number__startswith='T').count(), 3)
+        self.assertEqual(Attendance.objects.count(), 3 * 2 * 5)
+        self.assertEqual(Marks.objects.filter(assessment_type='quiz').count(), 3 * 2)
+        self.assertEqual(Enrollment.objects.count(), 3 * 2)
+
+    def test_benchmark_seed_without_ids_returned_from_bulk_inserts(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            students, courses = benchmarks.seed(20, 4, 2)
+        self.assertTrue(all(student.pk for student in students) and all(course.pk for course in courses))
+        self.assertEqual((Attendance.objects.count(), Marks.objects.count(), Enrollment.objects.count()), (20, 20, 8))
+
+
+class InlineThread:
+    """Runs the export in the test's thread and transaction."""
+
+    def __init__(self, target, args=(), **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+class ExportJobTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        exports_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(exports_dir.cleanup)
+        settings = override_settings(EXPORTS_DIR=exports_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.thread = InlineThread
+        patcher = mock.patch.object(export_jobs, 'threading', SimpleNamespace(Thread=lambda **kwargs: self.thread(**kwargs)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        course = Course.objects.create(name="Course 0", code="C0")
+        for i in range(3):
+            student = Student.objects.get(user=User.objects.create(username=f"student{i}", role='student'))
+            Attendance.objects.create(student=student, subject=course, date=date(2025, 1, 1))
+            self.mark = Marks.objects.create(student=student, course=course, marks=50 + i, date=date(2025, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+
+    def start(self):
+        return self.client.post(reverse('export-jobs'))
+
+    def expected_csv(self):
+        output = StringIO(newline='')
+        write_student_data_csv(output)
+        return output.getvalue().encode()
+
+    def test_export_is_written_once_per_data_version(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 202)
+        job = response.data
+        self.assertEqual(self.client.get(job['url']).data['status'], 'ready')
+        download = self.client.get(job['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download['Content-Type'], 'application/gzip')
+        self.assertEqual(gzip.decompress(b''.join(download.streaming_content)), self.expected_csv())
+
+        # Unchanged data reuses the stored file.
+        with mock.patch.object(export_jobs, 'write_student_data_csv') as write:
+            response = self.start()
+        self.assertEqual((response.status_code, response.data['id']), (200, job['id']))
+        write.assert_not_called()
+
+        self.mark.marks = 99
+        self.mark.save()
+        response = self.start()
+        self.assertNotEqual(response.data['id'], job['id'])
+        Student.objects.filter(pk=self.mark.student_id).update(name="Renamed")
+        self.assertEqual(self.start().data['id'], response.data['id'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mark.student.save()
+        self.assertNotEqual(self.start().data['id'], response.data['id'])
+
+    def test_range_requests(self):
+        job = self.start().data
+        body = b''.join(self.client.get(job['download_url']).streaming_content)
+
+        response = self.client.get(job['download_url'], headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f"bytes 10-19/{len(body)}")
+        self.assertEqual(b''.join(response.streaming_content), body[10:20])
+
+        response = self.client.get(job['download_url'], headers={'Range': 'bytes=-5'})
+        self.assertEqual(b''.join(response.streaming_content), body[-5:])
+        response = self.client.get(job['download_url'], headers={'Range': f"bytes={len(body)}-"})
+        self.assertEqual(response.status_code, 416)
+        response = self.client.get(job['download_url'], headers={'Range': 'bytes=0-9', 'If-Range': '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_running_export_is_not_started_twice(self):
+        started = []
+        self.thread = lambda target, args, **kwargs: SimpleNamespace(start=lambda: started.append(args))
+        job = self.start().data
+        self.assertEqual((job['status'], self.start().data['status']), ('running', 'running'))
+        self.assertEqual(len(started), 1)
+        self.assertEqual(self.client.get(job['download_url']).status_code, 409)
+
+        export_jobs._write_export(*started[0])
+        self.assertEqual(self.client.get(job['download_url']).status_code, 200)
+        self.assertEqual(self.client.get(reverse('export-job-detail', args=['missing'])).status_code, 404)
+
+
+class StudentSearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            mock.patch.object(search, '_index', None),
+            mock.patch.object(search, 'threading', SimpleNamespace(Thread=InlineThread, Lock=search.threading.Lock)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for username, name in (('jdoe', 'John Doe'), ('asmith', 'Anna Smith'), ('jsmithers', 'Jo Smithers')):
+            Student.objects.filter(user=User.objects.create(username=username, role='student')).update(name=name)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('student-search'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [student['username'] for student in response.data]
+
+    def test_prefix_and_substring_matches(self):
+        self.assertEqual(self.search('smith'), ['asmith', 'jsmithers'])
+        self.assertEqual(self.search('J'), ['jdoe', 'jsmithers'])
+        self.assertEqual(self.search('s002'), ['asmith'])
+        # Prefix matches first, then substrings of three characters or more.
+        self.assertEqual(self.search('mit'), ['asmith', 'jsmithers'])
+        self.assertEqual(self.search('mi'), [])
+        self.assertEqual(self.search('o sm'), ['jsmithers'])
+        self.assertEqual(self.search('sm', limit=1), ['asmith'])
+        self.assertEqual(self.client.get(reverse('student-search')).status_code, 400)
+
+    def test_index_follows_committed_changes(self):
+        self.assertEqual(self.search('doe'), ['jdoe'])
+        with self.captureOnCommitCallbacks(execute=True):
+            student = Student.objects.get(user__username='jdoe')
+            student.name = 'John Roe'
+            student.save()
+        with mock.patch.object(search, '_build') as build:
+            self.assertEqual(self.search('roe'), ['jdoe'])
+        build.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(username='asmith').delete()
+        self.assertEqual(self.search('smith'), ['jsmithers'])
+
+        # Another process renamed a student: rebuild from the database.
+        Student.objects.filter(user__username='jsmithers').update(name='Jo Black')
+        bump_roster_version()
+        self.search('black')
+        self.assertEqual(self.search('black'), ['jsmithers'])
+
+
+class StudentCSVUploadTests(TestCase):
+    header = 'username,roll_number,name,subject,attendance_percentage,marks_obtained,total_marks,date,check_in_time\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name="Physics", code="PHY")
+        Course.objects.create(name="Maths", code="MATHEMATIC")
+        User.objects.create(username='teacher', role='teacher')
+        cls.student = Student.objects.get(user=User.objects.create(username='alice', role='student'))
+        Student.objects.get(user=User.objects.create(username='bob', role='student'))
+        cls.attendance = Attendance.objects.create(student=cls.student, subject=cls.course, date=date(2025, 1, 2))
+        cls.quiz = Marks.objects.create(
+            student=cls.student, course=cls.course, assessment_type='quiz', assessment_number=1, marks=10,
+            date=date(2025, 1, 2)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(username='teacher'))
+
+    def upload(self, *rows):
+        upload = SimpleUploadedFile('students.csv', (self.header + '\n'.join(rows)).encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('student-csv-upload'), {'file': upload}, format='multipart')
+
+    def test_creates_and_updates(self):
+        versions = [cache.get(VERSION_KEY.format(self.student.pk))]
+        with mock.patch.object(search, 'refresh_student') as refresh:
+            response = self.upload(
+                "carol,R-1,Carol Ann Lee,Physics,90,45,50,2025-02-01,09:30:00",
+                "carol,R-1,Carol Ann Lee,Chemistry,60,20,50,2025-02-01,09:30:00",
+                "alice,A-7,Alice Liddell,Physics,50,35,40,2025-01-02,10:15:00",
+                "carol,R-1,Carol Ann Lee,Physics,70,40,50,2025-02-01,09:30:00",
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        carol = Student.objects.select_related('user').get(roll_number='R-1')
+        self.assertEqual(response.data, {
+            'message': 'CSV processed successfully',
+            'created_users': ['carol'],
+            'updated_students': ['R-1', 'A-7'],
+            'created_attendance': ['R-1 - Physics', 'R-1 - Chemistry'],
+            'updated_attendance': ['A-7 - Physics', 'R-1 - Physics'],
+            'created_marks': ['R-1 - Physics', 'R-1 - Chemistry'],
+            'updated_marks': ['A-7 - Physics', 'R-1 - Physics'],
+        })
+        self.assertEqual((carol.name, carol.user.first_name, carol.user.last_name), ('Carol Ann Lee', 'Carol', 'Ann Lee'))
+        self.assertTrue(carol.user.check_password('password123'))
+        chemistry = Course.objects.get(name='Chemistry')
+        self.assertEqual(chemistry.code, 'CHEMISTRY')
+        self.assertEqual(
+            sorted(Attendance.objects.filter(student=carol).values_list('subject__name', 'is_present')),
+            [('Chemistry', False), ('Physics', False)]
+        )
+        self.assertEqual(Marks.objects.get(student=carol, course=self.course).marks, 40)
+        self.assertEqual(
+            set(Enrollment.objects.filter(student=carol).values_list('course__name', flat=True)), {'Chemistry', 'Physics'}
+        )
+
+        self.attendance.refresh_from_db()
+        self.quiz.refresh_from_db()
+        self.assertEqual((self.attendance.is_present, self.attendance.checkin_time.isoformat()), (False, '10:15:00'))
+        self.assertEqual((self.quiz.marks, self.quiz.max_marks), (35, 40))
+        self.assertGreater(self.quiz.updated_at, timezone.now() - timedelta(minutes=1))
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.name, self.student.roll_number), ('Alice Liddell', 'A-7'))
+        self.assertTrue(Enrollment.objects.filter(student=self.student, course=self.course).exists())
+        self.assertNotEqual(cache.get(VERSION_KEY.format(self.student.pk)), versions[0])
+        self.assertIsNotNone(cache.get(VERSION_KEY.format(carol.pk)))
+        refresh.assert_called_once_with(carol.pk, self.student.pk)
+
+    def test_skips_invalid_rows(self):
+        response = self.upload(
+            "teacher,T-1,Teacher,Physics,80,40,50,2025-02-01,09:00:00",
+            "dave,S002,Dave,Physics,80,40,50,2025-02-01,09:00:00",
+            "erin,E-1,Erin,Mathematical Logic,80,40,50,2025-02-01,09:00:00",
+            "frank,F-1,Frank,Physics,120,40,50,2025-02-01,09:00:00",
+            "gina,G-1,Gina,Physics,80,40,50,2025-02-01,09:00:00",
+        )
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['errors'], [
+            "Invalid attendance_percentage for frank: Attendance percentage must be between 0 and 100",
+            "User teacher is not a student (role: teacher)",
+            "Roll number S002 already exists for another student",
+            "Cannot create course Mathematical Logic: code MATHEMATIC is already taken",
+        ])
+        self.assertEqual(response.data['created_users'], ['erin', 'gina'])
+        self.assertEqual(response.data['created_attendance'], ['G-1 - Physics'])
+        self.assertFalse(User.objects.filter(username__in=['dave', 'frank']).exists())
+        self.assertFalse(Course.objects.filter(name='Mathematical Logic').exists())
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """The replica alias is a test mirror of default, so both see the same rows;
+    the queries captured per connection show where each read was routed."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        course = Course.objects.create(name="Course 0", code="C0")
+        self.teacher = User.objects.create(username='teacher', role='teacher')
+        student = Student.objects.get(user=User.objects.create(username='student0', role='student'))
+        Attendance.objects.create(student=student, subject=course, date=date(2025, 1, 1))
+        Marks.objects.create(student=student, course=course, marks=50, date=date(2025, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def get(self, name):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200, name)
+        return len(primary), len(replica)
+
+    def test_opted_in_views_read_from_replica(self):
+        for name in ('all-attendance', 'all-marks', 'all-students-details', 'teacher-all-students-data-csv-export'):
+            primary, replica = self.get(name)
+            self.assertGreater(replica, 0, name)
+            self.assertEqual(primary, 0, name)
+
+    def test_other_views_read_from_primary(self):
+        primary, replica = self.get('attendance-list')
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    def test_reads_stay_on_primary_after_own_write(self):
+        response = self.client.post(reverse('course-list'), {'name': "Course 1", 'code': "C1"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        primary, replica = self.get('all-attendance')
+        self.assertEqual(replica, 0)
+
+        # Other users are not pinned, and the pin expires.
+        self.client.force_authenticate(User.objects.create(username='teacher2', role='teacher'))
+        self.assertEqual(self.get('all-attendance')[0], 0)
+        cache.delete(PIN_KEY.format(self.teacher.pk))
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self.get('all-attendance')[0], 0)
+
+
+@override_settings(LIVE_FEED_QUEUE_SIZE=2)
+class LiveAttendanceFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = [Course.objects.create(name=f"Course {i}", code=f"C{i}") for i in range(2)]
+        cls.teacher = User.objects.create(username='teacher', role='teacher')
+        cls.student_user = User.objects.create(username='student0', role='student')
+        cls.student = Student.objects.get(user=cls.student_user)
+
+    def setUp(self):
+        cache.clear()
+        self.async_client = AsyncClient()
+        self.headers = {'Authorization': f"Token {Token.objects.get_or_create(user=self.teacher)[0].key}"}
+
+    def write(self, write):
+        with self.captureOnCommitCallbacks(execute=True):
+            return write()
+
+    async def open_feed(self, course, day='2025-01-01'):
+        response = await self.async_client.get(
+            reverse('attendance-live-feed'), {'course': course.pk, 'date': day}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 3000\n')
+        self.assertEqual(await anext(events), f'event: ready\ndata: {{"course":{course.pk},"date":"{day}"}}\n\n'.encode())
+        return events
+
+    async def next_event(self, events):
+        name, data = (await asyncio.wait_for(anext(events), 5)).decode().strip().split('\n')
+        return name.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    async def test_streams_committed_changes_for_the_course_and_date(self):
+        events = await self.open_feed(self.courses[0])
+        await sync_to_async(self.write)(lambda: Attendance.objects.create(
+            student=self.student, subject=self.courses[1], date=date(2025, 1, 1)
+        ))
+        await sync_to_async(self.write)(lambda: Attendance.objects.create(
+            student=self.student, subject=self.courses[0], date=date(2025, 1, 2)
+        ))
+        row = await sync_to_async(self.write)(lambda: Attendance.objects.create(
+            student=self.student, subject=self.courses[0], date=date(2025, 1, 1), is_present=False
+        ))
+        name, data = await self.next_event(events)
+        self.assertEqual(name, 'attendance')
+        self.assertEqual((data['id'], data['is_present'], data['subject']['id']), (row.pk, False, self.courses[0].pk))
+        self.assertEqual(data['student']['roll_number'], self.student.roll_number)
+
+        await sync_to_async(self.write)(row.delete)
+        self.assertEqual(await self.next_event(events), ('attendance-deleted', {'id': data['id']}))
+        # A client disconnecting cancels the task that iterates the stream.
+        waiting = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(broadcaster.subscriber_count(), 0)
+
+    async def test_edit_moving_a_row_leaves_its_old_feed(self):
+        events = await self.open_feed(self.courses[0])
+        row = await sync_to_async(self.write)(lambda: Attendance.objects.create(
+            student=self.student, subject=self.courses[0], date=date(2025, 1, 1)
+        ))
+        self.assertEqual((await self.next_event(events))[1]['id'], row.pk)
+
+        def move(**changes):
+            loaded = Attendance.objects.get(pk=row.pk)
+            for name, value in changes.items():
+                setattr(loaded, name, value)
+            loaded.save()
+
+        other_feed = await self.open_feed(self.courses[1])
+        await sync_to_async(self.write)(lambda: move(subject=self.courses[1]))
+        self.assertEqual(await self.next_event(events), ('attendance-deleted', {'id': row.pk}))
+        name, data = await self.next_event(other_feed)
+        self.assertEqual((name, data['id']), ('attendance', row.pk))
+
+        await sync_to_async(self.write)(lambda: move(date=date(2025, 1, 2)))
+        self.assertEqual(await self.next_event(other_feed), ('attendance-deleted', {'id': row.pk}))
+        await sync_to_async(self.write)(lambda: move(subject=self.courses[0], date='2025-01-01'))
+        name, data = await self.next_event(events)
+        self.assertEqual((name, data['id']), ('attendance', row.pk))
+
+    async def test_slow_subscriber_is_reset(self):
+        events = await self.open_feed(self.courses[0])
+        for _ in range(3):
+            await sync_to_async(broadcaster.publish, thread_sensitive=False)(
+                (self.courses[0].pk, '2025-01-01'), 'event: attendance\ndata: {}\n\n'
+            )
+        await asyncio.sleep(0)
+        self.assertEqual(await self.next_event(events), ('reset', {'course': self.courses[0].pk, 'date': '2025-01-01'}))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(events)
+        self.assertEqual(broadcaster.subscriber_count(), 0)
+
+    async def test_rejects_invalid_requests(self):
+        url = reverse('attendance-live-feed')
+        course = {'course': self.courses[0].pk}
+        self.assertEqual((await self.async_client.get(url, headers=self.headers)).status_code, 400)
+        self.assertEqual((await self.async_client.get(url, {'course': 999}, headers=self.headers)).status_code, 404)
+        self.assertEqual((await self.async_client.get(url, course)).status_code, 401)
+        token = await sync_to_async(lambda: Token.objects.get_or_create(user=self.student_user)[0].key)()
+        response = await self.async_client.get(url, course, headers={'Authorization': f"Token {token}"})
+        self.assertEqual(response.status_code, 403)
+
+
+class LogHandlerTests(TestCase):
+
+    def make_record(self, level, msg, args=(), **extra):
+        record = logging.LogRecord('attendance.views', level, __file__, 0, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_only_flagged_messages_are_sampled(self):
+        sampler = SamplingFilter(rate=0)
+        self.assertFalse(sampler.filter(self.make_record(logging.INFO, "hot", **SAMPLED)))
+        self.assertTrue(sampler.filter(self.make_record(logging.INFO, "audit")))
+        self.assertTrue(sampler.filter(self.make_record(logging.WARNING, "hot", **SAMPLED)))
+
+        sampler = SamplingFilter(rate=0.1)
+        with mock.patch('student_management.log_handlers.random.random', return_value=0.5):
+            self.assertFalse(sampler.filter(self.make_record(logging.INFO, "hot", **SAMPLED)))
+            self.assertTrue(sampler.filter(self.make_record(logging.INFO, "Uploaded %s rows", (3,))))
+        with mock.patch('student_management.log_handlers.random.random', return_value=0.05):
+            self.assertTrue(sampler.filter(self.make_record(logging.INFO, "hot", **SAMPLED)))
+
+    def test_queued_message_is_merged_before_arguments_change(self):
+        received = []
+        target = logging.Handler()
+        target.emit = lambda record: received.append((record.getMessage(), record.args))
+        handler = AsyncQueueHandler([target])
+        logger = logging.getLogger('attendance.tests.queue')
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        rows = [1]
+        logger.warning("rows %s", rows)
+        rows.append(2)
+        # stop() is registered with atexit; wait for the queue to drain instead.
+        handler.queue.join()
+        self.assertEqual(received, [("rows [1]", None)])
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+        override = override_settings(METRICS_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write_snapshot(self, name, value, age=0):
+        path = self.dir / f'{name}.json'
+        path.write_text(json.dumps({'counters': [['test_total', {}, value]], 'histograms': []}))
+        os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def total(self):
+        counters, _ = metrics.collect()
+        return counters.get(('test_total', ()), 0)
+
+    def test_forked_worker_snapshot_is_removed_after_it_exits(self):
+        metrics.inc('test_total', {}, 5)
+        self.addCleanup(metrics._counters.pop, ('test_total', ()), None)
+        pid = os.fork()
+        if pid == 0:
+            metrics.inc('test_total', {}, 2)
+            metrics.flush(force=True)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        child = next(self.dir.glob(f'{pid}-*.json'))
+        self.assertEqual(json.loads(child.read_text())['counters'], [['test_total', {}, 2]])
+        self.assertEqual(self.total(), 5)
+        self.assertFalse(child.exists())
+
+    def test_silent_snapshot_of_a_running_pid_ages_out(self):
+        # The pid is running, but the snapshot may be from an earlier process that had it.
+        fresh = self.write_snapshot(f'{os.getppid()}-1', 3)
+        old = self.write_snapshot(f'{os.getppid()}-2', 4, age=7200)
+        with override_settings(METRICS_STALE_SECONDS=3600):
+            self.assertEqual(self.total(), 3)
+        self.assertTrue(fresh.exists())
+        self.assertFalse(old.exists())
+
+    def test_allowed_addresses(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8']):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.1.2.3').status_code, 200)
+        with override_settings(METRICS_ALLOWED_IPS=None):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='192.0.2.1').status_code, 200)
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', role='teacher', is_staff=True)
+        cls.teacher = User.objects.create(username='teacher', role='teacher')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+        override = override_settings(PROFILING_DIR=self.dir, PROFILING_SAMPLE_RATE=0.0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, user, **kwargs):
+        token = Token.objects.get_or_create(user=user)[0].key
+        return self.client.get(reverse('all-students-details'), HTTP_AUTHORIZATION=f"Token {token}", **kwargs)
+
+    def test_only_staff_can_request_a_profile(self):
+        self.assertNotIn('X-Profile-Id', self.get(self.admin))
+        self.assertNotIn('X-Profile-Id', self.get(self.teacher, HTTP_X_PROFILE='1'))
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('all-students-details'), {'profile': '1'}))
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+        profile_id = self.get(self.admin, HTTP_X_PROFILE='1')['X-Profile-Id']
+        self.assertIn('X-Profile-Id', self.get(self.admin, QUERY_STRING='profile=1'))
+        summary = json.loads((self.dir / f'{profile_id}.json').read_text())
+        self.assertEqual(
+            (summary['view'], summary['user'], summary['status'], summary['method']),
+            ('all-students-details', 'admin', 200, 'GET')
+        )
+        self.assertEqual(summary['query_count'], len(summary['slowest_queries']))
+        self.assertTrue(summary['top_functions'])
+        self.assertTrue(pstats.Stats(str(self.dir / f'{profile_id}.prof')).stats)
+
+    def test_sampled_requests_are_profiled(self):
+        with override_settings(PROFILING_SAMPLE_RATE=0.5), \
+                mock.patch('student_management.profiling.random.random', return_value=0.4):
+            response = self.client.get(reverse('all-students-details'))
+        summary = json.loads((self.dir / f"{response['X-Profile-Id']}.json").read_text())
+        self.assertEqual((summary['status'], summary['user']), (response.status_code, ''))
+        with override_settings(PROFILING_SAMPLE_RATE=0.5), \
+                mock.patch('student_management.profiling.random.random', return_value=0.6):
+            self.assertNotIn('X-Profile-Id', self.client.get(reverse('all-students-details')))
+
+    def test_keeps_the_newest_profiles(self):
+        with override_settings(PROFILING_MAX_STORED=2):
+            ids = [self.get(self.admin, HTTP_X_PROFILE='1')['X-Profile-Id'] for _ in range(3)]
+        self.assertEqual(sorted(path.name for path in self.dir.iterdir()), sorted(
+            f'{profile_id}.{suffix}' for profile_id in ids[1:] for suffix in ('json', 'prof')
+        ))
+
+    def test_admin_views(self):
+        ids = [self.get(self.admin, HTTP_X_PROFILE='1')['X-Profile-Id'] for _ in range(2)]
+        api = APIClient()
+        for name, args in (('profile-list', []), ('profile-detail', [ids[0]]), ('profile-download', [ids[0]])):
+            api.force_authenticate(self.teacher)
+            self.assertEqual(api.get(reverse(name, args=args)).status_code, 403)
+            api.force_authenticate(None)
+            self.assertEqual(api.get(reverse(name, args=args)).status_code, 401)
+        api.force_authenticate(self.admin)
+
+        listed = api.get(reverse('profile-list')).data
+        self.assertEqual([profile['id'] for profile in listed], ids[::-1])
+        self.assertNotIn('top_functions', listed[0])
+        detail = api.get(reverse('profile-detail', args=[ids[0]])).data
+        self.assertEqual((detail['id'], detail['view']), (ids[0], 'all-students-details'))
+        self.assertIn('slowest_queries', detail)
+
+        response = api.get(reverse('profile-download', args=[ids[0]]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'filename="{ids[0]}.prof"', response['Content-Disposition'])
+        self.assertEqual(b''.join(response.streaming_content), (self.dir / f'{ids[0]}.prof').read_bytes())
+        for profile_id in ('20250101000000000000-deadbeef', '..%2Fsecret'):
+            self.assertEqual(api.get(reverse('profile-detail', args=[profile_id])).status_code, 404)
+            self.assertEqual(api.get(reverse('profile-download', args=[profile_id])).status_code, 404)
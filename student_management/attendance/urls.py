@@ -1,9 +1,10 @@
 from django.urls import path
-from . import views, views_auth
+from . import views, views_auth, views_live
 
 urlpatterns = [
     path('students/', views.StudentListCreate.as_view(), name='student-list'),
     path('students/<int:pk>/', views.StudentRetrieveUpdateDestroy.as_view(), name='student-detail'),
+    path('students/search/', views.StudentSearchView.as_view(), name='student-search'),
     path('students/search/<str:roll_number>/', views.StudentSearchByRollNumberView.as_view(), name='student-search-by-roll'),
     path('courses/', views.CourseListCreate.as_view(), name='course-list'),
     path('courses/<int:pk>/', views.CourseRetrieveUpdateDestroy.as_view(), name='course-detail'),
@@ -15,6 +16,12 @@ urlpatterns = [
     path('my-marks/', views.StudentOwnMarksView.as_view(), name='my-marks'),
     path('all-attendance/', views.AllAttendanceView.as_view(), name='all-attendance'),
     path('all-marks/', views.AllMarksView.as_view(), name='all-marks'),
+    path('attendance/live/', views_live.attendance_live_feed, name='attendance-live-feed'),
+    path('analytics/attendance/', views.AttendanceSeriesView.as_view(), name='attendance-series'),
+    path('my-rank/', views.StudentRankView.as_view(), name='my-rank'),
+    path('teacher/courses/<int:course_id>/leaderboard/', views.CourseLeaderboardView.as_view(), name='course-leaderboard'),
+    path('sync/', views.SyncChangesView.as_view(), name='sync-changes'),
+    path('cache-stats/', views.ResponseCacheStatsView.as_view(), name='response-cache-stats'),
     path('login/', views_auth.LoginView.as_view(), name='login'),
     path('logout/', views_auth.LogoutView.as_view(), name='logout'),
     path('students/all-details/', views.AllStudentsDetailsView.as_view(), name='all-students-details'),
@@ -22,5 +29,8 @@ urlpatterns = [
     path('my-data/export-csv/', views.StudentOwnDataCSVExportView.as_view(), name='student-own-data-csv-export'),
     path('teacher/students/export-csv/', views.TeacherStudentDataCSVExportView.as_view(), name='teacher-all-students-data-csv-export'),
     path('teacher/students/export-csv/<str:roll_number>/', views.TeacherStudentDataCSVExportView.as_view(), name='teacher-student-data-csv-export'),
+    path('teacher/students/export-jobs/', views.ExportJobView.as_view(), name='export-jobs'),
+    path('teacher/students/export-jobs/<str:version>/', views.ExportJobDetailView.as_view(), name='export-job-detail'),
+    path('teacher/students/export-jobs/<str:version>/download/', views.ExportJobDownloadView.as_view(), name='export-job-download'),
     path('teacher/manual-student-data/', views.ManualStudentDataEntryView.as_view(), name='manual-student-data-entry'),
 ]
\ No newline at end of file
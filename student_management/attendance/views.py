@@ -2,18 +2,38 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from .authentication import CachedTokenAuthentication, get_request_student
 from .models import Student, Attendance, Marks, Course
-from .serializers import StudentSerializer, AttendanceSerializer, MarksSerializer, CourseSerializer
+from .serializers import (
+    StudentSerializer, AttendanceSerializer, MarksSerializer, CourseSerializer,
+    FastAttendanceSerializer, FastMarksSerializer
+)
 from .permissions import IsTeacher
+from .filters import FilterError, filter_attendance, filter_marks
+from .pagination import RecordCursorPagination
+from .renderers import COLUMNAR_RENDERER_CLASSES, wants_columnar
+from .cache import get_cached_response, cache_stats
+from .conditional import student_data_condition
+from .sync import CursorExpired, get_changes, DEFAULT_LIMIT, MAX_LIMIT
+from .exports import write_student_data_csv
+from . import export_jobs, search
+from .analytics import INTERVALS, GROUPS, attendance_series
+from .rankings import course_standings
+from .imports import UPLOAD_REQUIRED_FIELDS, import_upload
+from student_management.db_router import replica_reads
+from student_management.log_handlers import SAMPLED
 import logging
 from rest_framework.permissions import AllowAny
 from django.contrib.auth import get_user_model
 import csv
 from io import StringIO
+from collections import defaultdict
 from datetime import datetime, date
 from django.db import IntegrityError
 from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -43,141 +63,369 @@ class CourseRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsTeacher]
 
 class AttendanceListCreate(generics.ListCreateAPIView):
-    queryset = Attendance.objects.all()
+    queryset = Attendance.objects.select_related('student', 'subject')
     serializer_class = AttendanceSerializer
     permission_classes = [IsTeacher]
 
 class AttendanceRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Attendance.objects.all()
+    queryset = Attendance.objects.select_related('student', 'subject')
     serializer_class = AttendanceSerializer
     permission_classes = [IsTeacher]
 
 class MarksListCreate(generics.ListCreateAPIView):
-    queryset = Marks.objects.all()
+    queryset = Marks.objects.select_related('student', 'course')
     serializer_class = MarksSerializer
     permission_classes = [IsTeacher]
 
 class MarksRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Marks.objects.all()
+    queryset = Marks.objects.select_related('student', 'course')
     serializer_class = MarksSerializer
     permission_classes = [IsTeacher]
 
 class StudentOwnAttendanceView(APIView):
     permission_classes = [IsAuthenticated]
+    @method_decorator(student_data_condition((Attendance, 'updated_at')))
     def get(self, request):
         try:
-            student = Student.objects.get(user=request.user)
-            attendance = Attendance.objects.filter(student=student)
-            serializer = AttendanceSerializer(attendance, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            student = get_request_student(request)
+            data = get_cached_response('my-attendance', student.pk, lambda: FastAttendanceSerializer(
+                FastAttendanceSerializer.prepare(Attendance.objects.filter(student=student)).iterator()
+            ).data)
+            return Response(data, status=status.HTTP_200_OK)
         except Student.DoesNotExist:
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error in StudentOwnAttendanceView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentOwnAttendanceView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentOwnMarksView(APIView):
     permission_classes = [IsAuthenticated]
+    @method_decorator(student_data_condition((Marks, 'updated_at')))
     def get(self, request):
         try:
-            student = Student.objects.get(user=request.user)
-            marks = Marks.objects.filter(student=student)
-            serializer = MarksSerializer(marks, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            student = get_request_student(request)
+            data = get_cached_response('my-marks', student.pk, lambda: FastMarksSerializer(
+                FastMarksSerializer.prepare(Marks.objects.filter(student=student)).iterator()
+            ).data)
+            return Response(data, status=status.HTTP_200_OK)
         except Student.DoesNotExist:
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error in StudentOwnMarksView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentOwnMarksView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@method_decorator(gzip_page, name='dispatch')
 class AllAttendanceView(APIView):
     permission_classes = [IsTeacher]
+    renderer_classes = COLUMNAR_RENDERER_CLASSES
+    @method_decorator(replica_reads)
     def get(self, request):
         try:
-            logger.info("Fetching all attendance records")
-            attendance = Attendance.objects.all().select_related('student', 'subject')
-            logger.info(f"Found {attendance.count()} attendance records")
-            serializer = AttendanceSerializer(attendance, many=True)
-            logger.info("Serialized attendance data")
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            logger.info("Fetching attendance records", extra=SAMPLED)
+            try:
+                attendance = filter_attendance(Attendance.objects.all(), request.query_params)
+            except FilterError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            paginator = RecordCursorPagination()
+            page = paginator.paginate_queryset(FastAttendanceSerializer.prepare(attendance), request, view=self)
+            serializer = FastAttendanceSerializer(page)
+            data = serializer.columnar_data if wants_columnar(request) else serializer.data
+            logger.info("Serialized %s attendance records", len(page), extra=SAMPLED)
+            return paginator.get_paginated_response(data)
         except Exception as e:
-            logger.error(f"Error in AllAttendanceView: {str(e)}", exc_info=True)
+            logger.error("Error in AllAttendanceView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@method_decorator(gzip_page, name='dispatch')
 class AllMarksView(APIView):
     permission_classes = [IsTeacher]
+    renderer_classes = COLUMNAR_RENDERER_CLASSES
+    @method_decorator(replica_reads)
     def get(self, request):
         try:
-            logger.info("Fetching all marks records")
-            marks = Marks.objects.all().select_related('student', 'course')
-            logger.info(f"Found {marks.count()} marks records")
-            serializer = MarksSerializer(marks, many=True)
-            logger.info("Serialized marks data")
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            logger.info("Fetching marks records", extra=SAMPLED)
+            try:
+                marks = filter_marks(Marks.objects.all(), request.query_params)
+            except FilterError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            paginator = RecordCursorPagination()
+            page = paginator.paginate_queryset(FastMarksSerializer.prepare(marks), request, view=self)
+            serializer = FastMarksSerializer(page)
+            data = serializer.columnar_data if wants_columnar(request) else serializer.data
+            logger.info("Serialized %s marks records", len(page), extra=SAMPLED)
+            return paginator.get_paginated_response(data)
         except Exception as e:
-            logger.error(f"Error in AllMarksView: {str(e)}", exc_info=True)
+            logger.error("Error in AllMarksView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentSearchByRollNumberView(APIView):
     permission_classes = [IsTeacher]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     def get(self, request, roll_number):
         try:
-            logger.info(f"Searching for student with roll_number: {roll_number}")
+            logger.info("Searching for student with roll_number: %s", roll_number, extra=SAMPLED)
             student = Student.objects.get(roll_number=roll_number)
-            student_serializer = StudentSerializer(student)
-            attendance = Attendance.objects.filter(student=student).select_related('subject')
-            marks = Marks.objects.filter(student=student).select_related('course')
-            attendance_serializer = AttendanceSerializer(attendance, many=True)
-            marks_serializer = MarksSerializer(marks, many=True)
-            logger.info(f"Found student: {student.name}")
-            logger.info(f"Student data: {student_serializer.data}")
-            logger.info(f"Attendance data: {attendance_serializer.data}")
-            logger.info(f"Marks data: {marks_serializer.data}")
-            response_data = {
-                "student": student_serializer.data,
-                "attendance": attendance_serializer.data,
-                "marks": marks_serializer.data
-            }
-            logger.info(f"Response data: {response_data}")
+            logger.info("Found student: %s", student.name, extra=SAMPLED)
+            response_data = get_cached_response('student-search', student.pk, lambda: self.build_response(student))
             return Response(response_data, status=status.HTTP_200_OK)
         except Student.DoesNotExist:
-            logger.warning(f"Student with roll_number {roll_number} not found")
+            logger.warning("Student with roll_number %s not found", roll_number)
             return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error in StudentSearchByRollNumberView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentSearchByRollNumberView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def build_response(self, student):
+        student_serializer = StudentSerializer(student)
+        attendance = Attendance.objects.filter(student=student)
+        marks = Marks.objects.filter(student=student)
+        attendance_serializer = FastAttendanceSerializer(FastAttendanceSerializer.prepare(attendance))
+        marks_serializer = FastMarksSerializer(FastMarksSerializer.prepare(marks))
+        response_data = {
+            "student": student_serializer.data,
+            "attendance": attendance_serializer.data,
+            "marks": marks_serializer.data
+        }
+        logger.info("Serialized %s attendance and %s marks records for %s",
+                    len(response_data["attendance"]), len(response_data["marks"]), student.roll_number, extra=SAMPLED)
+        # Payload only at DEBUG; the formatter caps its length
+        logger.debug("Response data: %s", response_data)
+        return response_data
+
+class StudentSearchView(APIView):
+    """Students whose name, username or roll number starts with or contains ``q``.
+
+    Prefix matches come first; substring matches need at least three
+    characters. Answered from the in-memory index in ``attendance.search``.
+    """
+    permission_classes = [IsTeacher]
+    authentication_classes = [CachedTokenAuthentication]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            query = request.query_params.get('q', '').strip()
+            if not query:
+                return Response({"error": "'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+                if limit < 1:
+                    raise ValueError
+            except ValueError:
+                return Response({"error": "'limit' must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(search.search(query, limit), status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error("Error in StudentSearchView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class SyncChangesView(APIView):
+    permission_classes = [IsTeacher]
+    def get(self, request):
+        try:
+            try:
+                limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+                if limit < 1:
+                    raise ValueError
+            except ValueError:
+                return Response({"error": "'limit' must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                changes = get_changes(request.query_params.get('since'), limit)
+            except CursorExpired as e:
+                return Response({"error": str(e), "resync": True}, status=status.HTTP_410_GONE)
+            except FilterError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            logger.info(
+                "Sync returned %s attendance, %s marks and %s deleted records",
+                len(changes['attendance']), len(changes['marks']),
+                len(changes['deleted']['attendance']) + len(changes['deleted']['marks']),
+                extra=SAMPLED
+            )
+            return Response(changes, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error("Error in SyncChangesView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = [IsTeacher]
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
+
+class AttendanceSeriesView(APIView):
+    """Present and total attendance per day, week or month.
+
+    Takes the all-attendance/ filters plus ``interval`` and an optional
+    ``group_by`` of course or student. Students only see their own records.
+    Reads stay on the primary: closed buckets are cached, and a lagging
+    replica would cache stale counts.
+    """
+    permission_classes = [IsAuthenticated]
+    filter_params = ('student', 'roll_number', 'course', 'date_from', 'date_to', 'is_present')
+
+    def get(self, request):
+        try:
+            params = request.query_params.copy()
+            if request.user.role != 'teacher':
+                params['student'] = str(get_request_student(request).pk)
+                params.pop('roll_number', None)
+            interval = params.get('interval') or 'day'
+            if interval not in INTERVALS:
+                return Response({"error": f"'interval' must be one of {', '.join(INTERVALS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            group_by = params.get('group_by') or None
+            if group_by is not None and group_by not in GROUPS:
+                return Response({"error": f"'group_by' must be one of {', '.join(GROUPS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                attendance = filter_attendance(Attendance.objects.all(), params)
+            except FilterError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            cache_key = '&'.join(f"{name}={params[name]}" for name in self.filter_params if params.get(name))
+            buckets = attendance_series(attendance, interval, group_by, cache_key=cache_key)
+            return Response({"interval": interval, "group_by": group_by, "buckets": buckets}, status=status.HTTP_200_OK)
+        except Student.DoesNotExist:
+            return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error("Error in AttendanceSeriesView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class StudentRankView(APIView):
+    """The requesting student's rank and percentile per course and assessment type."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            if request.user.role != 'student':
+                return Response({"error": "Only students can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
+            student = get_request_student(request)
+            course_ids = Marks.objects.filter(student=student).values('course_id')
+            standings = []
+            for course in Course.objects.filter(pk__in=course_ids).order_by('name'):
+                for assessment_type, rows in sorted(course_standings(course.pk).items()):
+                    own = next((row for row in rows if row['student_id'] == student.pk), None)
+                    if own is None:
+                        continue
+                    standings.append({
+                        "course": {"id": course.id, "name": course.name, "code": course.code},
+                        "assessment_type": assessment_type,
+                        "score": own['score'],
+                        "rank": own['rank'],
+                        "out_of": len(rows),
+                        "percentile": own['percentile'],
+                    })
+            return Response(standings, status=status.HTTP_200_OK)
+        except Student.DoesNotExist:
+            return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error("Error in StudentRankView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class CourseLeaderboardView(APIView):
+    """Top and bottom ``limit`` students of a course per assessment type.
+
+    Both lists are in rank order. ``assessment_type`` narrows the result to
+    one type. Reads stay on the primary because the standings are cached.
+    """
+    permission_classes = [IsTeacher]
+    default_limit = 10
+    max_limit = 100
+
+    def get(self, request, course_id):
+        try:
+            try:
+                limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+                if limit < 1:
+                    raise ValueError
+            except ValueError:
+                return Response({"error": "'limit' must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+            course = Course.objects.get(id=course_id)
+            standings = course_standings(course.pk)
+            assessment_type = request.query_params.get('assessment_type')
+            if assessment_type:
+                standings = {assessment_type: standings.get(assessment_type, [])}
+
+            boards = {
+                name: {"students": len(rows), "top": rows[:limit], "bottom": rows[-limit:]}
+                for name, rows in sorted(standings.items())
+            }
+            student_ids = {row['student_id'] for board in boards.values() for row in board['top'] + board['bottom']}
+            students = {
+                pk: {"name": name, "roll_number": roll_number}
+                for pk, name, roll_number in Student.objects.filter(pk__in=student_ids).values_list('pk', 'name', 'roll_number')
+            }
+            for board in boards.values():
+                for side in ('top', 'bottom'):
+                    board[side] = [{**row, **students.get(row['student_id'], {})} for row in board[side]]
+            return Response({
+                "course": {"id": course.id, "name": course.name, "code": course.code},
+                "assessment_types": boards,
+            }, status=status.HTTP_200_OK)
+        except Course.DoesNotExist:
+            logger.warning("Course with id %s not found", course_id)
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error("Error in CourseLeaderboardView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@method_decorator(gzip_page, name='dispatch')
 class AllStudentsDetailsView(APIView):
     permission_classes = [AllowAny]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    renderer_classes = COLUMNAR_RENDERER_CLASSES
+    @method_decorator(replica_reads)
     def get(self, request):
         try:
-            logger.info("Fetching all students with details")
-            students = Student.objects.all().select_related('user')
-            logger.info(f"Found {students.count()} students")
-            response_data = []
-            for student in students:
-                attendance = Attendance.objects.filter(student=student).select_related('subject')
-                marks = Marks.objects.filter(student=student).select_related('course')
-                student_serializer = StudentSerializer(student)
-                attendance_serializer = AttendanceSerializer(attendance, many=True)
-                marks_serializer = MarksSerializer(marks, many=True)
-                student_data = {
-                    "student": student_serializer.data,
-                    "attendance": attendance_serializer.data,
-                    "marks": marks_serializer.data
+            logger.info("Fetching all students with details", extra=SAMPLED)
+            if wants_columnar(request):
+                return Response(self.get_columnar_data(), status=status.HTTP_200_OK)
+            students = list(Student.objects.select_related('user').order_by('pk'))
+            logger.info("Found %s students", len(students), extra=SAMPLED)
+            # One query per table, grouped in memory, instead of two per student.
+            attendance = defaultdict(list)
+            attendance_rows = FastAttendanceSerializer.prepare(Attendance.objects.order_by('student_id', 'id'))
+            for row in FastAttendanceSerializer(attendance_rows.iterator()).data:
+                attendance[row['student']['id']].append(row)
+            marks = defaultdict(list)
+            marks_rows = FastMarksSerializer.prepare(Marks.objects.order_by('student_id', 'id'))
+            for row in FastMarksSerializer(marks_rows.iterator()).data:
+                marks[row['student']['id']].append(row)
+            response_data = [
+                {
+                    "student": StudentSerializer(student).data,
+                    "attendance": attendance[student.pk],
+                    "marks": marks[student.pk]
                 }
-                response_data.append(student_data)
-            logger.info("Serialized all students data")
+                for student in students
+            ]
+            logger.info("Serialized all students data", extra=SAMPLED)
             return Response(response_data, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error in AllStudentsDetailsView: {str(e)}", exc_info=True)
+            logger.error("Error in AllStudentsDetailsView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def get_columnar_data(self):
+        # Students without any records still appear in the dictionary.
+        students = {
+            row['user_id']: {'id': row['user_id'], 'name': row['name'], 'roll_number': row['roll_number']}
+            for row in Student.objects.values('user_id', 'name', 'roll_number')
+        }
+        courses = {}
+        attendance = Attendance.objects.order_by('student_id', 'id')
+        marks = Marks.objects.order_by('student_id', 'id')
+        attendance_serializer = FastAttendanceSerializer(
+            FastAttendanceSerializer.prepare(attendance).iterator(), students, courses
+        )
+        marks_serializer = FastMarksSerializer(FastMarksSerializer.prepare(marks).iterator(), students, courses)
+        return {
+            "students": students,
+            "courses": courses,
+            "attendance": attendance_serializer.get_columns(),
+            "marks": marks_serializer.get_columns()
+        }
+
 class StudentCSVUploadView(APIView):
     permission_classes = [IsTeacher]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     def post(self, request):
         try:
             logger.info("Processing CSV upload")
@@ -190,283 +438,54 @@ class StudentCSVUploadView(APIView):
                 return Response({"error": "File must be a CSV"}, status=status.HTTP_400_BAD_REQUEST)
             file_data = csv_file.read().decode('utf-8')
             csv_data = csv.DictReader(StringIO(file_data))
-            required_fields = ['username', 'roll_number', 'name', 'subject', 'attendance_percentage', 'marks_obtained', 'total_marks', 'date', 'check_in_time']
+            required_fields = UPLOAD_REQUIRED_FIELDS
             if not all(field in csv_data.fieldnames for field in required_fields):
-                logger.error(f"Missing required fields in CSV. Found: {csv_data.fieldnames}")
+                logger.error("Missing required fields in CSV. Found: %s", csv_data.fieldnames)
                 return Response({"error": f"CSV must contain {', '.join(required_fields)}"}, status=status.HTTP_400_BAD_REQUEST)
-            created_users = []
-            updated_students = []
-            created_attendance = []
-            created_marks = []
-            updated_attendance = []
-            updated_marks = []
-            errors = []
-            for row in csv_data:
-                try:
-                    username = row['username'].strip()
-                    roll_number = row['roll_number'].strip()
-                    name = row['name'].strip()
-                    subject_name = row['subject'].strip()
-                    try:
-                        attendance_percentage = float(row['attendance_percentage'])
-                        if not 0 <= attendance_percentage <= 100:
-                            raise ValueError("Attendance percentage must be between 0 and 100")
-                    except ValueError as e:
-                        logger.error(f"Invalid attendance_percentage in row for {username}: {str(e)}")
-                        errors.append(f"Invalid attendance_percentage for {username}: {str(e)}")
-                        continue
-                    try:
-                        marks_obtained = float(row['marks_obtained'])
-                        total_marks = float(row['total_marks'])
-                        if marks_obtained < 0 or total_marks <= 0 or marks_obtained > total_marks:
-                            raise ValueError("Invalid marks: marks_obtained must be non-negative and not exceed total_marks")
-                    except ValueError as e:
-                        logger.error(f"Invalid marks in row for {username}: {str(e)}")
-                        errors.append(f"Invalid marks for {username}: {str(e)}")
-                        continue
-                    try:
-                        date = datetime.strptime(row['date'], '%Y-%m-%d').date()
-                    except ValueError:
-                        logger.error(f"Invalid date format in row for {username}: {row['date']}")
-                        errors.append(f"Invalid date format for {username}: {row['date']}")
-                        continue
-                    try:
-                        check_in_time = datetime.strptime(row['check_in_time'], '%H:%M:%S').time()
-                    except ValueError:
-                        logger.error(f"Invalid check_in_time format in row for {username}: {row['check_in_time']}")
-                        errors.append(f"Invalid check_in_time format for {username}: {row['check_in_time']}")
-                        continue
-                    try:
-                        user = User.objects.get(username=username)
-                        if user.role != 'student':
-                            logger.error(f"User {username} exists but is not a student (role: {user.role})")
-                            errors.append(f"User {username} is not a student (role: {user.role})")
-                            continue
-                        logger.info(f"Found existing user: {username}")
-                    except User.DoesNotExist:
-                        try:
-                            user = User.objects.create(
-                                username=username,
-                                first_name=name.split()[0],
-                                last_name=' '.join(name.split()[1:]) if len(name.split()) > 1 else '',
-                                role='student'
-                            )
-                            user.set_password('password123')
-                            user.save()
-                            created_users.append(username)
-                            logger.info(f"Created user: {username}")
-                        except IntegrityError as e:
-                            logger.error(f"Error creating user {username}: {str(e)}")
-                            errors.append(f"Cannot create user {username}: {str(e)}")
-                            continue
-                    try:
-                        student = Student.objects.get(user=user)
-                        logger.info(f"Found existing student: {roll_number} - {name}")
-                        if student.name != name or student.roll_number != roll_number:
-                            if student.roll_number != roll_number and Student.objects.filter(roll_number=roll_number).exists():
-                                logger.error(f"Roll number {roll_number} already exists for another student")
-                                errors.append(f"Roll number {roll_number} already exists for another student")
-                                continue
-                            student.name = name
-                            student.roll_number = roll_number
-                            student.save()
-                            updated_students.append(roll_number)
-                            logger.info(f"Updated student: {roll_number} - {name}")
-                    except Student.DoesNotExist:
-                        try:
-                            student = Student.objects.create(
-                                user=user,
-                                name=name,
-                                roll_number=roll_number
-                            )
-                            updated_students.append(roll_number)
-                            logger.info(f"Created student: {roll_number} - {name}")
-                        except IntegrityError as e:
-                            logger.error(f"Integrity error creating student {roll_number}: {str(e)}")
-                            errors.append(f"Cannot create student {roll_number}: User already has a student profile")
-                            continue
-                    try:
-                        course, course_created = Course.objects.get_or_create(
-                            name=subject_name,
-                            defaults={'code': subject_name[:10].upper()}
-                        )
-                        if course_created:
-                            logger.info(f"Created course: {subject_name}")
-                    except IntegrityError as e:
-                        logger.error(f"Error creating course {subject_name}: {str(e)}")
-                        errors.append(f"Cannot create course {subject_name}: {str(e)}")
-                        continue
-                    is_present = attendance_percentage >= 75
-                    try:
-                        attendance, attendance_created = Attendance.objects.get_or_create(
-                            student=student,
-                            subject=course,
-                            date=date,
-                            defaults={
-                                'is_present': is_present,
-                                'checkin_time': check_in_time
-                            }
-                        )
-                        if attendance_created:
-                            created_attendance.append(f"{roll_number} - {subject_name}")
-                            logger.info(f"Created attendance for {roll_number} in {subject_name}")
-                        else:
-                            attendance.is_present = is_present
-                            attendance.checkin_time = check_in_time
-                            attendance.save()
-                            updated_attendance.append(f"{roll_number} - {subject_name}")
-                            logger.info(f"Updated attendance for {roll_number} in {subject_name}")
-                    except IntegrityError as e:
-                        logger.error(f"Error processing attendance for {roll_number} in {subject_name}: {str(e)}")
-                        errors.append(f"Cannot process attendance for {roll_number} in {subject_name}: {str(e)}")
-                        continue
-                    try:
-                        marks, marks_created = Marks.objects.get_or_create(
-                            student=student,
-                            course=course,
-                            assessment_type='quiz',
-                            assessment_number=1,
-                            date=date,
-                            defaults={
-                                'marks': marks_obtained,
-                                'max_marks': total_marks
-                            }
-                        )
-                        if marks_created:
-                            created_marks.append(f"{roll_number} - {subject_name}")
-                            logger.info(f"Created marks for {roll_number} in {subject_name}")
-                        else:
-                            marks.marks = marks_obtained
-                            marks.max_marks = total_marks
-                            marks.save()
-                            updated_marks.append(f"{roll_number} - {subject_name}")
-                            logger.info(f"Updated marks for {roll_number} in {subject_name}")
-                    except IntegrityError as e:
-                        logger.error(f"Error processing marks for {roll_number} in {subject_name}: {str(e)}")
-                        errors.append(f"Cannot process marks for {roll_number} in {subject_name}: {str(e)}")
-                        continue
-                except Exception as e:
-                    logger.error(f"Error processing row for {username}: {str(e)}")
-                    errors.append(f"Error processing row for {username}: {str(e)}")
-                    continue
+            result = import_upload(csv_data)
             logger.info("CSV processing completed")
-            if errors:
-                return Response({
-                    "message": "CSV processed with errors",
-                    "created_users": created_users,
-                    "updated_students": updated_students,
-                    "created_attendance": created_attendance,
-                    "updated_attendance": updated_attendance,
-                    "created_marks": created_marks,
-                    "updated_marks": updated_marks,
-                    "errors": errors
-                }, status=status.HTTP_207_MULTI_STATUS)
-            return Response({
-                "message": "CSV processed successfully",
-                "created_users": created_users,
-                "updated_students": updated_students,
-                "created_attendance": created_attendance,
-                "updated_attendance": updated_attendance,
-                "created_marks": created_marks,
-                "updated_marks": updated_marks
-            }, status=status.HTTP_201_CREATED)
+            if result["errors"]:
+                return Response({"message": "CSV processed with errors", **result}, status=status.HTTP_207_MULTI_STATUS)
+            del result["errors"]
+            return Response({"message": "CSV processed successfully", **result}, status=status.HTTP_201_CREATED)
         except Exception as e:
-            logger.error(f"Error in StudentCSVUploadView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentCSVUploadView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentOwnDataCSVExportView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def get(self, request):
         try:
-            logger.info(f"Generating CSV export for user: {request.user.username}")
-            student = Student.objects.get(user=request.user)
+            logger.info("Generating CSV export for user: %s", request.user.username)
+            student = get_request_student(request)
             if request.user.role != 'student':
-                logger.warning(f"User {request.user.username} is not a student (role: {request.user.role})")
+                logger.warning("User %s is not a student (role: %s)", request.user.username, request.user.role)
                 return Response({"error": "Only students can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
 
             response = HttpResponse(content_type='text/csv')
             response['Content-Disposition'] = f'attachment; filename="{student.roll_number}_data.csv"'
 
-            writer = csv.writer(response)
-            writer.writerow([
-                'username', 'first_name', 'last_name', 'roll_number', 'name',
-                'subject', 'attendance_date', 'is_present', 'checkin_time', 'attendance_percentage',
-                'marks_course', 'assessment_type', 'assessment_number', 'marks', 'max_marks', 'marks_date'
-            ])
-
-            attendance_records = Attendance.objects.filter(student=student).select_related('subject')
-            marks_records = Marks.objects.filter(student=student).select_related('course')
-
-            total_attendance = attendance_records.count()
-            present_count = attendance_records.filter(is_present=True).count()
-            attendance_percentage = round((present_count / total_attendance) * 100, 2) if total_attendance > 0 else 0.0
-
-            logger.info(f"Fetched {len(attendance_records)} attendance records and {len(marks_records)} marks records for {student.roll_number}")
-
-            if not attendance_records and not marks_records:
-                writer.writerow([
-                    student.user.username,
-                    student.user.first_name,
-                    student.user.last_name,
-                    student.roll_number,
-                    student.name,
-                    '', '', '', '', attendance_percentage,
-                    '', '', '', '', ''
-                ])
-            else:
-                max_records = max(len(attendance_records), len(marks_records))
-                for i in range(max_records):
-                    row = [
-                        student.user.username,
-                        student.user.first_name,
-                        student.user.last_name,
-                        student.roll_number,
-                        student.name
-                    ]
-                    if i < len(attendance_records):
-                        att = attendance_records[i]
-                        checkin_time = att.checkin_time.strftime('%H:%M:%S') if att.checkin_time else ''
-                        row.extend([
-                            att.subject.name,
-                            att.date.strftime('%Y-%m-%d'),
-                            '1' if att.is_present else '0',
-                            checkin_time,
-                            attendance_percentage
-                        ])
-                    else:
-                        row.extend(['', '', '', '', attendance_percentage])
-                    if i < len(marks_records):
-                        mark = marks_records[i]
-                        row.extend([
-                            mark.course.name,
-                            mark.assessment_type,
-                            mark.assessment_number,
-                            mark.marks,
-                            mark.max_marks,
-                            mark.date.strftime('%Y-%m-%d')
-                        ])
-                    else:
-                        row.extend(['', '', '', '', ''])
-                    writer.writerow(row)
-
-            logger.info(f"CSV export generated successfully for {student.roll_number}")
+            write_student_data_csv(response, student)
+
+            logger.info("CSV export generated successfully for %s", student.roll_number)
             return response
         except Student.DoesNotExist:
-            logger.warning(f"Student profile not found for user: {request.user.username}")
+            logger.warning("Student profile not found for user: %s", request.user.username)
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error in StudentOwnDataCSVExportView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentOwnDataCSVExportView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class TeacherStudentDataCSVExportView(APIView):
     permission_classes = [IsTeacher]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
+    @method_decorator(replica_reads)
     def get(self, request, roll_number=None):
         try:
-            logger.info(f"Generating CSV export for teacher: {request.user.username}, roll_number: {roll_number}")
+            logger.info("Generating CSV export for teacher: %s, roll_number: %s", request.user.username, roll_number)
             
             response = HttpResponse(content_type='text/csv')
             if roll_number:
@@ -474,90 +493,80 @@ class TeacherStudentDataCSVExportView(APIView):
             else:
                 response['Content-Disposition'] = 'attachment; filename="all_students_data.csv"'
 
-            writer = csv.writer(response)
-            writer.writerow([
-                'username', 'first_name', 'last_name', 'roll_number', 'name',
-                'subject', 'attendance_date', 'is_present', 'checkin_time', 'attendance_percentage',
-                'marks_course', 'assessment_type', 'assessment_number', 'marks', 'max_marks', 'marks_date'
-            ])
-
+            student = None
             if roll_number:
                 try:
                     student = Student.objects.get(roll_number=roll_number)
-                    students = [student]
                 except Student.DoesNotExist:
-                    logger.warning(f"Student with roll_number {roll_number} not found")
+                    logger.warning("Student with roll_number %s not found", roll_number)
                     return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                students = Student.objects.all().select_related('user')
-
-            logger.info(f"Exporting data for {len(students)} student(s)")
-
-            for student in students:
-                attendance_records = Attendance.objects.filter(student=student).select_related('subject')
-                marks_records = Marks.objects.filter(student=student).select_related('course')
-
-                total_attendance = attendance_records.count()
-                present_count = attendance_records.filter(is_present=True).count()
-                attendance_percentage = round((present_count / total_attendance) * 100, 2) if total_attendance > 0 else 0.0
-
-                logger.info(f"Fetched {len(attendance_records)} attendance records and {len(marks_records)} marks records for {student.roll_number}")
-
-                if not attendance_records and not marks_records:
-                    writer.writerow([
-                        student.user.username,
-                        student.user.first_name,
-                        student.user.last_name,
-                        student.roll_number,
-                        student.name,
-                        '', '', '', '', attendance_percentage,
-                        '', '', '', '', ''
-                    ])
-                else:
-                    max_records = max(len(attendance_records), len(marks_records))
-                    for i in range(max_records):
-                        row = [
-                            student.user.username,
-                            student.user.first_name,
-                            student.user.last_name,
-                            student.roll_number,
-                            student.name
-                        ]
-                        if i < len(attendance_records):
-                            att = attendance_records[i]
-                            checkin_time = att.checkin_time.strftime('%H:%M:%S') if att.checkin_time else ''
-                            row.extend([
-                                att.subject.name,
-                                att.date.strftime('%Y-%m-%d'),
-                                '1' if att.is_present else '0',
-                                checkin_time,
-                                attendance_percentage
-                            ])
-                        else:
-                            row.extend(['', '', '', '', attendance_percentage])
-                        if i < len(marks_records):
-                            mark = marks_records[i]
-                            row.extend([
-                                mark.course.name,
-                                mark.assessment_type,
-                                mark.assessment_number,
-                                mark.marks,
-                                mark.max_marks,
-                                mark.date.strftime('%Y-%m-%d')
-                            ])
-                        else:
-                            row.extend(['', '', '', '', ''])
-                        writer.writerow(row)
-
-            logger.info(f"CSV export generated successfully for {'all students' if not roll_number else roll_number}")
+
+            student_count = write_student_data_csv(response, student)
+            logger.info("Exported data for %s student(s)", student_count)
+
+            logger.info("CSV export generated successfully for %s", 'all students' if not roll_number else roll_number)
             return response
         except Exception as e:
-            logger.error(f"Error in TeacherStudentDataCSVExportView: {str(e)}", exc_info=True)
+            logger.error("Error in TeacherStudentDataCSVExportView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ExportJobView(APIView):
+    """Starts the all-students export of the current data unless it is stored already.
+
+    Answers 200 when the export can be downloaded and 202 while it is being
+    written; poll the job until its status is ready.
+    """
+    permission_classes = [IsTeacher]
+
+    def post(self, request):
+        try:
+            version, job_status = export_jobs.start_export()
+            return Response(self.job(version, job_status),
+                            status=status.HTTP_200_OK if job_status == export_jobs.READY else status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            logger.error("Error in ExportJobView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def job(version, job_status):
+        return {
+            "id": version,
+            "status": job_status,
+            "url": reverse('export-job-detail', args=[version]),
+            "download_url": reverse('export-job-download', args=[version]),
+        }
+
+class ExportJobDetailView(APIView):
+    permission_classes = [IsTeacher]
+
+    def get(self, request, version):
+        job_status = export_jobs.job_status(version)
+        if job_status is None:
+            return Response({"error": "Export not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ExportJobView.job(version, job_status), status=status.HTTP_200_OK)
+
+class ExportJobDownloadView(APIView):
+    """The gzip-compressed CSV of a finished export; supports ``Range`` requests."""
+    permission_classes = [IsTeacher]
+
+    def get(self, request, version):
+        try:
+            job_status = export_jobs.job_status(version)
+            if job_status is None:
+                return Response({"error": "Export not found"}, status=status.HTTP_404_NOT_FOUND)
+            if job_status != export_jobs.READY:
+                return Response({"error": f"Export is {job_status}"}, status=status.HTTP_409_CONFLICT)
+            return export_jobs.export_response(request, version)
+        except FileNotFoundError:
+            # Pruned after a newer export was written.
+            return Response({"error": "Export not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error("Error in ExportJobDownloadView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class ManualStudentDataEntryView(APIView):
     permission_classes = [IsTeacher]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def post(self, request):
         try:
@@ -575,7 +584,7 @@ class ManualStudentDataEntryView(APIView):
             required_fields = ['roll_number', 'name', 'marks', 'attendance_percentage', 'assignment_submission']
             missing_fields = [field for field in required_fields if not data.get(field)]
             if missing_fields:
-                logger.error(f"Missing required fields: {missing_fields}")
+                logger.error("Missing required fields: %s", missing_fields)
                 return Response({"error": f"Missing required fields: {', '.join(missing_fields)}"}, status=status.HTTP_400_BAD_REQUEST)
 
             # Validate numeric fields
@@ -584,7 +593,7 @@ class ManualStudentDataEntryView(APIView):
                 if marks < 0 or marks > 100:
                     raise ValueError("Marks must be between 0 and 100")
             except (ValueError, TypeError) as e:
-                logger.error(f"Invalid marks: {marks}")
+                logger.error("Invalid marks: %s", marks)
                 return Response({"error": "Marks must be a number between 0 and 100"}, status=status.HTTP_400_BAD_REQUEST)
 
             try:
@@ -592,7 +601,7 @@ class ManualStudentDataEntryView(APIView):
                 if not 0 <= attendance_percentage <= 100:
                     raise ValueError("Attendance percentage must be between 0 and 100")
             except (ValueError, TypeError) as e:
-                logger.error(f"Invalid attendance_percentage: {attendance_percentage}")
+                logger.error("Invalid attendance_percentage: %s", attendance_percentage)
                 return Response({"error": "Attendance percentage must be a number between 0 and 100"}, status=status.HTTP_400_BAD_REQUEST)
 
             try:
@@ -600,7 +609,7 @@ class ManualStudentDataEntryView(APIView):
                 if not 0 <= assignment_submission <= 100:
                     raise ValueError("Assignment submission rate must be between 0 and 100")
             except (ValueError, TypeError) as e:
-                logger.error(f"Invalid assignment_submission: {assignment_submission}")
+                logger.error("Invalid assignment_submission: %s", assignment_submission)
                 return Response({"error": "Assignment submission rate must be a number between 0 and 100"}, status=status.HTTP_400_BAD_REQUEST)
 
             # Clean name and roll_number
@@ -614,19 +623,19 @@ class ManualStudentDataEntryView(APIView):
             username = f"student_{roll_number.lower()}"
             try:
                 user = User.objects.get(username=username)
-                logger.info(f"Found existing user: {username}")
+                logger.info("Found existing user: %s", username)
                 # Check if the user already has a student profile
                 try:
                     student = Student.objects.get(user=user)
-                    logger.info(f"User {username} already has a student profile: {student.roll_number} - {student.name}")
+                    logger.info("User %s already has a student profile: %s - %s", username, student.roll_number, student.name)
                     # Update existing student if roll_number or name differs
                     if student.roll_number != roll_number or student.name != name:
                         student.roll_number = roll_number
                         student.name = name
                         student.save()
-                        logger.info(f"Updated student: {roll_number} - {name}")
+                        logger.info("Updated student: %s - %s", roll_number, name)
                 except Student.DoesNotExist:
-                    logger.error(f"User {username} exists but has no student profile")
+                    logger.error("User %s exists but has no student profile", username)
                     return Response({"error": f"User {username} exists but has no student profile"}, status=status.HTTP_400_BAD_REQUEST)
             except User.DoesNotExist:
                 # Create a new user
@@ -639,18 +648,18 @@ class ManualStudentDataEntryView(APIView):
                     )
                     user.set_password('password123')  # Default password
                     user.save()
-                    logger.info(f"Created user: {username}")
+                    logger.info("Created user: %s", username)
                     # The create_student_profile signal will create the Student record
                 except IntegrityError as e:
-                    logger.error(f"Error creating user {username}: {str(e)}")
+                    logger.error("Error creating user %s: %s", username, e)
                     return Response({"error": f"Cannot create user {username}: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
             # Retrieve or wait for the Student to be created by the signal
             try:
                 student = Student.objects.get(user=user)
-                logger.info(f"Retrieved student: {student.roll_number} - {student.name}")
+                logger.info("Retrieved student: %s - %s", student.roll_number, student.name)
             except Student.DoesNotExist:
-                logger.error(f"Student profile not created for user {username}")
+                logger.error("Student profile not created for user %s", username)
                 return Response({"error": f"Student profile not created for user {username}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Create or get a default course
@@ -661,15 +670,15 @@ class ManualStudentDataEntryView(APIView):
                     defaults={'code': course_name[:10].upper()}
                 )
                 if created:
-                    logger.info(f"Created course: {course_name}")
+                    logger.info("Created course: %s", course_name)
             except IntegrityError as e:
-                logger.error(f"Error creating course {course_name}: {str(e)}")
+                logger.error("Error creating course %s: %s", course_name, e)
                 return Response({"error": f"Cannot create course {course_name}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Save attendance
             is_present = attendance_percentage >= 75
             try:
-                logger.info(f"Attempting to create attendance for student: {student.user_id} - {student.roll_number} - {student.name}")
+                logger.info("Attempting to create attendance for student: %s - %s - %s", student.user_id, student.roll_number, student.name)
                 attendance, created = Attendance.objects.get_or_create(
                     student=student,
                     subject=course,
@@ -683,11 +692,11 @@ class ManualStudentDataEntryView(APIView):
                     attendance.is_present = is_present
                     attendance.checkin_time = datetime.now().time()
                     attendance.save()
-                    logger.info(f"Updated attendance for {roll_number} in {course_name}")
+                    logger.info("Updated attendance for %s in %s", roll_number, course_name)
                 else:
-                    logger.info(f"Created attendance for {roll_number} in {course_name}")
+                    logger.info("Created attendance for %s in %s", roll_number, course_name)
             except IntegrityError as e:
-                logger.error(f"Error saving attendance for {roll_number}: {str(e)}")
+                logger.error("Error saving attendance for %s: %s", roll_number, e)
                 return Response({"error": f"Cannot save attendance for {roll_number}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Save marks (quiz)
@@ -707,11 +716,11 @@ class ManualStudentDataEntryView(APIView):
                     marks_record.marks = marks
                     marks_record.max_marks = 100
                     marks_record.save()
-                    logger.info(f"Updated marks (quiz) for {roll_number} in {course_name}")
+                    logger.info("Updated marks (quiz) for %s in %s", roll_number, course_name)
                 else:
-                    logger.info(f"Created marks (quiz) for {roll_number} in {course_name}")
+                    logger.info("Created marks (quiz) for %s in %s", roll_number, course_name)
             except IntegrityError as e:
-                logger.error(f"Error saving marks (quiz) for {roll_number}: {str(e)}")
+                logger.error("Error saving marks (quiz) for %s: %s", roll_number, e)
                 return Response({"error": f"Cannot save marks for {roll_number}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Save assignment submission as a separate marks entry
@@ -731,11 +740,11 @@ class ManualStudentDataEntryView(APIView):
                     assignment_record.marks = assignment_submission
                     assignment_record.max_marks = 100
                     assignment_record.save()
-                    logger.info(f"Updated marks (assignment) for {roll_number} in {course_name}")
+                    logger.info("Updated marks (assignment) for %s in %s", roll_number, course_name)
                 else:
-                    logger.info(f"Created marks (assignment) for {roll_number} in {course_name}")
+                    logger.info("Created marks (assignment) for %s in %s", roll_number, course_name)
             except IntegrityError as e:
-                logger.error(f"Error saving assignment submission for {roll_number}: {str(e)}")
+                logger.error("Error saving assignment submission for %s: %s", roll_number, e)
                 return Response({"error": f"Cannot save assignment submission for {roll_number}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Prepare response
@@ -749,9 +758,9 @@ class ManualStudentDataEntryView(APIView):
                     "assignment_submission": assignment_submission
                 }
             }
-            logger.info(f"Manual data entry completed for {roll_number}")
+            logger.info("Manual data entry completed for %s", roll_number)
             return Response(response_data, status=status.HTTP_201_CREATED)
 
         except Exception as e:
-            logger.error(f"Error in ManualStudentDataEntryView: {str(e)}", exc_info=True)
+            logger.error("Error in ManualStudentDataEntryView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
@@ -27,6 +27,7 @@ class LoginView(APIView):
 class LogoutView(APIView):
     def post(self, request):
         if request.user.is_authenticated:
+            # The Token post_delete receiver drops the cached keys.
             Token.objects.filter(user=request.user).delete()
             return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
         return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
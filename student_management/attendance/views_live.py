@@ -0,0 +1,57 @@
+import logging
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from . import live
+from .authentication import token_required
+from .filters import FilterError, date_param, int_param
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+
+def release_connections():
+    # A feed stays open for the whole class; don't hold a database
+    # connection for it.
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+@require_GET
+@token_required
+async def attendance_live_feed(request):
+    """Server-sent events with attendance rows of one course and date as they are written.
+
+    ``course`` is required and ``date`` defaults to today. Events are
+    ``attendance`` (a row as in all-attendance/), ``attendance-deleted``
+    (``{"id": ...}``) and ``reset`` (reload, then reconnect).
+    """
+    if request.user.role != 'teacher':
+        return JsonResponse({'error': 'Only teachers can access this endpoint.'}, status=status.HTTP_403_FORBIDDEN)
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream in memory.
+        return JsonResponse({'error': 'The live feed is only served under ASGI'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+    try:
+        course_id = int_param(request.GET, 'course')
+        if course_id is None:
+            raise FilterError("'course' is required")
+        date = date_param(request.GET, 'date') or timezone.localdate()
+    except FilterError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not await Course.objects.filter(pk=course_id).aexists():
+        return JsonResponse({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+    await sync_to_async(release_connections)()
+
+    logger.info("Live feed opened for course %s on %s", course_id, date)
+    response = StreamingHttpResponse(live.stream(live.feed_key(course_id, date)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,11 @@
 from django.contrib import admin
+from attendance.admin import LargeTableAdmin
+from .models import StudentRisk
 
-# Register your models here.
+
+@admin.register(StudentRisk)
+class StudentRiskAdmin(LargeTableAdmin):
+    list_display = ('student', 'risk_level', 'confidence', 'last_updated')
+    list_select_related = ('student',)
+    list_filter = ('risk_level',)
+    raw_id_fields = ('student',)
@@ -0,0 +1,313 @@
+"""Admission control for the views that call the risk model.
+
+Two layers keep one client, or a burst of them, from tying up the workers
+and the model's quota:
+
+- Token buckets per user (per IP address for anonymous requests), kept in
+  the cache. A bucket holds ``RISK_THROTTLE_BURST`` requests and refills at
+  ``RISK_THROTTLE_RATE``; an empty one answers 429. Taking a token holds a
+  file lock on the bucket, so concurrent requests on the host can't both
+  read a bucket before either writes it back. A 304 gives its token back.
+- A semaphore of ``RISK_PREDICTOR_CONCURRENCY`` slots on outbound
+  predictions, shared by every worker process on the host through locked
+  slot files. Up to ``RISK_PREDICTOR_QUEUE_SIZE`` requests wait for a slot
+  for at most ``RISK_PREDICTOR_QUEUE_TIMEOUT`` seconds; beyond that they are
+  shed with a 503. A slot held by a process that dies is released by the
+  operating system.
+
+Both answers carry ``Retry-After``.
+"""
+import asyncio
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from functools import wraps
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+from student_management import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: slots are shared within one process only.
+    fcntl = None
+
+BUCKET_KEY = 'risk-throttle:{}'
+# Buckets share this many lock files, so their number stays fixed.
+BUCKET_LOCKS = 64
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+POLL_SECONDS = 0.02
+
+
+class PredictorBusy(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_rate(rate):
+    """Tokens per second from ``'<count>/<period>'``; None disables throttling."""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count) / PERIODS[period[0]]
+
+
+def request_ident(request, user):
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    # DRF's client address, honouring NUM_PROXIES.
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+def _take(bucket, now, rate, burst):
+    """The bucket after taking a token, and the seconds to wait if it was empty."""
+    tokens, updated = bucket if bucket is not None else (burst, now)
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (tokens, now), (1 - tokens) / rate
+    return (tokens - 1, now), 0
+
+
+def _bucket_settings():
+    return parse_rate(getattr(settings, 'RISK_THROTTLE_RATE', '12/min')), getattr(settings, 'RISK_THROTTLE_BURST', 10)
+
+
+def throttle_wait(ident):
+    """Take a token for ``ident``; the seconds until one is available, or 0."""
+    rate, burst = _bucket_settings()
+    if rate is None:
+        return 0
+    key = BUCKET_KEY.format(ident)
+    with _get_bucket_locks().hold(ident):
+        bucket, wait = _take(cache.get(key), time.time(), rate, burst)
+        # An untouched bucket is full again after burst / rate seconds.
+        cache.set(key, bucket, timeout=math.ceil(burst / rate))
+    if wait:
+        metrics.inc('predictor_admission_total', {'outcome': 'throttled'})
+    return wait
+
+
+async def athrottle_wait(ident):
+    """``throttle_wait`` for async views; the bucket lock is waited for in a thread."""
+    return await sync_to_async(throttle_wait, thread_sensitive=False)(ident)
+
+
+def refund_token(ident):
+    """Put back the token ``throttle_wait`` took for ``ident``."""
+    rate, burst = _bucket_settings()
+    if rate is None:
+        return
+    key = BUCKET_KEY.format(ident)
+    with _get_bucket_locks().hold(ident):
+        bucket = cache.get(key)
+        if bucket is not None:
+            tokens, updated = bucket
+            cache.set(key, (min(burst, tokens + 1), updated), timeout=math.ceil(burst / rate))
+
+
+def refund_not_modified(view):
+    """Refund the throttle token of requests ``view`` answers with 304.
+
+    The conditional check runs in the view, after the throttle, but a 304
+    never reaches the model, so revalidating clients keep their allowance.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_inner(request, *args, **kwargs):
+            response = await view(request, *args, **kwargs)
+            if response.status_code == 304:
+                await sync_to_async(refund_token, thread_sensitive=False)(request_ident(request, request.user))
+            return response
+        return async_inner
+
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code == 304:
+            refund_token(request_ident(request, request.user))
+        return response
+    return inner
+
+
+class RiskRateThrottle(BaseThrottle):
+    """Token-bucket throttle for the DRF risk views."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = throttle_wait(request_ident(request, request.user))
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class _FileSlots:
+    """Slots held by exclusive locks on ``count`` files in ``directory``."""
+
+    def __init__(self, directory, name, count):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.paths = [directory / f'{name}-{i}.lock' for i in range(count)]
+
+    def try_acquire(self):
+        # Start at a random slot so waiters don't all probe the same files.
+        offset = random.randrange(len(self.paths)) if self.paths else 0
+        for i in range(len(self.paths)):
+            fd = os.open(self.paths[(offset + i) % len(self.paths)], os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, fd):
+        # Closing the descriptor drops its lock.
+        os.close(fd)
+
+
+class _LocalSlots:
+
+    def __init__(self, count):
+        self.lock = threading.Lock()
+        self.free = count
+
+    def try_acquire(self):
+        with self.lock:
+            if self.free <= 0:
+                return None
+            self.free -= 1
+            return True
+
+    def release(self, slot):
+        with self.lock:
+            self.free += 1
+
+
+class _FileBucketLocks:
+    """Exclusive locks on token buckets, shared by the processes on the host."""
+
+    def __init__(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+
+    @contextmanager
+    def hold(self, ident):
+        # crc32 rather than hash(): every process has to pick the same file.
+        path = self.directory / f'bucket-{zlib.crc32(ident.encode()) % BUCKET_LOCKS}.lock'
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+
+class _LocalBucketLocks:
+
+    def __init__(self):
+        self.locks = [threading.Lock() for _ in range(BUCKET_LOCKS)]
+
+    @contextmanager
+    def hold(self, ident):
+        with self.locks[zlib.crc32(ident.encode()) % BUCKET_LOCKS]:
+            yield
+
+
+_slots = {}
+_slots_lock = threading.Lock()
+
+
+def _slots_dir():
+    return Path(getattr(settings, 'RISK_PREDICTOR_SLOTS_DIR',
+                        Path(tempfile.gettempdir()) / 'student_management_predictor_slots'))
+
+
+def _get_slots(name, count):
+    directory = _slots_dir()
+    key = (name, count, directory)
+    with _slots_lock:
+        if key not in _slots:
+            _slots[key] = _FileSlots(directory, name, count) if fcntl is not None else _LocalSlots(count)
+        return _slots[key]
+
+
+def _get_bucket_locks():
+    directory = _slots_dir()
+    key = ('buckets', directory)
+    with _slots_lock:
+        if key not in _slots:
+            _slots[key] = _FileBucketLocks(directory) if fcntl is not None else _LocalBucketLocks()
+        return _slots[key]
+
+
+class _Admission:
+    """One request's way to a predictor slot."""
+
+    def __init__(self):
+        self.slots = _get_slots('predict', getattr(settings, 'RISK_PREDICTOR_CONCURRENCY', 8))
+        self.queue = _get_slots('queue', getattr(settings, 'RISK_PREDICTOR_QUEUE_SIZE', 16))
+        self.timeout = getattr(settings, 'RISK_PREDICTOR_QUEUE_TIMEOUT', 10.0)
+        self.retry_after = getattr(settings, 'RISK_PREDICTOR_RETRY_AFTER', 5)
+        self.queued = None
+
+    def enqueue(self):
+        self.queued = self.queue.try_acquire()
+        if self.queued is None:
+            metrics.inc('predictor_admission_total', {'outcome': 'shed'})
+            raise PredictorBusy("The risk model is busy; try again later", self.retry_after)
+        self.deadline = time.monotonic() + self.timeout
+
+    def check_deadline(self):
+        if time.monotonic() >= self.deadline:
+            metrics.inc('predictor_admission_total', {'outcome': 'timeout'})
+            raise PredictorBusy("Timed out waiting for the risk model; try again later", self.retry_after)
+
+    def leave_queue(self):
+        if self.queued is not None:
+            self.queue.release(self.queued)
+            self.queued = None
+
+
+@contextmanager
+def predictor_slot():
+    """Hold one of the shared predictor slots, waiting in the bounded queue if needed."""
+    admission = _Admission()
+    slot = admission.slots.try_acquire()
+    try:
+        if slot is None:
+            admission.enqueue()
+            while (slot := admission.slots.try_acquire()) is None:
+                admission.check_deadline()
+                time.sleep(POLL_SECONDS)
+    finally:
+        admission.leave_queue()
+    try:
+        yield
+    finally:
+        admission.slots.release(slot)
+
+
+@asynccontextmanager
+async def apredictor_slot():
+    """``predictor_slot`` that waits without blocking the event loop."""
+    admission = _Admission()
+    slot = admission.slots.try_acquire()
+    try:
+        if slot is None:
+            admission.enqueue()
+            while (slot := admission.slots.try_acquire()) is None:
+                admission.check_deadline()
+                await asyncio.sleep(POLL_SECONDS)
+    finally:
+        admission.leave_queue()
+    try:
+        yield
+    finally:
+        admission.slots.release(slot)
@@ -0,0 +1,242 @@
+"""Async versions of the risk endpoints, served under ``/api/async/``.
+
+They return the same JSON as the views in ``views.py`` but load features
+with the async ORM and call the predictor with an asyncio HTTP client, so
+under ASGI a request waiting on the model holds no worker thread.
+"""
+import json
+import logging
+from functools import wraps
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework.utils.encoders import JSONEncoder
+from attendance.authentication import aauthenticate, token_required, unauthorized
+from attendance.models import Student, Course, Enrollment
+from .features import astudent_risk_features, prediction_payload, rounded_features
+from .models import StudentRisk
+from .admission import PredictorBusy, athrottle_wait, request_ident
+from .predictor import arequest_prediction
+from .views import student_risk_condition
+
+logger = logging.getLogger(__name__)
+
+STUDENTS_ONLY = 'Unauthorized access. Only students can access this endpoint.'
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    # DRF's encoder formats datetimes and decimals like the sync views.
+    return JsonResponse(data, status=status, encoder=JSONEncoder)
+
+
+def rate_limited(view):
+    """The token-bucket throttle of the sync risk views, with DRF's 429 body."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        # Like DRF, a sent token is authenticated before throttling so the
+        # bucket is the user's; token_required may already have done it. The
+        # middleware's lazy session user would need a sync lookup.
+        user = request.user if hasattr(request, 'student') else None
+        if user is None:
+            try:
+                user = await aauthenticate(request)
+            except AuthenticationFailed as e:
+                return unauthorized(e.detail)
+        wait = await athrottle_wait(request_ident(request, user))
+        if wait:
+            throttled = Throttled(wait)
+            response = json_response({"detail": throttled.detail}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(throttled.wait)
+            return response
+        return await view(request, *args, **kwargs)
+    return inner
+
+
+async def predict(payload):
+    """The predictor's (risk_level, predicted_grade), or an error response."""
+    try:
+        response = await arequest_prediction(payload)
+    except PredictorBusy as e:
+        error = json_response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        error['Retry-After'] = str(e.retry_after)
+        return None, error
+    if response.status_code != 200:
+        return None, json_response({
+            "error": "Failed to get prediction from Hugging Face Space API",
+            "details": response.text
+        }, status=status.HTTP_400_BAD_REQUEST)
+    prediction = response.json()
+    return (prediction.get('risk_level', 'Unknown'), prediction.get('predicted_grade', 0.0)), None
+
+
+async def store_risk(student, risk_level, predicted_grade):
+    await StudentRisk.objects.aupdate_or_create(
+        student=student,
+        defaults={
+            'risk_level': risk_level,
+            'confidence': predicted_grade,
+            'last_updated': timezone.now()
+        }
+    )
+
+
+def risk_body(student, risk_level, predicted_grade, **fields):
+    return {
+        "student_id": student.user.id,
+        "username": student.user.username,
+        "name": student.name,
+        **fields,
+        "risk_prediction": {
+            "risk_level": risk_level,
+            "predicted_grade": predicted_grade,
+            "last_updated": timezone.now()
+        }
+    }
+
+
+async def student_risk(student):
+    features = await astudent_risk_features(student)
+    prediction, error = await predict(prediction_payload(features))
+    if error:
+        return error
+    await store_risk(student, *prediction)
+    return json_response(risk_body(student, *prediction, **rounded_features(features)))
+
+
+@require_GET
+@rate_limited
+async def teacher_risk_analysis(request, username):
+    try:
+        student = await Student.objects.select_related('user').aget(name=username)
+        return await student_risk(student)
+    except Student.DoesNotExist:
+        return json_response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error("Error in teacher_risk_analysis: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+@token_required
+@rate_limited
+@student_risk_condition
+async def student_risk_analysis(request):
+    if request.user.role != 'student':
+        return json_response({'error': STUDENTS_ONLY}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        if request.student is None:
+            raise Student.DoesNotExist
+        return await student_risk(request.student)
+    except Student.DoesNotExist:
+        return json_response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error("Error in student_risk_analysis: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@csrf_exempt
+@require_POST
+@rate_limited
+async def custom_risk_analysis(request):
+    try:
+        try:
+            data = json.loads(request.body) if request.content_type == 'application/json' else request.POST
+        except ValueError as e:
+            return json_response({"detail": f"JSON parse error - {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        required_fields = ['attendance', 'marks', 'assignment', 'engagement', 'gpa', 'username']
+
+        if not isinstance(data, dict) or not all(field in data for field in required_fields):
+            return json_response({
+                "error": "Missing required fields",
+                "required_fields": required_fields
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            payload = {
+                "attendance": float(data['attendance']),
+                "marks": float(data['marks']),
+                "assignment": float(data['assignment']),
+                "engagement": float(data['engagement']),
+                "gpa": float(data['gpa'])
+            }
+        except (ValueError, TypeError):
+            return json_response({"error": "Invalid numeric values provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            student = await Student.objects.select_related('user').aget(name=data['username'])
+        except Student.DoesNotExist:
+            return json_response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        prediction, error = await predict(payload)
+        if error:
+            return error
+        await store_risk(student, *prediction)
+        return json_response(risk_body(student, *prediction, input_data={
+            "attendance": round(payload['attendance'], 2),
+            "average_marks": round(payload['marks'], 2),
+            "assignment_submission_rate": round(payload['assignment'], 2),
+            "engagement_metrics": round(payload['engagement'], 2),
+            "gpa": round(payload['gpa'], 2)
+        }))
+    except Exception as e:
+        logger.error("Error in custom_risk_analysis: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+@token_required
+@rate_limited
+async def student_course_prediction(request, course_id):
+    if request.user.role != 'student':
+        return json_response({'error': STUDENTS_ONLY}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        student = request.student
+        if student is None:
+            raise Student.DoesNotExist
+        course = await Course.objects.aget(id=course_id)
+
+        if not await Enrollment.objects.filter(student=student, course=course).aexists():
+            return json_response({
+                "error": f"Student is not enrolled in course {course.name}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        features = await astudent_risk_features(student, course)
+        prediction, error = await predict(prediction_payload(features))
+        if error:
+            return error
+        return json_response(risk_body(
+            student, *prediction,
+            course={"id": course.id, "name": course.name, "code": course.code},
+            **rounded_features(features)
+        ))
+    except Student.DoesNotExist:
+        logger.warning("Student profile not found for user: %s", request.user.username)
+        return json_response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Course.DoesNotExist:
+        logger.warning("Course with id %s not found", course_id)
+        return json_response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error("Error in student_course_prediction: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+@token_required
+@rate_limited
+@student_risk_condition
+async def student_all_courses_risk_analysis(request):
+    if request.user.role != 'student':
+        return json_response({'error': STUDENTS_ONLY}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        if request.student is None:
+            raise Student.DoesNotExist
+        return await student_risk(request.student)
+    except Student.DoesNotExist:
+        logger.warning("Student profile not found for user: %s", request.user.username)
+        return json_response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error("Error in student_all_courses_risk_analysis: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,63 @@
+from django.db.models import Avg, Count, Q
+from attendance.models import Attendance, Marks
+
+
+def _feature_aggregates(student, course):
+    attendance = Attendance.objects.filter(student=student)
+    marks = Marks.objects.filter(student=student)
+    if course is not None:
+        attendance = attendance.filter(subject=course)
+        marks = marks.filter(course=course)
+    return (
+        attendance,
+        {'total_days': Count('pk'), 'present_days': Count('pk', filter=Q(is_present=True))},
+        marks,
+        {'avg_marks': Avg('marks'), 'total_assignments': Count('pk', filter=Q(assessment_type='assignment'))},
+    )
+
+
+def student_risk_features(student, course=None):
+    """Attendance and marks features fed to the predictor, optionally for one course.
+
+    Two aggregate queries: one over attendance and one over marks.
+    """
+    attendance, attendance_aggregates, marks, marks_aggregates = _feature_aggregates(student, course)
+    return compute_risk_features(**attendance.aggregate(**attendance_aggregates), **marks.aggregate(**marks_aggregates))
+
+
+async def astudent_risk_features(student, course=None):
+    """``student_risk_features`` with the async ORM."""
+    attendance, attendance_aggregates, marks, marks_aggregates = _feature_aggregates(student, course)
+    return compute_risk_features(
+        **await attendance.aaggregate(**attendance_aggregates), **await marks.aaggregate(**marks_aggregates)
+    )
+
+
+def compute_risk_features(total_days, present_days, avg_marks, total_assignments):
+    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    avg_marks = avg_marks or 0
+    # Every recorded assignment counts as submitted.
+    submitted_assignments = total_assignments
+    assignment_submission_rate = (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 70.0
+    return {
+        "attendance_percentage": attendance_percentage,
+        "average_marks": avg_marks,
+        "assignment_submission_rate": assignment_submission_rate,
+        "engagement_metrics": attendance_percentage,
+        "gpa": (avg_marks / 100) * 4.0,
+    }
+
+
+def prediction_payload(features):
+    return {
+        "attendance": float(features["attendance_percentage"]),
+        "marks": float(features["average_marks"]),
+        "assignment": float(features["assignment_submission_rate"]),
+        "engagement": float(features["engagement_metrics"]),
+        "gpa": float(features["gpa"])
+    }
+
+
+def rounded_features(features):
+    """The features as the risk endpoints report them."""
+    return {name: round(value, 2) for name, value in features.items()}
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_attendance_marks_date_idx'),
+        ('risk_analysis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentrisk',
+            index=models.Index(fields=['risk_level'], name='risk_level_idx'),
+        ),
+    ]
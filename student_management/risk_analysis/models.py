@@ -6,6 +6,11 @@ class StudentRisk(models.Model):
     risk_level = models.CharField(max_length=50)
     confidence = models.FloatField()
     last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['risk_level'], name='risk_level_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.name} - {self.risk_level}"
\ No newline at end of file
@@ -0,0 +1,63 @@
+import time
+from functools import cache
+import httpx
+import requests
+from django.conf import settings
+from student_management import metrics
+from .admission import apredictor_slot, predictor_slot
+
+DEFAULT_PREDICTOR_URL = "https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/"
+
+
+def get_predictor_url():
+    return getattr(settings, 'RISK_PREDICTOR_URL', DEFAULT_PREDICTOR_URL)
+
+
+def request_prediction(payload):
+    """POST the feature payload to the Hugging Face Space and return the response.
+
+    Raises ``PredictorBusy`` when no predictor slot frees up in time, and
+    ``requests.RequestException`` (including ``requests.Timeout`` after
+    ``RISK_PREDICTOR_TIMEOUT``) when the call fails.
+    """
+    headers = {"Content-Type": "application/json"}
+    labels = {'view': metrics.current_view.get()}
+    with predictor_slot():
+        started = time.perf_counter()
+        try:
+            response = requests.post(get_predictor_url(), headers=headers, json=payload, timeout=get_predictor_timeout())
+        except requests.RequestException:
+            metrics.inc('predictor_requests_total', {**labels, 'outcome': 'error'})
+            raise
+        finally:
+            metrics.observe('predictor_request_duration_seconds', labels, time.perf_counter() - started)
+    metrics.inc('predictor_requests_total', {**labels, 'outcome': str(response.status_code)})
+    return response
+
+
+@cache
+def ssl_context():
+    # Loading the CA bundle takes tens of milliseconds; doing it for every
+    # client would block the event loop on each request.
+    return httpx.create_ssl_context()
+
+
+def get_predictor_timeout():
+    return getattr(settings, 'RISK_PREDICTOR_TIMEOUT', 30.0)
+
+
+async def arequest_prediction(payload):
+    """``request_prediction`` for async views; waits on the model without holding a thread."""
+    labels = {'view': metrics.current_view.get()}
+    async with apredictor_slot():
+        started = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(verify=ssl_context(), timeout=get_predictor_timeout()) as client:
+                response = await client.post(get_predictor_url(), json=payload)
+        except httpx.HTTPError:
+            metrics.inc('predictor_requests_total', {**labels, 'outcome': 'error'})
+            raise
+        finally:
+            metrics.observe('predictor_request_duration_seconds', labels, time.perf_counter() - started)
+    metrics.inc('predictor_requests_total', {**labels, 'outcome': str(response.status_code)})
+    return response
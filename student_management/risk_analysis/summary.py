@@ -0,0 +1,70 @@
+"""Class-level numbers for one course.
+
+The database groups the rows (per student, per assessment type, per risk
+level of the enrolled students); the per-student attendance percentages
+are then summarized with NumPy over one compact array instead of in a
+Python loop.
+"""
+from itertools import chain
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg, Count, F, Q
+from attendance.models import Attendance, Enrollment, Marks
+
+NOT_ASSESSED = 'Not assessed'
+
+
+def attendance_distribution(counts, threshold):
+    """Summary of per-student attendance from ``(total, present)`` pairs."""
+    counts = np.fromiter(chain.from_iterable(counts), dtype=np.float64).reshape(-1, 2)
+    if not len(counts):
+        return {'mean': None, 'median': None, 'p10': None, 'p90': None,
+                'below_threshold': 0, 'threshold': threshold}
+    percentages = counts[:, 1] / counts[:, 0] * 100
+    p10, median, p90 = np.percentile(percentages, [10, 50, 90])
+    return {
+        'mean': round(float(percentages.mean()), 2),
+        'median': round(float(median), 2),
+        'p10': round(float(p10), 2),
+        'p90': round(float(p90), 2),
+        'below_threshold': int(np.count_nonzero(percentages < threshold)),
+        'threshold': threshold,
+    }
+
+
+def course_summary(course):
+    threshold = getattr(settings, 'ATTENDANCE_WARNING_THRESHOLD', 75.0)
+    attendance = Attendance.objects.filter(subject=course)
+    counts = list(
+        attendance.values('student_id').order_by()
+        .annotate(total=Count('pk'), present=Count('pk', filter=Q(is_present=True)))
+        .values_list('total', 'present')
+    )
+
+    marks = {
+        row['assessment_type']: {
+            'count': row['count'],
+            'mean': round(row['mean'], 2),
+            # NULL when every row has max_marks of 0.
+            'mean_percentage': round(row['mean_percentage'], 2) if row['mean_percentage'] is not None else None,
+        }
+        for row in Marks.objects.filter(course=course).values('assessment_type').order_by('assessment_type')
+        .annotate(count=Count('pk'), mean=Avg('marks'), mean_percentage=Avg(F('marks') * 100.0 / F('max_marks')))
+    }
+
+    # Enrolled students by risk level; NULL for students never assessed.
+    risk = dict(
+        Enrollment.objects.filter(course=course)
+        .values('student__studentrisk__risk_level').order_by('student__studentrisk__risk_level')
+        .annotate(count=Count('pk')).values_list('student__studentrisk__risk_level', 'count')
+    )
+    enrolled = sum(risk.values())
+    risk[NOT_ASSESSED] = risk.pop(None, 0)
+
+    return {
+        'course': {'id': course.id, 'name': course.name, 'code': course.code},
+        'enrolled': enrolled,
+        'attendance': attendance_distribution(counts, threshold),
+        'marks': marks,
+        'risk': risk,
+    }
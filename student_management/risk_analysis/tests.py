@@ -1,3 +1,314 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
+import requests
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from attendance.models import User, Student, Course, Attendance, Marks, Enrollment, enroll
+from attendance.tests import QueryBudgetTestCase, isolate_test_module
+from student_management import metrics
+from .admission import PredictorBusy, apredictor_slot, athrottle_wait, predictor_slot, throttle_wait
+from .models import StudentRisk
+from .summary import course_summary
 
-# Create your tests here.
+CUSTOM_INPUT = {
+    'attendance': 80, 'marks': 65, 'assignment': 90, 'engagement': 70, 'gpa': 3.1
+}
+
+
+def setUpModule():
+    isolate_test_module()
+
+
+class RiskTestCase(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # Every call then takes the update branch of update_or_create.
+        StudentRisk.objects.create(student=self.student, risk_level='Unknown', confidence=0.0)
+        prediction = mock.Mock(status_code=200, text='')
+        prediction.json.return_value = {'predicted_grade': 2.8, 'risk_level': 'Low'}
+        self.predictor = mock.Mock(return_value=prediction)
+        self.async_predictor = mock.AsyncMock(return_value=prediction)
+        for target, patch in (
+            ('risk_analysis.predictor.requests.post', self.predictor),
+            ('risk_analysis.async_views.arequest_prediction', self.async_predictor),
+        ):
+            patcher = mock.patch(target, patch)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class RiskQueryBudgetTests(RiskTestCase):
+
+    def test_risk_endpoints(self):
+        student = self.student_client
+        course = self.courses[0]
+
+        def get(client, name, *args):
+            return lambda index: (client, 'get', reverse(f"risk_analysis:{name}", args=args), {})
+
+        custom = {'username': self.student.name, **CUSTOM_INPUT}
+        self.assertQueryBudgets([
+            ('teacher-risk-analysis', 8, get(self.anonymous_client, 'teacher-risk-analysis', self.student.name)),
+            ('student-risk-analysis', 8, get(student, 'student-risk-analysis')),
+            ('custom-risk-analysis', 6, lambda index: (
+                self.anonymous_client, 'post', reverse('risk_analysis:custom-risk-analysis'),
+                {'data': custom, 'format': 'json'}
+            )),
+            ('student-courses', 2, get(student, 'student-courses')),
+            ('student-course-prediction', 5, get(student, 'student-course-prediction', course.pk)),
+            ('student-all-courses-risk-analysis', 8, get(student, 'student-all-courses-risk-analysis')),
+            ('course-summary', 5, get(self.teacher_client, 'course-summary', course.pk)),
+        ])
+        self.assertTrue(self.predictor.called)
+
+
+class AsyncRiskViewTests(RiskTestCase):
+
+    def without_timestamps(self, response):
+        body = response.json()
+        body.get('risk_prediction', {}).pop('last_updated', None)
+        return body
+
+    def test_async_views_match_sync_views(self):
+        self.seed(4, 10)
+        token = Token.objects.get(user=self.student_user)
+        headers = {'Authorization': f"Token {token.key}"}
+        teacher_headers = {'Authorization': f"Token {Token.objects.get(user=self.teacher).key}"}
+        custom = {'username': self.student.name, **CUSTOM_INPUT}
+        cases = [
+            ('teacher-risk-analysis', (self.student.name,), 'get', {}, {}),
+            ('teacher-risk-analysis', ('nobody',), 'get', {}, {}),
+            ('teacher-risk-analysis', (self.student.name,), 'get', {'Authorization': 'Token invalid'}, {}),
+            ('student-risk-analysis', (), 'get', headers, {}),
+            ('student-risk-analysis', (), 'get', {}, {}),
+            ('student-risk-analysis', (), 'get', {'Authorization': 'Token invalid'}, {}),
+            ('student-risk-analysis', (), 'get', teacher_headers, {}),
+            ('custom-risk-analysis', (), 'post', {}, {'data': json.dumps(custom), 'content_type': 'application/json'}),
+            ('custom-risk-analysis', (), 'post', {}, {'data': json.dumps({'gpa': 1}), 'content_type': 'application/json'}),
+            ('student-course-prediction', (self.courses[0].pk,), 'get', headers, {}),
+            ('student-course-prediction', (999,), 'get', headers, {}),
+            ('student-all-courses-risk-analysis', (), 'get', headers, {}),
+        ]
+        async_client = AsyncClient()
+        for name, args, method, request_headers, kwargs in cases:
+            with self.subTest(name=name, args=args, headers=request_headers):
+                sync_response = getattr(self.anonymous_client, method)(
+                    reverse(f"risk_analysis:{name}", args=args), headers=request_headers, **kwargs
+                )
+                async_response = async_to_sync(getattr(async_client, method))(
+                    reverse(f"risk_analysis:async-{name}", args=args), headers=request_headers, **kwargs
+                )
+                self.assertEqual(async_response.status_code, sync_response.status_code)
+                self.assertEqual(self.without_timestamps(async_response), self.without_timestamps(sync_response))
+                self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+        self.assertEqual(self.async_predictor.await_count, self.predictor.call_count)
+
+
+class PredictorTests(RiskTestCase):
+
+    def error_count(self):
+        counters, _ = metrics.collect()
+        labels = (('outcome', 'error'), ('view', 'risk_analysis:teacher-risk-analysis'))
+        return counters.get(('predictor_requests_total', labels), 0)
+
+    @override_settings(RISK_PREDICTOR_TIMEOUT=2.5)
+    def test_timeout(self):
+        url = reverse('risk_analysis:teacher-risk-analysis', args=[self.student.name])
+        self.assertEqual(self.anonymous_client.get(url).status_code, 200)
+        self.assertEqual(self.predictor.call_args.kwargs['timeout'], 2.5)
+
+        errors = self.error_count()
+        self.predictor.side_effect = requests.Timeout("Read timed out")
+        response = self.anonymous_client.get(url)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': "Read timed out"})
+        self.assertEqual(self.error_count(), errors + 1)
+
+
+class AdmissionTests(RiskTestCase):
+
+    def get_risk(self, client, **kwargs):
+        return client.get(reverse('risk_analysis:student-risk-analysis'), **kwargs)
+
+    @override_settings(RISK_THROTTLE_RATE='1/min', RISK_THROTTLE_BURST=2)
+    def test_throttle_per_user(self):
+        for _ in range(2):
+            self.assertEqual(self.get_risk(self.student_client).status_code, 200)
+        response = self.get_risk(self.student_client)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.predictor.call_count, 2)
+
+        # Another client has its own bucket.
+        response = self.anonymous_client.get(reverse('risk_analysis:teacher-risk-analysis', args=[self.student.name]))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(RISK_THROTTLE_RATE='1/min', RISK_THROTTLE_BURST=2)
+    def test_async_throttle_matches_sync(self):
+        headers = {'Authorization': f"Token {Token.objects.get(user=self.student_user).key}"}
+        async_client = AsyncClient()
+        url = reverse('risk_analysis:async-student-risk-analysis')
+        sync_response = self.get_risk(self.anonymous_client, headers=headers)
+        responses = [async_to_sync(async_client.get)(url, headers=headers) for _ in range(2)]
+        self.assertEqual([sync_response.status_code] + [r.status_code for r in responses], [200, 200, 429])
+        self.assertIn('Retry-After', responses[-1])
+        self.assertEqual(responses[-1].json(), self.get_risk(self.anonymous_client, headers=headers).json())
+
+    @override_settings(RISK_THROTTLE_RATE='1/min', RISK_THROTTLE_BURST=2)
+    def test_async_throttle_keys_on_token_user(self):
+        headers = {'Authorization': f"Token {Token.objects.get(user=self.student_user).key}"}
+        async_client = AsyncClient()
+        url = reverse('risk_analysis:async-teacher-risk-analysis', args=[self.student.name])
+        statuses = [self.get_risk(self.anonymous_client, headers=headers).status_code] + [
+            async_to_sync(async_client.get)(url, headers=headers).status_code for _ in range(2)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        # The client's address still has its own bucket.
+        self.assertEqual(async_to_sync(async_client.get)(url).status_code, 200)
+
+    @override_settings(RISK_THROTTLE_RATE='1/min', RISK_THROTTLE_BURST=2)
+    def test_not_modified_keeps_allowance(self):
+        headers = {'Authorization': f"Token {Token.objects.get(user=self.student_user).key}"}
+        async_client = AsyncClient()
+        for get in (
+            lambda **kwargs: self.get_risk(self.anonymous_client, headers={**headers, **kwargs}),
+            lambda **kwargs: async_to_sync(async_client.get)(
+                reverse('risk_analysis:async-student-risk-analysis'), headers={**headers, **kwargs}
+            ),
+        ):
+            cache.clear()
+            etag = get()['ETag']
+            self.assertEqual([get(If_None_Match=etag).status_code for _ in range(3)], [304] * 3)
+            self.assertEqual([get().status_code for _ in range(2)], [200, 429])
+
+    @override_settings(RISK_THROTTLE_RATE='1/d', RISK_THROTTLE_BURST=5)
+    def test_concurrent_requests_take_distinct_tokens(self):
+        # Widen the window between reading and writing a bucket.
+        get = cache.get
+        slow_get = mock.patch.object(cache, 'get', side_effect=lambda *args: time.sleep(0.01) or get(*args))
+        barrier = threading.Barrier(12)
+        waits = []
+
+        def take():
+            barrier.wait()
+            waits.append(throttle_wait('user:concurrent'))
+
+        with slow_get:
+            threads = [threading.Thread(target=take) for _ in range(12)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(waits.count(0), 5)
+
+        async def take_async():
+            return await asyncio.gather(*(athrottle_wait('user:concurrent-async') for _ in range(12)))
+        with slow_get:
+            self.assertEqual(async_to_sync(take_async)().count(0), 5)
+
+    @override_settings(RISK_PREDICTOR_CONCURRENCY=0, RISK_PREDICTOR_QUEUE_SIZE=0, RISK_PREDICTOR_RETRY_AFTER=7)
+    def test_shed_when_queue_full(self):
+        response = self.get_risk(self.student_client)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertFalse(self.predictor.called)
+
+    def test_async_shed(self):
+        self.async_predictor.side_effect = PredictorBusy("The risk model is busy; try again later", 7)
+        headers = {'Authorization': f"Token {Token.objects.get(user=self.student_user).key}"}
+        response = async_to_sync(AsyncClient().get)(reverse('risk_analysis:async-student-risk-analysis'), headers=headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+    @override_settings(RISK_PREDICTOR_CONCURRENCY=1, RISK_PREDICTOR_QUEUE_SIZE=1, RISK_PREDICTOR_QUEUE_TIMEOUT=0.05)
+    def test_slots(self):
+        with predictor_slot():
+            with self.assertRaisesMessage(PredictorBusy, "Timed out"):
+                with predictor_slot():
+                    pass
+
+            # Without a queue, a request finding every slot taken is shed at once.
+            async def unqueued():
+                async with apredictor_slot():
+                    pass
+            with override_settings(RISK_PREDICTOR_QUEUE_SIZE=0), self.assertRaisesMessage(PredictorBusy, "busy"):
+                async_to_sync(unqueued)()
+
+        # A waiter gets the slot once it is released.
+        holder = predictor_slot()
+        holder.__enter__()
+        threading.Timer(0.01, holder.__exit__, (None, None, None)).start()
+        with override_settings(RISK_PREDICTOR_QUEUE_TIMEOUT=5), predictor_slot():
+            pass
+
+
+class CourseSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course, other, cls.empty = (
+            Course.objects.create(name=f"Course {i}", code=f"C{i}") for i in range(3)
+        )
+        students = [Student.objects.get(user=User.objects.create(username=f"s{i}", role='student')) for i in range(6)]
+        # Attended 10, 8, 6, 5 and 2 of 10 days; the sixth student is enrolled without attendance.
+        start = date(2025, 1, 1)
+        Attendance.objects.bulk_create([
+            Attendance(student=student, subject=cls.course, date=start + timedelta(days=day), is_present=day < present)
+            for student, present in zip(students, (10, 8, 6, 5, 2)) for day in range(10)
+        ] + [Attendance(student=students[0], subject=other, date=start, is_present=False)])
+        enroll((student.pk, cls.course.pk) for student in students)
+        Marks.objects.bulk_create([
+            Marks(student=students[0], course=cls.course, assessment_type='quiz', marks=8, max_marks=10, date=start),
+            Marks(student=students[1], course=cls.course, assessment_type='quiz', marks=6, max_marks=10, date=start),
+            Marks(student=students[0], course=cls.course, assessment_type='assignment', marks=45, max_marks=50, date=start),
+            Marks(student=students[0], course=cls.course, assessment_type='sessional', marks=0, max_marks=0, date=start),
+            Marks(student=students[0], course=other, assessment_type='quiz', marks=1, max_marks=10, date=start),
+        ])
+        for student, level in zip(students, ('High', 'High', 'Low')):
+            StudentRisk.objects.create(student=student, risk_level=level, confidence=0.9)
+        Enrollment.objects.create(student=students[0], course=other)
+
+    def test_summary(self):
+        summary = course_summary(self.course)
+        self.assertEqual(summary['course'], {'id': self.course.pk, 'name': 'Course 0', 'code': 'C0'})
+        self.assertEqual(summary['enrolled'], 6)
+        # Percentages 100, 80, 60, 50 and 20, with linear interpolation between them.
+        self.assertEqual(summary['attendance'], {
+            'mean': 62.0, 'median': 60.0, 'p10': 32.0, 'p90': 92.0, 'below_threshold': 3, 'threshold': 75.0,
+        })
+        self.assertEqual(summary['marks'], {
+            'assignment': {'count': 1, 'mean': 45.0, 'mean_percentage': 90.0},
+            'quiz': {'count': 2, 'mean': 7.0, 'mean_percentage': 70.0},
+            'sessional': {'count': 1, 'mean': 0.0, 'mean_percentage': None},
+        })
+        self.assertEqual(summary['risk'], {'High': 2, 'Low': 1, 'Not assessed': 3})
+
+        with override_settings(ATTENDANCE_WARNING_THRESHOLD=55.0):
+            self.assertEqual(course_summary(self.course)['attendance']['below_threshold'], 2)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='teacher', role='teacher'))
+        response = client.get(reverse('risk_analysis:course-summary', args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(json.dumps(summary)))
+
+    def test_empty_course(self):
+        self.assertEqual(course_summary(self.empty), {
+            'course': {'id': self.empty.pk, 'name': 'Course 2', 'code': 'C2'},
+            'enrolled': 0,
+            'attendance': {
+                'mean': None, 'median': None, 'p10': None, 'p90': None, 'below_threshold': 0, 'threshold': 75.0,
+            },
+            'marks': {},
+            'risk': {'Not assessed': 0},
+        })
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'risk_analysis'
 
@@ -10,4 +10,10 @@ urlpatterns = [
     path('student/courses/', views.StudentCoursesView.as_view(), name='student-courses'),
     path('student/course-prediction/<int:course_id>/', views.StudentCourseRiskPredictionView.as_view(), name='student-course-prediction'),
     path('student/all-courses-risk-analysis/', views.StudentAllCoursesRiskAnalysisView.as_view(), name='student-all-courses-risk-analysis'),
-]
\ No newline at end of file
+    path('teacher/courses/<int:course_id>/summary/', views.CourseSummaryView.as_view(), name='course-summary'),
+    path('async/teacher/risk-analysis/<str:username>/', async_views.teacher_risk_analysis, name='async-teacher-risk-analysis'),
+    path('async/student/risk-analysis/', async_views.student_risk_analysis, name='async-student-risk-analysis'),
+    path('async/custom/risk-analysis/', async_views.custom_risk_analysis, name='async-custom-risk-analysis'),
+    path('async/student/course-prediction/<int:course_id>/', async_views.student_course_prediction, name='async-student-course-prediction'),
+    path('async/student/all-courses-risk-analysis/', async_views.student_all_courses_risk_analysis, name='async-student-all-courses-risk-analysis'),
+]
@@ -1,12 +1,20 @@
-import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from attendance.models import Student, Attendance, Marks, Course
+from attendance.models import Student, Attendance, Marks, Course, Enrollment
 from attendance.serializers import CourseSerializer
-from django.db.models import Avg, Count
+from attendance.cache import get_cached_response
+from attendance.conditional import student_data_condition
+from attendance.authentication import get_request_student
+from django.utils.decorators import method_decorator
+from student_management.db_router import replica_reads
+from student_management.log_handlers import SAMPLED
 from .models import StudentRisk
+from .predictor import request_prediction
+from .admission import PredictorBusy, RiskRateThrottle, refund_not_modified
+from .features import student_risk_features, prediction_payload, rounded_features
+from .summary import course_summary
 from .permissions import IsTeacher
 from django.utils import timezone
 from rest_framework.permissions import AllowAny
@@ -15,35 +23,29 @@ import logging
 # Set up logging
 logger = logging.getLogger(__name__)
 
+def busy_response(e):
+    return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': str(e.retry_after)})
+
+# The prediction depends only on the student's attendance and marks, so it is
+# unchanged while they are. The body carries a fresh timestamp, hence a weak
+# validator.
+_risk_data_condition = student_data_condition((Attendance, 'updated_at'), (Marks, 'updated_at'), weak=True)
+
+def student_risk_condition(view):
+    return refund_not_modified(_risk_data_condition(view))
+
 class TeacherStudentRiskAnalysis(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RiskRateThrottle]
 
     def get(self, request, username):
         try:
             student = Student.objects.get(name=username)
-            attendance_records = Attendance.objects.filter(student=student)
-            total_days = attendance_records.count()
-            present_days = attendance_records.filter(is_present=True).count()
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-            avg_marks = Marks.objects.filter(student=student).aggregate(Avg('marks'))['marks__avg'] or 0
-            assignment_records = Marks.objects.filter(student=student, assessment_type='assignment')
-            total_assignments = assignment_records.count()
-            submitted_assignments = total_assignments
-            assignment_submission_rate = (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 70.0
-            engagement_metrics = attendance_percentage
-            gpa = (avg_marks / 100) * 4.0
-
-            payload = {
-                "attendance": float(attendance_percentage),
-                "marks": float(avg_marks),
-                "assignment": float(assignment_submission_rate),
-                "engagement": float(engagement_metrics),
-                "gpa": float(gpa)
-            }
-
-            HF_API_URL = "https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/"
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(HF_API_URL, headers=headers, json=payload)
+            features = student_risk_features(student)
+            payload = prediction_payload(features)
+
+            response = request_prediction(payload)
 
             if response.status_code == 200:
                 prediction = response.json()
@@ -63,11 +65,7 @@ class TeacherStudentRiskAnalysis(APIView):
                     "student_id": student.user.id,
                     "username": student.user.username,
                     "name": student.name,
-                    "attendance_percentage": round(attendance_percentage, 2),
-                    "average_marks": round(avg_marks, 2),
-                    "assignment_submission_rate": round(assignment_submission_rate, 2),
-                    "engagement_metrics": round(engagement_metrics, 2),
-                    "gpa": round(gpa, 2),
+                    **rounded_features(features),
                     "risk_prediction": {
                         "risk_level": risk_level,
                         "predicted_grade": predicted_grade,
@@ -82,43 +80,28 @@ class TeacherStudentRiskAnalysis(APIView):
 
         except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
+        except PredictorBusy as e:
+            return busy_response(e)
         except Exception as e:
-            logger.error(f"Error in TeacherStudentRiskAnalysis: {str(e)}", exc_info=True)
+            logger.error("Error in TeacherStudentRiskAnalysis: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentRiskAnalysis(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [RiskRateThrottle]
 
+    @method_decorator(student_risk_condition)
     def get(self, request):
         if request.user.role != 'student':
             return Response({'error': 'Unauthorized access. Only students can access this endpoint.'}, 
                            status=status.HTTP_403_FORBIDDEN)
 
         try:
-            student = Student.objects.get(user=request.user)
-            attendance_records = Attendance.objects.filter(student=student)
-            total_days = attendance_records.count()
-            present_days = attendance_records.filter(is_present=True).count()
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-            avg_marks = Marks.objects.filter(student=student).aggregate(Avg('marks'))['marks__avg'] or 0
-            assignment_records = Marks.objects.filter(student=student, assessment_type='assignment')
-            total_assignments = assignment_records.count()
-            submitted_assignments = total_assignments
-            assignment_submission_rate = (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 70.0
-            engagement_metrics = attendance_percentage
-            gpa = (avg_marks / 100) * 4.0
-
-            payload = {
-                "attendance": float(attendance_percentage),
-                "marks": float(avg_marks),
-                "assignment": float(assignment_submission_rate),
-                "engagement": float(engagement_metrics),
-                "gpa": float(gpa)
-            }
-
-            HF_API_URL = "https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/"
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(HF_API_URL, headers=headers, json=payload)
+            student = get_request_student(request)
+            features = student_risk_features(student)
+            payload = prediction_payload(features)
+
+            response = request_prediction(payload)
 
             if response.status_code == 200:
                 prediction = response.json()
@@ -138,11 +121,7 @@ class StudentRiskAnalysis(APIView):
                     "student_id": student.user.id,
                     "username": student.user.username,
                     "name": student.name,
-                    "attendance_percentage": round(attendance_percentage, 2),
-                    "average_marks": round(avg_marks, 2),
-                    "assignment_submission_rate": round(assignment_submission_rate, 2),
-                    "engagement_metrics": round(engagement_metrics, 2),
-                    "gpa": round(gpa, 2),
+                    **rounded_features(features),
                     "risk_prediction": {
                         "risk_level": risk_level,
                         "predicted_grade": predicted_grade,
@@ -157,12 +136,15 @@ class StudentRiskAnalysis(APIView):
 
         except Student.DoesNotExist:
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        except PredictorBusy as e:
+            return busy_response(e)
         except Exception as e:
-            logger.error(f"Error in StudentRiskAnalysis: {str(e)}", exc_info=True)
+            logger.error("Error in StudentRiskAnalysis: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class CustomRiskAnalysis(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RiskRateThrottle]
 
     def post(self, request):
         try:
@@ -193,9 +175,7 @@ class CustomRiskAnalysis(APIView):
             except Student.DoesNotExist:
                 return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
 
-            HF_API_URL = "https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/"
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(HF_API_URL, headers=headers, json=payload)
+            response = request_prediction(payload)
 
             if response.status_code == 200:
                 prediction = response.json()
@@ -234,8 +214,10 @@ class CustomRiskAnalysis(APIView):
                     "details": response.text
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+        except PredictorBusy as e:
+            return busy_response(e)
         except Exception as e:
-            logger.error(f"Error in CustomRiskAnalysis: {str(e)}", exc_info=True)
+            logger.error("Error in CustomRiskAnalysis: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentCoursesView(APIView):
@@ -248,23 +230,23 @@ class StudentCoursesView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            student = Student.objects.get(user=request.user)
-            courses = Course.objects.filter(
-                attendance__student=student
-            ).distinct()
-            logger.info(f"Fetched {courses.count()} courses for student {student.roll_number}")
-            serializer = CourseSerializer(courses, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            student = get_request_student(request)
+            data = get_cached_response('student-courses', student.pk, lambda: CourseSerializer(
+                Course.objects.filter(enrollments__student=student), many=True
+            ).data)
+            logger.info("Fetched %s courses for student %s", len(data), student.roll_number, extra=SAMPLED)
+            return Response(data, status=status.HTTP_200_OK)
 
         except Student.DoesNotExist:
-            logger.warning(f"Student profile not found for user: {request.user.username}")
+            logger.warning("Student profile not found for user: %s", request.user.username)
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error in StudentCoursesView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentCoursesView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentCourseRiskPredictionView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [RiskRateThrottle]
 
     def get(self, request, course_id):
         if request.user.role != 'student':
@@ -273,44 +255,18 @@ class StudentCourseRiskPredictionView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            student = Student.objects.get(user=request.user)
+            student = get_request_student(request)
             course = Course.objects.get(id=course_id)
 
-            if not Attendance.objects.filter(student=student, subject=course).exists():
+            if not Enrollment.objects.filter(student=student, course=course).exists():
                 return Response({
                     "error": f"Student is not enrolled in course {course.name}"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            attendance_records = Attendance.objects.filter(student=student, subject=course)
-            total_days = attendance_records.count()
-            present_days = attendance_records.filter(is_present=True).count()
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-
-            avg_marks = Marks.objects.filter(
-                student=student, course=course
-            ).aggregate(Avg('marks'))['marks__avg'] or 0
-
-            assignment_records = Marks.objects.filter(
-                student=student, course=course, assessment_type='assignment'
-            )
-            total_assignments = assignment_records.count()
-            submitted_assignments = total_assignments
-            assignment_submission_rate = (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 70.0
-
-            engagement_metrics = attendance_percentage
-            gpa = (avg_marks / 100) * 4.0
-
-            payload = {
-                "attendance": float(attendance_percentage),
-                "marks": float(avg_marks),
-                "assignment": float(assignment_submission_rate),
-                "engagement": float(engagement_metrics),
-                "gpa": float(gpa)
-            }
-
-            HF_API_URL = "https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/"
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(HF_API_URL, headers=headers, json=payload)
+            features = student_risk_features(student, course)
+            payload = prediction_payload(features)
+
+            response = request_prediction(payload)
 
             if response.status_code == 200:
                 prediction = response.json()
@@ -326,11 +282,7 @@ class StudentCourseRiskPredictionView(APIView):
                         "name": course.name,
                         "code": course.code
                     },
-                    "attendance_percentage": round(attendance_percentage, 2),
-                    "average_marks": round(avg_marks, 2),
-                    "assignment_submission_rate": round(assignment_submission_rate, 2),
-                    "engagement_metrics": round(engagement_metrics, 2),
-                    "gpa": round(gpa, 2),
+                    **rounded_features(features),
                     "risk_prediction": {
                         "risk_level": risk_level,
                         "predicted_grade": predicted_grade,
@@ -344,18 +296,22 @@ class StudentCourseRiskPredictionView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
         except Student.DoesNotExist:
-            logger.warning(f"Student profile not found for user: {request.user.username}")
+            logger.warning("Student profile not found for user: %s", request.user.username)
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Course.DoesNotExist:
-            logger.warning(f"Course with id {course_id} not found")
+            logger.warning("Course with id %s not found", course_id)
             return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        except PredictorBusy as e:
+            return busy_response(e)
         except Exception as e:
-            logger.error(f"Error in StudentCourseRiskPredictionView: {str(e)}", exc_info=True)
+            logger.error("Error in StudentCourseRiskPredictionView: %s", e, exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StudentAllCoursesRiskAnalysisView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [RiskRateThrottle]
 
+    @method_decorator(student_risk_condition)
     def get(self, request):
         if request.user.role != 'student':
             return Response({
@@ -363,30 +319,11 @@ class StudentAllCoursesRiskAnalysisView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            student = Student.objects.get(user=request.user)
-            attendance_records = Attendance.objects.filter(student=student)
-            total_days = attendance_records.count()
-            present_days = attendance_records.filter(is_present=True).count()
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-            avg_marks = Marks.objects.filter(student=student).aggregate(Avg('marks'))['marks__avg'] or 0
-            assignment_records = Marks.objects.filter(student=student, assessment_type='assignment')
-            total_assignments = assignment_records.count()
-            submitted_assignments = total_assignments
-            assignment_submission_rate = (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 70.0
-            engagement_metrics = attendance_percentage
-            gpa = (avg_marks / 100) * 4.0
-
-            payload = {
-                "attendance": float(attendance_percentage),
-                "marks": float(avg_marks),
-                "assignment": float(assignment_submission_rate),
-                "engagement": float(engagement_metrics),
-                "gpa": float(gpa)
-            }
-
-            HF_API_URL = "https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/"
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(HF_API_URL, headers=headers, json=payload)
+            student = get_request_student(request)
+            features = student_risk_features(student)
+            payload = prediction_payload(features)
+
+            response = request_prediction(payload)
 
             if response.status_code == 200:
                 prediction = response.json()
@@ -406,11 +343,7 @@ class StudentAllCoursesRiskAnalysisView(APIView):
                     "student_id": student.user.id,
                     "username": student.user.username,
                     "name": student.name,
-                    "attendance_percentage": round(attendance_percentage, 2),
-                    "average_marks": round(avg_marks, 2),
-                    "assignment_submission_rate": round(assignment_submission_rate, 2),
-                    "engagement_metrics": round(engagement_metrics, 2),
-                    "gpa": round(gpa, 2),
+                    **rounded_features(features),
                     "risk_prediction": {
                         "risk_level": risk_level,
                         "predicted_grade": predicted_grade,
@@ -424,8 +357,25 @@ class StudentAllCoursesRiskAnalysisView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
         except Student.DoesNotExist:
-            logger.warning(f"Student profile not found for user: {request.user.username}")
+            logger.warning("Student profile not found for user: %s", request.user.username)
             return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        except PredictorBusy as e:
+            return busy_response(e)
         except Exception as e:
-            logger.error(f"Error in StudentAllCoursesRiskAnalysisView: {str(e)}", exc_info=True)
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            logger.error("Error in StudentAllCoursesRiskAnalysisView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class CourseSummaryView(APIView):
+    permission_classes = [IsTeacher]
+
+    @method_decorator(replica_reads)
+    def get(self, request, course_id):
+        try:
+            course = Course.objects.get(id=course_id)
+            return Response(course_summary(course), status=status.HTTP_200_OK)
+        except Course.DoesNotExist:
+            logger.warning("Course with id %s not found", course_id)
+            return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error("Error in CourseSummaryView: %s", e, exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,187 @@
+"""Micro-benchmarks for the hot Python paths.
+
+Each benchmark is a setup function registered with ``@benchmark``; it runs
+against seeded data and returns the callable to time. ``run`` calibrates
+how many calls make up one repeat, warms up, then times ``repeat`` rounds
+with the garbage collector off (``timeit``). Results are per-call times
+and can be saved as a baseline and compared on later runs. Comparisons use
+the fastest round, which is the least disturbed by other load on the machine.
+"""
+import csv
+import gc
+import json
+import platform
+import statistics
+import timeit
+from datetime import date, datetime, timedelta
+from io import StringIO
+from django.db import transaction
+from attendance.models import User, Student, Course, Attendance, Marks, bulk_insert, enroll
+from attendance.serializers import (
+    AttendanceSerializer, MarksSerializer, FastAttendanceSerializer, FastMarksSerializer
+)
+from attendance.imports import UPLOAD_REQUIRED_FIELDS, parse_upload_row
+from risk_analysis.features import student_risk_features, compute_risk_features, prediction_payload
+
+BENCHMARKS = {}
+
+
+class Rollback(Exception):
+    pass
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def seed(rows, student_count, course_count):
+    """Create ``rows`` attendance and marks rows spread over the students and courses."""
+    courses = bulk_insert(Course, [
+        Course(name=f"bench-course-{i}", code=f"BENCH{i}") for i in range(course_count)
+    ], 'code')
+    users = bulk_insert(User, [
+        User(username=f"bench-student-{i}", role='student') for i in range(student_count)
+    ], 'username', batch_size=5000)
+    students = Student.objects.bulk_create([
+        Student(user=user, name=user.username, roll_number=f"BENCH{i}") for i, user in enumerate(users)
+    ])
+    start = date(2020, 1, 1)
+    attendance = []
+    marks = []
+    for i in range(rows):
+        student = students[i % student_count]
+        course = courses[(i // student_count) % course_count]
+        day = start + timedelta(days=i // (student_count * course_count))
+        attendance.append(Attendance(student=student, subject=course, date=day, is_present=i % 5 != 0))
+        marks.append(Marks(student=student, course=course, assessment_type=('quiz', 'assignment')[i % 2],
+                           assessment_number=1, marks=i % 100, date=day))
+    Attendance.objects.bulk_create(attendance, batch_size=5000)
+    Marks.objects.bulk_create(marks, batch_size=5000)
+    enroll(((row.student_id, row.subject_id) for row in attendance), batch_size=5000)
+    return students, courses
+
+
+@benchmark('attendance_serializer_10k')
+def attendance_serializer(context):
+    rows = list(Attendance.objects.select_related('student', 'subject').order_by('id')[:10000])
+    return lambda: AttendanceSerializer(rows, many=True).data
+
+
+@benchmark('marks_serializer_10k')
+def marks_serializer(context):
+    rows = list(Marks.objects.select_related('student', 'course').order_by('id')[:10000])
+    return lambda: MarksSerializer(rows, many=True).data
+
+
+@benchmark('fast_attendance_serializer_10k')
+def fast_attendance_serializer(context):
+    rows = list(FastAttendanceSerializer.prepare(Attendance.objects.order_by('id'))[:10000])
+    return lambda: FastAttendanceSerializer(rows).data
+
+
+@benchmark('fast_marks_serializer_10k')
+def fast_marks_serializer(context):
+    rows = list(FastMarksSerializer.prepare(Marks.objects.order_by('id'))[:10000])
+    return lambda: FastMarksSerializer(rows).data
+
+
+@benchmark('validate_student_id')
+def validate_student_id(context):
+    serializer = AttendanceSerializer()
+    username = context['students'][0].user.username
+    return lambda: serializer.validate_student_id(username)
+
+
+@benchmark('csv_upload_parse_1k')
+def csv_upload_parse(context):
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(UPLOAD_REQUIRED_FIELDS)
+    for i in range(1000):
+        writer.writerow([
+            f"upload-{i}", f"U{i:05d}", f"Upload Student {i}", f"Course {i % 8}", 50 + i % 50,
+            i % 100, 100, f"2025-01-{i % 28 + 1:02d}", f"08:{i % 60:02d}:00"
+        ])
+    text = output.getvalue()
+    return lambda: [parse_upload_row(row) for row in csv.DictReader(StringIO(text))]
+
+
+@benchmark('risk_features_query')
+def risk_features_query(context):
+    student = context['students'][0]
+    return lambda: prediction_payload(student_risk_features(student))
+
+
+@benchmark('risk_payload')
+def risk_payload(context):
+    return lambda: prediction_payload(compute_risk_features(120, 97, 64.5, 12))
+
+
+def time_callable(func, warmup, repeat, min_time):
+    """Per-call timings for ``repeat`` rounds of a calibrated number of calls."""
+    gc.collect()
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    for _ in range(warmup):
+        timer.timeit(number)
+    timings = [total / number for total in timer.repeat(repeat, number)]
+    quartiles = statistics.quantiles(timings, n=4) if len(timings) > 1 else [timings[0]] * 3
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'iqr': quartiles[2] - quartiles[0],
+    }
+
+
+def run(names=None, warmup=2, repeat=9, min_time=0.5, rows=10000, students=50, courses=10):
+    """Seed data in a rolled-back transaction and time the selected benchmarks."""
+    names = list(names or BENCHMARKS)
+    results = {}
+    try:
+        with transaction.atomic():
+            seeded_students, seeded_courses = seed(rows, students, courses)
+            context = {'students': seeded_students, 'courses': seeded_courses}
+            for name in names:
+                results[name] = time_callable(BENCHMARKS[name](context), warmup, repeat, min_time)
+            raise Rollback
+    except Rollback:
+        pass
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'benchmarks': results,
+    }
+
+
+def compare(results, baseline):
+    """Change of the fastest round against a baseline, as a fraction, for benchmarks in both."""
+    changes = {}
+    for name, result in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous:
+            changes[name] = result['min'] / previous['min'] - 1
+    return changes
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,116 @@
+"""Read-replica routing for opted-in read-only views.
+
+Views decorated with ``replica_reads`` send their reads to the
+``REPLICA_DATABASE_ALIAS`` connection; everything else, and every write,
+uses ``default``. Reads go back to the primary:
+
+- inside a transaction on the primary,
+- after the current request has written anything,
+- for ``REPLICA_PIN_SECONDS`` after a request by the same user wrote
+  something, so users read their own writes despite replication lag.
+"""
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_KEY = 'db-replica-pin:{}'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_wrote = ContextVar('replica_wrote', default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and bool(cache.get(PIN_KEY.format(user.pk)))
+
+
+def pin_to_primary(user):
+    cache.set(PIN_KEY.format(user.pk), True, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+def replica_reads(view_func):
+    """Serve a read-only view from the replica unless the user is pinned to the primary.
+
+    Apply to DRF view methods with ``method_decorator`` so ``request.user``
+    is already authenticated when the decorator runs.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if is_pinned(getattr(request, 'user', None)):
+            return view_func(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _wrote.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is migrated through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Pins a user to the primary after a request in which they wrote."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                self.pin_writer(request)
+            return response
+        finally:
+            _wrote.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async copies context variable changes back, so writes made
+        # in the request's sync thread are seen here.
+        token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if _wrote.get():
+                await sync_to_async(self.pin_writer)(request)
+            return response
+        finally:
+            _wrote.reset(token)
+
+    def pin_writer(self, request):
+        # DRF has replaced request.user with the token-authenticated user by now.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
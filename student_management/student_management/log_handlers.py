@@ -0,0 +1,70 @@
+import atexit
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Hands records to a background QueueListener that owns the real handlers.
+
+    Records are queued with their message merged but otherwise unformatted,
+    so formatting and disk writes happen on the listener thread. The queue is
+    bounded; when it is full the record is dropped instead of blocking the
+    request.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        # Index access lets dictConfig resolve the cfg://handlers.* references.
+        targets = [handlers[i] for i in range(len(handlers))]
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        # Merge the arguments now: they may be mutable and change before the
+        # listener gets to the record.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ``extra`` for high-volume messages that may be sampled.
+SAMPLED = {'sampled': True}
+
+
+class SamplingFilter(logging.Filter):
+    """Passes only a ``rate`` fraction of the records logged with
+    ``extra=SAMPLED`` at or below ``max_level``; all others pass."""
+
+    def __init__(self, rate=1.0, max_level='INFO'):
+        super().__init__()
+        self.rate = float(rate)
+        self.max_level = logging.getLevelName(max_level)
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or record.levelno > self.max_level:
+            return True
+        return random.random() < self.rate
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Formatter that caps the length of the message part of a record."""
+
+    def __init__(self, fmt=None, datefmt=None, style='%', max_length=2000):
+        super().__init__(fmt, datefmt, style)
+        self.max_length = max_length
+
+    def formatMessage(self, record):
+        if len(record.message) > self.max_length:
+            extra = len(record.message) - self.max_length
+            record.message = f"{record.message[:self.max_length]}... [{extra} more characters]"
+        return super().formatMessage(record)
@@ -0,0 +1,287 @@
+"""Per-endpoint request metrics in Prometheus text format.
+
+Each worker process keeps its counters in memory and periodically writes a
+snapshot to ``METRICS_DIR/<pid>-<start time>.json``; the start time keeps a
+reused pid from taking over a dead worker's counters. The ``/metrics`` view
+merges the snapshots of every worker on the host. A snapshot is removed once
+its process has exited, or when it has not been written for
+``METRICS_STALE_SECONDS``, so a worker idle for that long drops out until its
+next request.
+
+``METRICS_ALLOWED_IPS`` restricts ``/metrics`` to the listed addresses and
+networks; ``None`` leaves it open.
+"""
+import contextvars
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests handled, by view, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by view'),
+    'http_response_size_bytes_total': ('counter', 'Response body bytes by view'),
+    'db_queries_total': ('counter', 'Database queries by view'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries by view'),
+    'predictor_requests_total': ('counter', 'Outbound risk predictor calls by view and outcome'),
+    'predictor_request_duration_seconds': ('histogram', 'Outbound risk predictor latency by view'),
+    'student_response_cache_requests_total': ('counter', 'Per-student response cache lookups by result'),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_last_flush = 0.0
+_process_id = f'{os.getpid()}-{time.time_ns()}'
+
+# View name of the request being handled, for metrics recorded outside the middleware.
+current_view = contextvars.ContextVar('current_view', default='')
+
+
+def _after_fork():
+    # A forked worker starts its own counters under its own snapshot name.
+    global _process_id, _last_flush
+    _process_id = f'{os.getpid()}-{time.time_ns()}'
+    _last_flush = 0.0
+    _counters.clear()
+    _histograms.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def inc(name, labels, value=1):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, labels, value, buckets=LATENCY_BUCKETS):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(histogram['buckets']):
+            if value <= bound:
+                histogram['counts'][i] += 1
+                break
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def _metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR', Path(tempfile.gettempdir()) / 'student_management_metrics'))
+
+
+def flush(force=False):
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+        return
+    _last_flush = now
+    with _lock:
+        snapshot = {
+            'counters': [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, dict(labels), histogram] for (name, labels), histogram in _histograms.items()],
+        }
+    directory = _metrics_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{_process_id}.json'
+    temp_path = path.with_suffix('.tmp')
+    temp_path.write_text(json.dumps(snapshot))
+    os.replace(temp_path, path)
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OverflowError):
+        pass
+    return True
+
+
+def _is_stale(path, now):
+    """Whether ``path`` is the snapshot of an exited or long-silent process."""
+    if path.stem == _process_id:
+        return False
+    try:
+        pid = int(path.stem.split('-', 1)[0])
+        age = now - path.stat().st_mtime
+    except (ValueError, OSError):
+        return True
+    return not _pid_running(pid) or age > getattr(settings, 'METRICS_STALE_SECONDS', 3600)
+
+
+def collect():
+    """Merge the snapshots of all live workers, removing stale ones."""
+    flush(force=True)
+    counters = {}
+    histograms = {}
+    now = time.time()
+    for path in _metrics_dir().glob('*.json'):
+        if _is_stale(path, now):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot['counters']:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = _key(name, labels)
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = {**histogram, 'counts': list(histogram['counts'])}
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], histogram['counts'])]
+            merged['sum'] += histogram['sum']
+            merged['count'] += histogram['count']
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def render():
+    counters, histograms = collect()
+    lines = []
+    for metric, (kind, description) in HELP.items():
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} {kind}')
+        if kind == 'counter':
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+            continue
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _client_allowed(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed is None:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in allowed)
+
+
+def metrics_view(request):
+    if not _client_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def _wrap_connections(stack, wrapper):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+
+
+class MetricsMiddleware:
+    """Records latency, status, response size and database work per view."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        token = current_view.set('')
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, timer)
+                response = self.get_response(request)
+        finally:
+            current_view.reset(token)
+        self.record(request, response, timer, time.perf_counter() - started)
+        flush()
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        token = current_view.set('')
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            # Under ASGI the ORM runs in the request's sync thread, which has
+            # its own connections, so the wrappers are installed there.
+            await sync_to_async(_wrap_connections)(stack, timer)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            current_view.reset(token)
+        self.record(request, response, timer, time.perf_counter() - started)
+        await sync_to_async(flush)()
+        return response
+
+    def record(self, request, response, timer, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        inc('http_requests_total', {'view': view, 'method': request.method, 'status': response.status_code})
+        observe('http_request_duration_seconds', {'view': view}, elapsed)
+        if not response.streaming:
+            inc('http_response_size_bytes_total', {'view': view}, len(response.content))
+        inc('db_queries_total', {'view': view}, timer.count)
+        inc('db_query_duration_seconds_total', {'view': view}, timer.duration)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
+        return None
@@ -0,0 +1,208 @@
+"""Opt-in request profiling.
+
+A request is profiled when a staff user sends ``X-Profile: 1`` or
+``?profile=1``, or when it is picked by ``PROFILING_SAMPLE_RATE``. The
+cProfile stats are stored as a ``.prof`` file next to a JSON summary with
+the top cumulative functions and the slowest SQL queries, and can be listed
+and downloaded by admins under ``/api/profiles/``.
+"""
+import cProfile
+import json
+import pstats
+import random
+import tempfile
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+def _profiles_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(tempfile.gettempdir()) / 'student_management_profiles'))
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) != 2 or header[0] != 'Token':
+        return False
+    # Imported here: the authentication module pulls in the attendance models.
+    from attendance.authentication import CachedTokenAuthentication
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(header[1])
+    except AuthenticationFailed:
+        return False
+    return user.is_staff
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({'sql': sql, 'duration': time.perf_counter() - started})
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def should_profile(self, request):
+        requested = request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1'
+        if requested and _is_staff(request):
+            return True
+        return random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        recorder = _QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, recorder)
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+        profile_id = self.store(request, response, profiler, recorder.queries, elapsed)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    async def __acall__(self, request):
+        if not await sync_to_async(self.should_profile)(request):
+            return await self.get_response(request)
+
+        # cProfile only sees the event loop thread, so under ASGI the profile
+        # covers the async code of every request running concurrently. SQL is
+        # recorded in the request's sync thread.
+        profiler = cProfile.Profile()
+        recorder = _QueryRecorder()
+        started = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, recorder)
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+            await sync_to_async(stack.close)()
+        elapsed = time.perf_counter() - started
+        profile_id = await sync_to_async(self.store)(request, response, profiler, recorder.queries, elapsed)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def wrap_connections(self, stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def store(self, request, response, profiler, queries, elapsed):
+        top_n = getattr(settings, 'PROFILING_TOP_N', 40)
+        directory = _profiles_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        # Microseconds keep ids from the same second in order for pruning.
+        profile_id = f"{timezone.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        profiler.dump_stats(directory / f'{profile_id}.prof')
+
+        stats = pstats.Stats(profiler)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+        match = getattr(request, 'resolver_match', None)
+        summary = {
+            'id': profile_id,
+            'created': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'user': getattr(getattr(request, 'user', None), 'username', None),
+            'status': response.status_code,
+            'duration': elapsed,
+            'query_count': len(queries),
+            'query_time': sum(query['duration'] for query in queries),
+            'top_functions': [
+                {
+                    'function': f"{filename}:{line}({name})",
+                    'calls': calls,
+                    'total_time': total_time,
+                    'cumulative_time': cumulative_time,
+                }
+                for (filename, line, name), (_, calls, total_time, cumulative_time, _) in functions
+            ],
+            'slowest_queries': sorted(queries, key=lambda query: query['duration'], reverse=True)[:top_n],
+        }
+        (directory / f'{profile_id}.json').write_text(json.dumps(summary))
+        self.prune(directory)
+        return profile_id
+
+    def prune(self, directory):
+        summaries = sorted(directory.glob('*.json'))
+        for path in summaries[:-getattr(settings, 'PROFILING_MAX_STORED', 200)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def _summary_path(profile_id):
+    # Ids are generated above; anything else cannot name a stored profile.
+    if not profile_id.replace('-', '').isalnum():
+        return None
+    path = _profiles_dir() / f'{profile_id}.json'
+    return path if path.exists() else None
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = []
+        for path in sorted(_profiles_dir().glob('*.json'), reverse=True):
+            summary = json.loads(path.read_text())
+            profiles.append({key: summary[key] for key in (
+                'id', 'created', 'method', 'path', 'view', 'user', 'status', 'duration', 'query_count', 'query_time'
+            )})
+        return Response(profiles, status=status.HTTP_200_OK)
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        path = _summary_path(profile_id)
+        if path is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(json.loads(path.read_text()), status=status.HTTP_200_OK)
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        path = _summary_path(profile_id)
+        if path is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path.with_suffix('.prof'), 'rb'), as_attachment=True, filename=f'{profile_id}.prof')
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,13 +45,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'student_management.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Added for CORS
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'student_management.db_router.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'student_management.profiling.ProfilingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -92,9 +97,28 @@ DATABASES = {
         'PASSWORD': '1234',
         'HOST': 'localhost',
         'PORT': '3306',
+    },
+    # Read replica for the heavy teacher listings and exports
+    # (student_management.db_router). Points at the primary until a replica
+    # is provisioned; tests run it as a mirror of default.
+    'replica': {
+        'ENGINE': 'django.db.backends.mysql',
+        'NAME': 'ML-Project',
+        'USER': 'mlproject',
+        'PASSWORD': '1234',
+        'HOST': 'localhost',
+        'PORT': '3306',
+        'TEST': {
+            'MIRROR': 'default',
+        },
     }
 }
 
+DATABASE_ROUTERS = ['student_management.db_router.ReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica'
+# Seconds a user's reads stay on the primary after they wrote; keep above the replication lag
+REPLICA_PIN_SECONDS = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -140,7 +164,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'attendance.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ]
 }
@@ -148,17 +172,113 @@ REST_FRAMEWORK = {
 # Custom User Model
 AUTH_USER_MODEL = 'attendance.User'
 
+# Cache
+# Shared by every worker process on the host, so a version bump made by one
+# worker invalidates the cached responses of all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    }
+}
+
+# Seconds a cached per-student response is kept (attendance.cache)
+STUDENT_RESPONSE_CACHE_TIMEOUT = 3600
+
+# Seconds an authenticated token and its user/student are cached (attendance.authentication)
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# Seconds past (closed) attendance analytics buckets are cached; 0 disables (attendance.analytics)
+ATTENDANCE_SERIES_CACHE_TIMEOUT = 3600
+
+# Seconds a course's ranks and percentiles are cached; writes to its marks invalidate them (attendance.rankings)
+COURSE_STANDINGS_CACHE_TIMEOUT = 3600
+
+# Rows changed within this many seconds are held back by the sync API; keep it above the
+# longest write transaction, as rows committed later than this are never synced (attendance.sync)
+SYNC_SETTLE_SECONDS = 2
+# Days deletion tombstones are kept; older cursors get 410 and must resync (attendance.sync,
+# pruned by `manage.py prune_sync_tombstones`)
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Live attendance feed (attendance.live): events buffered per subscriber before it
+# is reset, seconds between keepalives, client reconnect delay
+LIVE_FEED_QUEUE_SIZE = 100
+LIVE_FEED_HEARTBEAT_SECONDS = 15
+LIVE_FEED_RETRY_MILLISECONDS = 3000
+
+# Attendance percentage below which a student is counted as at risk in course summaries (risk_analysis.summary)
+ATTENDANCE_WARNING_THRESHOLD = 75.0
+
+# Risk model endpoint (risk_analysis.predictor)
+RISK_PREDICTOR_URL = 'https://ahmadabdulkhaliq-ppas-model-api.hf.space/predict/'
+# Seconds the risk views wait for the model (risk_analysis.predictor)
+RISK_PREDICTOR_TIMEOUT = 30.0
+
+# Per-user (per-IP when anonymous) token bucket on the risk views: refill rate and
+# burst size; a rate of None disables it (risk_analysis.admission)
+RISK_THROTTLE_RATE = '12/min'
+RISK_THROTTLE_BURST = 10
+# Concurrent calls to the risk model across the host's workers, requests waiting for
+# one, seconds they wait, and the Retry-After of a shed request (risk_analysis.admission)
+RISK_PREDICTOR_CONCURRENCY = 8
+RISK_PREDICTOR_QUEUE_SIZE = 16
+RISK_PREDICTOR_QUEUE_TIMEOUT = 10.0
+RISK_PREDICTOR_RETRY_AFTER = 5
+# Lock files of the predictor slots and throttle buckets
+RISK_PREDICTOR_SLOTS_DIR = BASE_DIR / 'var' / 'predictor-slots'
+
+# Seconds before a worker rebuilds its student search index even if no change was signalled (attendance.search)
+STUDENT_SEARCH_INDEX_MAX_AGE = 300
+
+# Stored all-students CSV exports (attendance.export_jobs)
+EXPORTS_DIR = BASE_DIR / 'var' / 'exports'
+EXPORTS_MAX_STORED = 3
+# A partial export untouched this long is treated as abandoned and restarted
+EXPORT_STALE_SECONDS = 600
+
+# Per-worker metric snapshots merged by /metrics (student_management.metrics)
+METRICS_DIR = BASE_DIR / 'var' / 'metrics'
+METRICS_FLUSH_INTERVAL = 1.0
+# Snapshots of exited workers, or not written for this long, are removed
+METRICS_STALE_SECONDS = 3600
+# Addresses or networks allowed to read /metrics; None allows everyone
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# On-demand profiling (student_management.profiling)
+PROFILING_DIR = BASE_DIR / 'var' / 'profiles'
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_TOP_N = 40
+PROFILING_MAX_STORED = 200
+
 # settings.py
 # (Existing content remains unchanged until the end)
 
 # Logging configuration
+# Records go through a bounded in-memory queue and are formatted and written
+# by a background thread (student_management.log_handlers). The per-request
+# INFO messages of the read views (logged with extra=SAMPLED) are sampled at
+# LOG_VIEW_SAMPLE_RATE; writes, uploads and other events are always kept.
+LOG_VIEW_SAMPLE_RATE = 0.1
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
+            '()': 'student_management.log_handlers.TruncatingFormatter',
+            'fmt': '{levelname} {asctime} {module} {message}',
             'style': '{',
+            'max_length': 2000,
+        },
+    },
+    'filters': {
+        'sample_views': {
+            '()': 'student_management.log_handlers.SamplingFilter',
+            'rate': LOG_VIEW_SAMPLE_RATE,
         },
     },
     'handlers': {
@@ -173,22 +293,37 @@ LOGGING = {
             'formatter': 'verbose',
             'level': 'INFO',
         },
+        'queue': {
+            'class': 'student_management.log_handlers.AsyncQueueHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+        },
     },
     'loggers': {
         '': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'attendance.views': {  # Match the logger name from views.py
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'filters': ['sample_views'],
+            'propagate': False,
+        },
+        'risk_analysis.views': {
+            'handlers': ['queue'],
             'level': 'INFO',
+            'filters': ['sample_views'],
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
+
+# `manage.py test` keeps its records out of the tracked debug.log
+if sys.argv[1:2] == ['test']:
+    LOGGING['handlers']['file']['filename'] = os.devnull
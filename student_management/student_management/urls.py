@@ -1,8 +1,14 @@
 from django.contrib import admin
 from django.urls import path, include
+from .metrics import metrics_view
+from .profiling import ProfileListView, ProfileDetailView, ProfileDownloadView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('attendance.urls')),
     path('api/', include('risk_analysis.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path('api/profiles/<str:profile_id>/download/', ProfileDownloadView.as_view(), name='profile-download'),
 ]
\ No newline at end of file
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_management.settings')
 
 application = get_wsgi_application()
+
+# Build the student search index in the background so the first search doesn't wait for it.
+from attendance.search import preload  # noqa: E402
+
+preload()